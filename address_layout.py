@@ -0,0 +1,114 @@
+import numpy as np
+
+# Field widths of the address layout used by the trace generators in tr.py:
+# Row | Bank Group | Bank | Column | Offset  (MSB -> LSB)
+ROW_BITS = 16
+BANK_GROUP_BITS = 1
+BANK_BITS = 2
+COLUMN_BITS = 10
+OFFSET_BITS = 3
+
+FIELDS = ("row", "bank_group", "bank", "column", "offset")
+
+
+class AddressLayout:
+    def __init__(self, bits, order=FIELDS):
+        # order lists the fields from the most to the least significant bits
+        self.order = tuple(order)
+        self.bits = {field: int(bits[field]) for field in self.order}
+
+        self.shifts = {}
+        shift = 0
+        for field in reversed(self.order):
+            self.shifts[field] = shift
+            shift += self.bits[field]
+        self.total_bits = shift
+
+    def __repr__(self):
+        fields = " | ".join(f"{field}:{self.bits[field]}" for field in self.order)
+        return f"AddressLayout({fields})"
+
+    def field_count(self, field):
+        return 1 << self.bits[field]
+
+    @property
+    def num_banks(self):
+        # Banks across all bank groups, i.e. 8 for the default layout
+        return self.field_count("bank_group") * self.field_count("bank")
+
+    @property
+    def capacity(self):
+        # Bytes addressable with this layout
+        return 1 << self.total_bits
+
+    def decode(self, addresses):
+        # Split every address into its fields, vectorized over the whole array
+        addresses = np.asarray(addresses, dtype=np.uint64)
+        fields = {}
+        for field in self.order:
+            mask = np.uint64((1 << self.bits[field]) - 1)
+            fields[field] = (addresses >> np.uint64(self.shifts[field])) & mask
+        return fields
+
+    def encode(self, **fields):
+        # Inverse of decode(); missing fields are taken as zero
+        address = np.uint64(0)
+        for field, value in fields.items():
+            value = np.asarray(value, dtype=np.uint64)
+            address = address | (value << np.uint64(self.shifts[field]))
+        return address
+
+    def bank_id(self, fields):
+        # Flat bank index in [0, num_banks): bank group major, bank minor
+        return fields["bank_group"] * np.uint64(self.field_count("bank")) + fields["bank"]
+
+
+
+class HashedLayout(AddressLayout):
+    # Layout with XOR bank hashing: the controller indexes the bank group and
+    # bank with their address bits XORed with the lowest row bits, so rows that
+    # would collide in one bank are spread across banks. xor lists the hashed
+    # fields; each takes the next unused row bits, starting at row bit 0.
+    def __init__(self, bits, order=FIELDS, xor=()):
+        super().__init__(bits, order)
+        self.xor = tuple(xor)
+
+    def __repr__(self):
+        hashed = f", xor={'+'.join(self.xor)}" if self.xor else ""
+        return super().__repr__()[:-1] + hashed + ")"
+
+    def row_bits(self, field):
+        # Row bits hashed into `field`, as (first bit, count)
+        first = 0
+        for hashed in self.xor:
+            if hashed == field:
+                return first, self.bits[field]
+            first += self.bits[hashed]
+        return None
+
+    def decode(self, addresses):
+        fields = super().decode(addresses)
+        for field in self.xor:
+            first, count = self.row_bits(field)
+            mask = np.uint64((1 << count) - 1)
+            fields[field] = fields[field] ^ ((fields["row"] >> np.uint64(first)) & mask)
+        return fields
+
+    def encode(self, **fields):
+        # Inverse of decode(): the stored bank bits are the index XOR the row bits
+        row = np.asarray(fields.get("row", 0), dtype=np.uint64)
+        for field in self.xor:
+            if field in fields:
+                first, count = self.row_bits(field)
+                mask = np.uint64((1 << count) - 1)
+                fields[field] = np.asarray(fields[field], dtype=np.uint64) ^ ((row >> np.uint64(first)) & mask)
+        return super().encode(**fields)
+
+
+DEFAULT_LAYOUT = AddressLayout({
+    "row": ROW_BITS,
+    "bank_group": BANK_GROUP_BITS,
+    "bank": BANK_BITS,
+    "column": COLUMN_BITS,
+    "offset": OFFSET_BITS,
+})
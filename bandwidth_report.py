@@ -0,0 +1,182 @@
+import argparse
+import csv
+import sys
+
+import numpy as np
+
+from report_plots import size_label, variant_of
+from results_store import DEFAULT_STORE, load_records
+
+# Bandwidth efficiency of every simulated (pattern, size, config) point.
+# Ramulator reports maximum_bandwidth in bytes per second for the channel;
+# a 64-bit DDR channel moves 16 bytes per DRAM clock at peak, so the clock
+# and the achieved bandwidth follow from bytes per DRAM cycle.
+PEAK_BYTES_PER_CYCLE = 2 * 64 // 8
+# A pattern has saturated once it reaches this fraction of its best efficiency
+SATURATION_FRACTION = 0.95
+
+COLUMNS = [
+    ("pattern", "{}"),
+    ("config", "{}"),
+    ("size", "{}"),
+    ("achieved_GBps", "{:.3f}"),
+    ("percent_of_peak", "{:.1f}"),
+    ("bytes_per_cycle", "{:.3f}"),
+    ("requests_per_active_cycle", "{:.3f}"),
+    ("saturated", "{}"),
+]
+
+
+def efficiency(stats):
+    # None for a point whose stats file lacks the keys (e.g. a failed run)
+    cycles = stats.get("ramulator.dram_cycles")
+    if not cycles:
+        return None
+    total_bytes = stats.get("ramulator.read_transaction_bytes_0", 0) + \
+                  stats.get("ramulator.write_transaction_bytes_0", 0)
+    bytes_per_cycle = total_bytes / cycles
+    clock = stats.get("ramulator.maximum_bandwidth", 0) / PEAK_BYTES_PER_CYCLE
+    active = stats.get("ramulator.active_cycles_0")
+    return {
+        "achieved_bandwidth": bytes_per_cycle * clock,
+        "peak_bandwidth": stats.get("ramulator.maximum_bandwidth", 0),
+        "percent_of_peak": 100 * bytes_per_cycle / PEAK_BYTES_PER_CYCLE,
+        "bytes_per_cycle": bytes_per_cycle,
+        "requests_per_active_cycle": stats.get("ramulator.incoming_requests_per_channel", 0) / active
+        if active else 0.0,
+    }
+
+
+def efficiency_series(records):
+    # {(pattern, config): {size: efficiency}}; later records for a point win
+    series = {}
+    for record in records:
+        values = efficiency(record.get("stats", {}))
+        if values is not None and "scenario" in record and "size" in record:
+            series.setdefault((record["scenario"], variant_of(record)), {})[float(record["size"])] = values
+    return series
+
+
+def saturation_size(by_size, fraction=SATURATION_FRACTION):
+    # Smallest size from which the efficiency stays within `fraction` of its best
+    sizes = sorted(by_size)
+    percent = np.array([by_size[size]["percent_of_peak"] for size in sizes])
+    if len(sizes) < 2 or percent.max() <= 0:
+        return None
+    below = np.nonzero(percent < fraction * percent.max())[0]
+    first = below[-1] + 1 if len(below) else 0
+    return sizes[first] if first < len(sizes) else None
+
+
+def rank_patterns(series):
+    # Patterns ordered by their mean percent of peak over the sizes swept
+    scores = []
+    for key, by_size in series.items():
+        percent = [values["percent_of_peak"] for values in by_size.values()]
+        scores.append((float(np.mean(percent)), float(np.max(percent)), key, saturation_size(by_size)))
+    return sorted(scores, key=lambda score: -score[0])
+
+
+def report_rows(series):
+    rows = []
+    for (pattern, config), by_size in series.items():
+        saturated = saturation_size(by_size)
+        for size, values in sorted(by_size.items()):
+            rows.append({
+                "pattern": pattern,
+                "config": config or "-",
+                "size": size,
+                "achieved_GBps": values["achieved_bandwidth"] / 1e9,
+                "percent_of_peak": values["percent_of_peak"],
+                "bytes_per_cycle": values["bytes_per_cycle"],
+                "requests_per_active_cycle": values["requests_per_active_cycle"],
+                "saturated": "*" if saturated is not None and size >= saturated else "",
+            })
+    return rows
+
+
+def sort_rows(rows, column, descending=False):
+    # Rows without a value in `column` go last in either direction
+    filled = [row for row in rows if row[column] != ""]
+    empty = [row for row in rows if row[column] == ""]
+    return sorted(filled, key=lambda row: row[column], reverse=descending) + empty
+
+
+def print_table(rows):
+    names = [name for name, _ in COLUMNS]
+    cells = [[size_label(row[name]) if name == "size" else form.format(row[name])
+              for name, form in COLUMNS] for row in rows]
+    widths = [max([len(name)] + [len(cell[i]) for cell in cells]) for i, name in enumerate(names)]
+    print("  ".join(name.ljust(width) for name, width in zip(names, widths)))
+    for cell in cells:
+        print("  ".join(value.ljust(width) if name in ("pattern", "config") else value.rjust(width)
+                        for name, value, width in zip(names, cell, widths)))
+
+
+def plot_roofline(series, output):
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    fig = plt.figure(figsize=(10, 6))
+    peaks = set()
+    for (pattern, config), by_size in sorted(series.items()):
+        sizes = sorted(by_size)
+        achieved = [by_size[size]["achieved_bandwidth"] / 1e9 for size in sizes]
+        peaks.update(by_size[size]["peak_bandwidth"] for size in sizes)
+        label = f"{pattern} {config}".strip()
+        line, = plt.plot(sizes, achieved, marker='o', linestyle='-', label=label)
+        saturated = saturation_size(by_size)
+        if saturated is not None:
+            plt.plot([saturated], [by_size[saturated]["achieved_bandwidth"] / 1e9], marker='*',
+                     markersize=14, color=line.get_color(), linestyle='none')
+    # The roof: the channel's peak bandwidth, one line per distinct config speed
+    for peak in sorted(peaks):
+        if peak:
+            plt.axhline(peak / 1e9, color='k', linestyle='--', linewidth=1)
+            plt.annotate(f"peak {peak / 1e9:.1f} GB/s", (plt.xlim()[0], peak / 1e9), va='bottom')
+    plt.title("DDR4 - Achieved Bandwidth (* = saturation size)")
+    plt.xlabel('Trace File Size (Bytes)')
+    plt.xscale('log', base=2)
+    plt.ylabel('Achieved Bandwidth (GB/s)')
+    plt.grid(True)
+    plt.legend()
+    fig.savefig(output)
+    plt.close(fig)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rank access patterns by DRAM bandwidth efficiency")
+    parser.add_argument("--store", default=DEFAULT_STORE)
+    parser.add_argument("--sort", default="percent_of_peak", choices=[name for name, _ in COLUMNS])
+    parser.add_argument("--ascending", action="store_true")
+    parser.add_argument("--csv", help="also write the table to this CSV file ('-' for stdout)")
+    parser.add_argument("--output", default="bandwidth_roofline.png", help="roofline-style plot")
+    args = parser.parse_args()
+
+    series = efficiency_series(load_records(args.store))
+    if not series:
+        print(f"No simulated points with bandwidth stats in {args.store}.")
+        return
+
+    print("Patterns ranked by mean percent of peak bandwidth:")
+    for rank, (mean, best, (pattern, config), saturated) in enumerate(rank_patterns(series), 1):
+        where = f"saturates at {size_label(saturated)} B" if saturated is not None else "not saturated"
+        print(f"  {rank}. {pattern} {config}".rstrip() + f": {mean:.1f}% mean, {best:.1f}% best, {where}")
+    print()
+
+    rows = sort_rows(report_rows(series), args.sort, not args.ascending)
+    print_table(rows)
+    if args.csv:
+        f = sys.stdout if args.csv == '-' else open(args.csv, 'w', newline='')
+        writer = csv.DictWriter(f, fieldnames=[name for name, _ in COLUMNS])
+        writer.writeheader()
+        writer.writerows(rows)
+        if f is not sys.stdout:
+            f.close()
+    plot_roofline(series, args.output)
+    print(f"Wrote {args.output}.")
+
+
+if __name__ == "__main__":
+    main()
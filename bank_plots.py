@@ -0,0 +1,127 @@
+import argparse
+import os
+
+import matplotlib
+matplotlib.use("Agg")  # figures are only written to files
+import matplotlib.pyplot as plt
+import numpy as np
+
+from address_layout import DEFAULT_LAYOUT
+from manifest import load_manifest
+from ramulator_stats import parse_stats_file
+from trace_io import TEXT_LINE_BYTES, TRACE_DTYPE, is_binary_trace, iter_trace
+
+# Timelines are drawn with at most this many windows, whatever the trace length
+MAX_WINDOWS = 2000
+MIN_WINDOW = 32
+
+# Ramulator stats shown next to the plots when a stats file is given
+STATS_SHOWN = [
+    "ramulator.row_hits_channel_0_core",
+    "ramulator.row_misses_channel_0_core",
+    "ramulator.row_conflicts_channel_0_core",
+    "ramulator.dram_cycles",
+    "ramulator.read_latency_avg_0",
+]
+
+
+def estimate_requests(filename):
+    # From the manifest or the file size, to size the windows without an extra
+    # pass over the trace
+    manifest = load_manifest(filename)
+    if manifest is not None:
+        return manifest["requests"]
+    record_bytes = TRACE_DTYPE.itemsize if is_binary_trace(filename) else TEXT_LINE_BYTES
+    return os.path.getsize(filename) // record_bytes
+
+
+def bank_activity(filename, layout=DEFAULT_LAYOUT, window=None):
+    # Per-(bank group, bank) totals and per-window per-bank counts, built from
+    # bincounts over each chunk so the trace is never held in memory at once
+    if window is None:
+        window = max(MIN_WINDOW, -(-estimate_requests(filename) // MAX_WINDOWS))
+    num_banks = layout.num_banks
+    heatmap = np.zeros(num_banks, dtype=np.int64)
+    timeline = np.zeros((0, num_banks), dtype=np.int64)
+
+    for chunk in iter_trace(filename):
+        fields = layout.decode(chunk.addresses[~chunk.malformed])
+        bank_ids = layout.bank_id(fields).astype(np.int64)
+        index = chunk.start + np.flatnonzero(~chunk.malformed)
+        heatmap += np.bincount(bank_ids, minlength=num_banks)
+
+        window_ids = index // window
+        windows = int(window_ids[-1]) + 1 if len(window_ids) else 0
+        if windows > len(timeline):
+            timeline = np.vstack([timeline, np.zeros((windows - len(timeline), num_banks), dtype=np.int64)])
+        timeline += np.bincount(window_ids * num_banks + bank_ids,
+                                minlength=len(timeline) * num_banks).reshape(-1, num_banks)
+
+    heatmap = heatmap.reshape(layout.field_count("bank_group"), layout.field_count("bank"))
+    return heatmap, timeline, window
+
+
+def plot_bank_activity(filename, output=None, stats_file=None, layout=DEFAULT_LAYOUT, window=None):
+    heatmap, timeline, window = bank_activity(filename, layout, window)
+    occupancy = np.count_nonzero(timeline, axis=1)
+
+    fig, (ax_heat, ax_timeline, ax_occupancy) = plt.subplots(
+        3, 1, figsize=(10, 12), gridspec_kw={"height_ratios": [1, 2, 1]})
+    fig.suptitle(f"DDR4 - Bank Activity ({os.path.basename(filename)})")
+
+    image = ax_heat.imshow(heatmap, cmap="viridis", aspect="auto")
+    ax_heat.set_title("Requests per Bank")
+    ax_heat.set_xlabel("Bank")
+    ax_heat.set_ylabel("Bank Group")
+    ax_heat.set_xticks(range(heatmap.shape[1]))
+    ax_heat.set_yticks(range(heatmap.shape[0]))
+    for (group, bank), count in np.ndenumerate(heatmap):
+        ax_heat.text(bank, group, str(count), ha="center", va="center", color="w")
+    fig.colorbar(image, ax=ax_heat)
+
+    image = ax_timeline.imshow(timeline.T, cmap="magma", aspect="auto", interpolation="nearest",
+                               extent=(0, len(timeline) * window, layout.num_banks - 0.5, -0.5))
+    ax_timeline.set_title(f"Requests per Bank over Time ({window} requests per window)")
+    ax_timeline.set_xlabel("Request")
+    ax_timeline.set_ylabel("Bank (group * banks + bank)")
+    fig.colorbar(image, ax=ax_timeline)
+
+    ax_occupancy.plot(np.arange(len(occupancy)) * window, occupancy, linestyle='-', color='b')
+    ax_occupancy.set_title("Busy Banks per Window")
+    ax_occupancy.set_xlabel("Request")
+    ax_occupancy.set_ylabel("Banks")
+    ax_occupancy.set_ylim(0, layout.num_banks + 0.5)
+    ax_occupancy.grid(True)
+
+    if stats_file:
+        stats = parse_stats_file(stats_file)
+        text = "\n".join(f"{key.replace('ramulator.', '')}: {stats[key]:g}"
+                         for key in STATS_SHOWN if key in stats)
+        fig.text(0.99, 0.99, text, ha="right", va="top", fontsize=8, family="monospace")
+
+    if output is None:
+        output = os.path.splitext(filename)[0] + "_banks.png"
+    fig.tight_layout()
+    fig.savefig(output)
+    plt.close(fig)
+    return output
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Draw bank heatmaps and bank-occupancy timelines for traces")
+    parser.add_argument("traces", nargs="+")
+    parser.add_argument("--stats", help="Ramulator stats file to show next to the plots")
+    parser.add_argument("--window", type=int, help="requests per timeline window")
+    parser.add_argument("--output-dir", help="directory for the images (default: next to each trace)")
+    args = parser.parse_args()
+
+    for filename in args.traces:
+        output = None
+        if args.output_dir:
+            name = os.path.splitext(os.path.basename(filename))[0] + "_banks.png"
+            output = os.path.join(args.output_dir, name)
+        print(f"Wrote {plot_bank_activity(filename, output, args.stats, window=args.window)}.")
+
+
+if __name__ == "__main__":
+    main()
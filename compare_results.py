@@ -0,0 +1,139 @@
+import argparse
+import sys
+
+import numpy as np
+
+from results_store import load_records, point_key, point_label
+
+# +1 when a larger value is a regression, -1 when a smaller value is
+DIRECTIONS = {
+    "ramulator.dram_cycles": +1,
+    "ramulator.read_latency_avg_0": +1,
+    "ramulator.in_queue_req_num_avg": +1,
+    "ramulator.row_conflicts_channel_0_core": +1,
+    "transaction_bytes_to_bandwidth_ratio": -1,
+}
+DEFAULT_TOLERANCE = 0.02  # relative change allowed before a point counts as moved
+
+
+def record_metrics(record):
+    metrics = dict(record.get("stats", {}))
+    # Same derived ratio as tr.py's transaction_bytes_to_bandwidth_ratio
+    max_bandwidth = metrics.get("ramulator.maximum_bandwidth")
+    if max_bandwidth:
+        total_bytes = metrics.get("ramulator.read_transaction_bytes_0", 0) + \
+                      metrics.get("ramulator.write_transaction_bytes_0", 0)
+        metrics["transaction_bytes_to_bandwidth_ratio"] = total_bytes / max_bandwidth
+    return metrics
+
+
+def metric_table(records):
+    # Later records for the same point replace earlier ones
+    table = {}
+    for record in records:
+        table[point_key(record)] = record_metrics(record)
+    return table
+
+
+def compare(current, baseline, metrics=None, tolerances=None, default_tolerance=DEFAULT_TOLERANCE):
+    current_table = metric_table(current)
+    baseline_table = metric_table(baseline)
+    points = sorted(set(current_table) & set(baseline_table), key=point_label)
+    if metrics is None:
+        metrics = sorted({key for values in current_table.values() for key in values} &
+                         {key for values in baseline_table.values() for key in values})
+
+    def matrix(table):
+        return np.array([[table[point].get(metric, np.nan) for metric in metrics] for point in points],
+                        dtype=float).reshape(len(points), len(metrics))
+
+    cur = matrix(current_table)
+    base = matrix(baseline_table)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        delta = np.where(base != 0, (cur - base) / np.abs(base), np.where(cur == base, 0.0, np.inf))
+
+    tolerances = tolerances or {}
+    tolerance = np.array([tolerances.get(metric, default_tolerance) for metric in metrics])
+    direction = np.array([DIRECTIONS.get(metric, 0) for metric in metrics])
+    # Only metrics with a known "better" direction can regress; the rest are reported as moved
+    regressed = (delta * direction > tolerance) & np.isfinite(cur) & np.isfinite(base)
+    # A metric that had a value and now is NaN (or infinite) fails whatever its direction
+    invalid = ~np.isfinite(cur) & np.isfinite(base)
+    moved = (np.abs(delta) > tolerance) | invalid
+
+    return {
+        "points": points,
+        "metrics": metrics,
+        "current": cur,
+        "baseline": base,
+        "delta": delta,
+        "tolerance": tolerance,
+        "regressed": regressed,
+        "invalid": invalid,
+        "moved": moved,
+        "missing": sorted(set(baseline_table) - set(current_table), key=point_label),
+        "added": sorted(set(current_table) - set(baseline_table), key=point_label),
+    }
+
+
+def print_summary(comparison, top=20):
+    delta = comparison["delta"]
+    # Rank by how far past its tolerance each (point, metric) moved
+    score = np.nan_to_num(np.abs(delta) / np.maximum(comparison["tolerance"], 1e-12), nan=0.0, posinf=np.inf)
+    score[comparison["invalid"]] = np.inf
+    rows, cols = np.nonzero(comparison["moved"])
+    order = np.argsort(-score[rows, cols], kind="stable")[:top]
+
+    print(f"Compared {len(comparison['points'])} points x {len(comparison['metrics'])} metrics: "
+          f"{int(comparison['moved'].sum())} moved, {int(comparison['regressed'].sum())} regressed, "
+          f"{int(comparison['invalid'].sum())} no longer finite.")
+    for point in comparison["missing"]:
+        print(f"    missing from current: {point_label(point)}")
+    for point in comparison["added"]:
+        print(f"    new in current:       {point_label(point)}")
+
+    for i in order:
+        row, col = rows[i], cols[i]
+        flag = "moved"
+        if comparison["regressed"][row, col]:
+            flag = "REGRESSION"
+        elif comparison["invalid"][row, col]:
+            flag = "NOT FINITE"
+        print(f"    {flag:10s} {point_label(comparison['points'][row]):30s} {comparison['metrics'][col]:45s} "
+              f"{comparison['baseline'][row, col]:>14g} -> {comparison['current'][row, col]:<14g} "
+              f"({delta[row, col]:+.2%})")
+
+
+def parse_tolerances(values):
+    tolerances = {}
+    for value in values or []:
+        metric, _, tolerance = value.rpartition('=')
+        tolerances[metric] = float(tolerance)
+    return tolerances
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare a sweep's results against a stored baseline")
+    parser.add_argument("current", help="results store of the new sweep")
+    parser.add_argument("baseline", help="results store of the baseline sweep")
+    parser.add_argument("--metric", action="append", dest="metrics",
+                        help="metric to compare (default: every metric present in both)")
+    parser.add_argument("--tolerance", action="append", metavar="METRIC=FRACTION",
+                        help="per-metric relative tolerance, e.g. ramulator.dram_cycles=0.05")
+    parser.add_argument("--default-tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--top", type=int, default=20, help="number of worst-moved points to list")
+    parser.add_argument("--allow-missing", action="store_true",
+                        help="pass even when baseline points are missing from the current results")
+    args = parser.parse_args()
+
+    comparison = compare(load_records(args.current), load_records(args.baseline), args.metrics,
+                         parse_tolerances(args.tolerance), args.default_tolerance)
+    print_summary(comparison, args.top)
+    # Regressions, metrics that became NaN and (unless allowed) vanished points fail the gate
+    if comparison["regressed"].any() or comparison["invalid"].any() or \
+            (comparison["missing"] and not args.allow_missing):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+import argparse
+import itertools
+
+import numpy as np
+
+from bandwidth_report import efficiency
+from generators import GENERATORS
+from live_dashboard import LiveDashboard
+from report_plots import PLOT_DIR, refresh_figures
+from results_store import DEFAULT_STORE
+from sweep import BASE_CONFIG, DEFAULT_SCENARIOS, DEFAULT_SIZES, RAMULATOR, Job, run_sweep
+from trace_cache import TraceCache, parse_bytes
+
+# Expands a grid of Ramulator config values, e.g.
+#   --grid speed=DDR4_1600K,DDR4_2400R --grid channels=1,2
+# into one sweep job per (config, scenario, size). Each run gets its own
+# config file in its sandbox and its record is tagged with the values.
+
+
+def parse_grid(values):
+    grid = {}
+    for value in values or []:
+        key, _, choices = value.partition('=')
+        grid[key.strip()] = [choice.strip() for choice in choices.split(',') if choice.strip()]
+    return grid
+
+
+def expand_grid(grid):
+    keys = sorted(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[key] for key in keys))]
+
+
+def grid_jobs(grid, scenarios=DEFAULT_SCENARIOS, sizes=DEFAULT_SIZES, mix="W"):
+    return [Job(scenario, size, mix=mix, params=params)
+            for params in expand_grid(grid)
+            for scenario in scenarios
+            for size in sizes]
+
+
+def throughput(record):
+    # Achieved bytes per second. Per DRAM cycle would favour the slower speed
+    # grades, whose cycles are longer, so the clock is taken into account.
+    values = efficiency(record.get("stats", {}))
+    if values is None or not values["peak_bandwidth"]:
+        return np.nan
+    return values["achieved_bandwidth"]
+
+
+def best_configs(records):
+    # For every scenario, the config with the highest mean throughput over sizes
+    scores = {}
+    for record in records:
+        params = tuple(sorted(record.get("params", {}).items()))
+        scores.setdefault(record["scenario"], {}).setdefault(params, []).append(throughput(record))
+    best = {}
+    for scenario, by_params in scores.items():
+        means = {params: np.nanmean(values) for params, values in by_params.items()
+                 if not np.isnan(values).all()}
+        if means:
+            params = max(means, key=means.get)
+            best[scenario] = (dict(params), means[params])
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep access patterns over a grid of Ramulator config values")
+    parser.add_argument("--grid", action="append", metavar="KEY=V1,V2,...", required=True,
+                        help="config key and the values to sweep; repeat for more keys")
+    parser.add_argument("--scenario", action="append", dest="scenarios", choices=sorted(GENERATORS),
+                        help="default: columns, rows, banks")
+    parser.add_argument("--size", action="append", dest="sizes", type=int, help="default: 256 B .. 256 KiB")
+    parser.add_argument("--mix", default="W", help="op mix of the traces, see opmix.py")
+    parser.add_argument("--workers", type=int, help="parallel Ramulator runs (default: CPUs available)")
+    parser.add_argument("--ramulator", default=RAMULATOR)
+    parser.add_argument("--config", default=BASE_CONFIG, help="base config the grid values are applied to")
+    parser.add_argument("--store", default=DEFAULT_STORE)
+    parser.add_argument("--trace-cache", metavar="DIR", help="reuse generated traces from this cache directory")
+    parser.add_argument("--cache-budget", default="4G", help="byte budget of the trace cache (default: 4G)")
+    parser.add_argument("--metrics-file", help="write sweep progress to this Prometheus textfile (*.prom)")
+    parser.add_argument("--memory-budget", help="memory the parallel runs may use together, e.g. 16G "
+                        "(default: what is available, less a reserve)")
+    parser.add_argument("--live", metavar="PNG", help="keep a dashboard image updated while the sweep runs")
+    parser.add_argument("--serve", type=int, metavar="PORT", help="also serve the dashboard over HTTP")
+    parser.add_argument("--plot-dir", default=PLOT_DIR, help="figures of the store are refreshed here")
+    args = parser.parse_args()
+    trace_cache = TraceCache(args.trace_cache, parse_bytes(args.cache_budget)) if args.trace_cache else None
+    memory_budget = parse_bytes(args.memory_budget) if args.memory_budget else None
+
+    grid = parse_grid(args.grid)
+    jobs = grid_jobs(grid, args.scenarios or DEFAULT_SCENARIOS, args.sizes or DEFAULT_SIZES, args.mix)
+    print(f"Running {len(jobs)} jobs over {len(expand_grid(grid))} configs.")
+    dashboard = None
+    if args.live or args.serve is not None:
+        dashboard = LiveDashboard(args.live or "dashboard.png", total=len(jobs), port=args.serve).start()
+    try:
+        records = run_sweep(jobs, args.workers, args.store, dashboard.publish if dashboard else None, args.metrics_file,
+                            memory_budget, ramulator=args.ramulator, base_config=args.config,
+                            trace_cache=trace_cache)
+    finally:
+        if dashboard is not None:
+            dashboard.stop()
+
+    for scenario, (params, value) in sorted(best_configs(records).items()):
+        values = ", ".join(f"{key}={value}" for key, value in params.items())
+        print(f"{scenario}: best {values} ({value / 1e9:.3f} GB/s achieved)")
+    refresh_figures(args.store, args.plot_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import abc
+
+import numpy as np
+
+from address_layout import DEFAULT_LAYOUT
+from patterns import sequential_banks, sequential_columns, sequential_rows
+
+# Registry of the access-pattern generators a sweep can select by name.
+# A generator emits its address stream in batches with next_batch(n); its only
+# state is the position in the stream, so a trace of any length is written in
+# bounded memory and a shard of it can start anywhere with seek(). New
+# patterns are added with @register and need no change to the sweep scripts.
+GENERATORS = {}
+
+
+def register(cls):
+    GENERATORS[cls.name] = cls
+    return cls
+
+
+def get_generator(name, layout=DEFAULT_LAYOUT, start=0):
+    if name not in GENERATORS:
+        raise ValueError("Invalid scenario")
+    return GENERATORS[name](layout, start)
+
+
+class Generator(abc.ABC):
+    __slots__ = ("layout", "position")
+    name = None
+    # Address fields the pattern walks, in the order they advance
+    fields = ()
+
+    def __init__(self, layout=DEFAULT_LAYOUT, start=0):
+        self.layout = layout
+        self.position = start
+
+    @abc.abstractmethod
+    def addresses(self, index):
+        # Address of every request index in `index` (uint64 array)
+        pass
+
+    def next_batch(self, count):
+        index = np.arange(self.position, self.position + count, dtype=np.uint64)
+        self.position += count
+        return self.addresses(index)
+
+    def seek(self, position):
+        self.position = position
+
+    def period(self):
+        # Requests before the pattern runs out of addresses and wraps around
+        size = 1
+        for field in self.fields:
+            size *= self.layout.field_count(field)
+        return size
+
+
+@register
+class SequentialColumns(Generator):
+    __slots__ = ()
+    name = "columns"
+    fields = ("column", "row")
+
+    def addresses(self, index):
+        return sequential_columns(index, self.layout)
+
+
+@register
+class SequentialRows(Generator):
+    __slots__ = ()
+    name = "rows"
+    fields = ("row", "column")
+
+    def addresses(self, index):
+        return sequential_rows(index, self.layout)
+
+
+@register
+class SequentialBanks(Generator):
+    __slots__ = ()
+    name = "banks"
+    fields = ("bank", "bank_group", "column", "row")
+
+    def addresses(self, index):
+        return sequential_banks(index, self.layout)
+
+
+def pattern_addresses(pattern, start, count, layout=DEFAULT_LAYOUT):
+    return get_generator(pattern, layout, start).next_batch(count)
@@ -0,0 +1,128 @@
+import argparse
+import glob
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+from manifest import MANIFEST_SUFFIX, load_manifest
+from ramulator_config import read_config
+from ramulator_stats import parse_stats_file
+from results_store import append_record, load_records, metric_matrix
+
+# Bulk harvester for archived Ramulator stats files. Every stats file under a
+# directory tree is parsed once, in a worker pool, into a results-store record
+# with its metadata; the harvested records then load as one (files x keys)
+# matrix. Files already in the store with the same size and mtime are skipped,
+# so re-harvesting a growing archive only parses the new runs.
+DEFAULT_PATTERN = "**/*.stats"
+HARVEST_STORE = "harvest.jsonl"
+CHUNK_FILES = 64  # stats files per pool task
+
+
+def find_stats_files(root, pattern=DEFAULT_PATTERN):
+    return sorted(glob.glob(os.path.join(root, pattern), recursive=True))
+
+
+def run_metadata(stats_file):
+    # What the run directory tells about the point: a sweep sandbox holds the
+    # trace's manifest (pattern, size, mix, seed) and the config it ran with
+    directory = os.path.dirname(stats_file)
+    metadata = {}
+    manifests = glob.glob(os.path.join(glob.escape(directory), "*" + MANIFEST_SUFFIX))
+    if len(manifests) == 1:
+        manifest = load_manifest(manifests[0][:-len(MANIFEST_SUFFIX)])
+        params = (manifest or {}).get("params", {})
+        for key, name in (("pattern", "scenario"), ("size", "size"), ("requests", "requests"),
+                          ("mix", "mix"), ("seed", "seed")):
+            if params.get(key) is not None:
+                metadata[name] = params[key]
+        metadata["trace"] = os.path.abspath(manifests[0][:-len(MANIFEST_SUFFIX)])
+    config = os.path.join(directory, "config.cfg")
+    if os.path.exists(config):
+        metadata["config"] = read_config(config)
+    return metadata
+
+
+def harvest_file(stats_file):
+    status = os.stat(stats_file)
+    record = run_metadata(stats_file)
+    record.update({
+        "source": "harvest",
+        "stats_file": os.path.abspath(stats_file),
+        "stats_mtime": status.st_mtime,
+        "stats_bytes": status.st_size,
+        "stats": parse_stats_file(stats_file),
+    })
+    return record
+
+
+def harvest_files(stats_files):
+    return [harvest_file(stats_file) for stats_file in stats_files]
+
+
+def file_signature(path, mtime, size):
+    return (os.path.abspath(path), mtime, size)
+
+
+def harvest(root, pattern=DEFAULT_PATTERN, store=HARVEST_STORE, workers=None, threads=False):
+    # Returns (new records, every harvested record in the store)
+    known = load_records(store) if store else []
+    seen = {file_signature(r["stats_file"], r["stats_mtime"], r["stats_bytes"])
+            for r in known if r.get("source") == "harvest"}
+    todo = []
+    for stats_file in find_stats_files(root, pattern):
+        status = os.stat(stats_file)
+        if file_signature(stats_file, status.st_mtime, status.st_size) not in seen:
+            todo.append(stats_file)
+
+    # Parsing is pure Python, so processes scale past the GIL; threads are
+    # enough when the archive sits on slow storage
+    executor = ThreadPoolExecutor if threads else ProcessPoolExecutor
+    records = []
+    chunks = [todo[i:i + CHUNK_FILES] for i in range(0, len(todo), CHUNK_FILES)]
+    if chunks:
+        with executor(max_workers=workers) as pool:
+            for chunk in pool.map(harvest_files, chunks):
+                records.extend(chunk)
+    if store:
+        for record in records:
+            append_record(record, store)
+    # A file that changed since it was harvested is represented by its latest record
+    latest = {}
+    for record in [r for r in known if r.get("source") == "harvest"] + records:
+        latest[record["stats_file"]] = record
+    return records, list(latest.values())
+
+
+def stats_matrix(records, keys=None):
+    # (files x keys) matrix, NaN where a file lacks a key, with the key names
+    if keys is None:
+        keys = sorted({key for record in records for key in record.get("stats", {})})
+    return metric_matrix(records, keys), keys
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parse every archived Ramulator stats file under a directory")
+    parser.add_argument("root", help="directory tree to search")
+    parser.add_argument("--pattern", default=DEFAULT_PATTERN, help="glob below root (default: %(default)s)")
+    parser.add_argument("--store", default=HARVEST_STORE, help="results store to append the records to")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--threads", action="store_true", help="use a thread pool instead of processes")
+    parser.add_argument("--matrix", help="also save the (files x keys) matrix and metadata to this .npz")
+    args = parser.parse_args()
+
+    new, records = harvest(args.root, args.pattern, args.store, args.workers, args.threads)
+    print(f"Harvested {len(new)} new stats files, {len(records)} in {args.store}.")
+    if args.matrix:
+        matrix, keys = stats_matrix(records)
+        np.savez_compressed(args.matrix, matrix=matrix, keys=np.array(keys),
+                            files=np.array([r["stats_file"] for r in records]),
+                            scenarios=np.array([str(r.get("scenario", "")) for r in records]),
+                            sizes=np.array([float(r.get("size", np.nan)) for r in records]),
+                            mtimes=np.array([r["stats_mtime"] for r in records]))
+        print(f"Wrote {args.matrix} ({matrix.shape[0]} files x {matrix.shape[1]} keys).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+import os
+
+import numpy as np
+
+from address_layout import DEFAULT_LAYOUT
+from generators import get_generator
+from manifest import ManifestBuilder
+from ramulator_config import read_config
+from trace_io import CHUNK_REQUESTS, format_cpu_text
+
+# Injection-rate-controlled traces. Ramulator's --mode=dram issues a trace
+# back to back, so only the saturated case is ever simulated. In --mode=cpu
+# every trace line is "<bubbles> <address>": the core retires `bubbles`
+# non-memory instructions before issuing the read, which paces the requests.
+#
+# The offered load is given as a fraction of the channel's peak bandwidth.
+# The core retires CPU_IPC instructions per CPU cycle, and runs cpu_tick CPU
+# cycles per mem_tick DRAM cycles (config keys, Ramulator's defaults below),
+# so a request every `gap` instructions offers CPU_IPC * ratio / gap requests
+# per DRAM cycle. Each read moves one LINE_BYTES cache line.
+CPU_IPC = 4
+CPU_TICK = 8
+MEM_TICK = 3
+LINE_BYTES = 64
+PEAK_BYTES_PER_CYCLE = 2 * 64 // 8  # 64-bit DDR channel
+
+
+def clock_ratio(config_file=None):
+    # CPU cycles per DRAM cycle
+    config = read_config(config_file) if config_file and os.path.exists(config_file) else {}
+    return int(config.get("cpu_tick", CPU_TICK)) / int(config.get("mem_tick", MEM_TICK))
+
+
+def instruction_gap(rate, ratio):
+    # Instructions between consecutive reads for an offered load of `rate` x peak
+    requests_per_cycle = rate * PEAK_BYTES_PER_CYCLE / LINE_BYTES
+    return CPU_IPC * ratio / requests_per_cycle
+
+
+def bubble_counts(start, count, gap):
+    # Request p is issued at instruction floor(p * gap), so fractional gaps
+    # average out exactly; depends only on p, like the op mixes
+    position = np.arange(start, start + count + 1, dtype=np.float64)
+    issue = np.floor(position * gap)
+    return np.maximum(np.diff(issue) - 1, 0).astype(np.int64)
+
+
+def create_load_trace(filename, pattern, num_requests, rate, ratio, generator, params,
+                      layout=DEFAULT_LAYOUT):
+    # CPU-mode traces are all reads: Ramulator only carries writes as
+    # writebacks riding on a read, which would double the offered load
+    source = get_generator(pattern, layout)
+    gap = instruction_gap(rate, ratio)
+    params = dict(params, pattern=pattern, requests=num_requests, mix="R", mode="cpu",
+                  rate=rate, instruction_gap=gap)
+    builder = ManifestBuilder(generator, params, layout)
+    with open(filename, 'wb') as f:
+        for start in range(0, num_requests, CHUNK_REQUESTS):
+            count = min(CHUNK_REQUESTS, num_requests - start)
+            addresses = source.next_batch(count)
+            data = format_cpu_text(addresses, bubble_counts(start, count, gap))
+            f.write(data)
+            builder.update(addresses, np.zeros(count, dtype=bool), data)
+    builder.save(filename)
+    return filename
+
+
+def create_trace_loaded(size, num_requests, pattern, rate, ratio, directory="."):
+    filename = os.path.join(directory, f"trace_{size}_bytes_load{rate:g}_{pattern}.cputrace")
+    return create_load_trace(filename, pattern, num_requests, rate, ratio,
+                             "injection.create_trace_loaded", {"size": size})
@@ -0,0 +1,150 @@
+import json
+import os
+import queue
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from sweep_metrics import TITLES, derive_metrics
+
+# Live view of a running sweep. The sweep executor calls publish() with every
+# completed record; a background thread folds the records in and re-renders a
+# multi-panel PNG at most every `interval` seconds, so neither the executor
+# nor its workers ever wait on drawing. Optionally the PNG is served with a
+# self-refreshing page from the stdlib HTTP server.
+PANELS = [
+    "dram_cycles / ramulator.dram_capacity",
+    "read_latency_avg",
+    "transaction_bytes_to_bandwidth_ratio",
+    "incoming_requests_per_channel / ramulator.active_cycles_0",
+]
+DEFAULT_INTERVAL = 2.0
+
+PAGE = """<!DOCTYPE html>
+<html><head><meta http-equiv="refresh" content="{refresh}"><title>Sweep progress</title></head>
+<body><img src="/dashboard.png?t={stamp}" style="max-width:100%"></body></html>
+"""
+
+
+class LiveDashboard:
+    def __init__(self, output="dashboard.png", total=None, interval=DEFAULT_INTERVAL, port=None):
+        self.output = os.path.abspath(output)
+        self.total = total
+        self.interval = interval
+        self.port = port
+        self.records = queue.Queue()
+        self.points = {}   # {(variant, scenario): {size: values}}
+        self.count = 0
+        self.rendered = 0  # records included in the last image
+        self.start_time = time.time()
+        self.stopping = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.server = None
+
+    def start(self):
+        self.thread.start()
+        if self.port is not None:
+            self.serve()
+        return self
+
+    def publish(self, record):
+        # Called from the sweep loop; only enqueues
+        self.records.put(record)
+
+    def stop(self):
+        self.stopping.set()
+        self.thread.join()
+        if self.server is not None:
+            self.server.shutdown()
+
+    def run(self):
+        last_render = 0.0
+        while True:
+            try:
+                self.add(self.records.get(timeout=self.interval / 4))
+                # Fold in everything that queued up while the last render ran
+                while True:
+                    self.add(self.records.get_nowait())
+            except queue.Empty:
+                pass
+            now = time.time()
+            stopping = self.stopping.is_set() and self.records.empty()
+            if self.count > self.rendered and (now - last_render >= self.interval or stopping):
+                self.render()
+                self.rendered = self.count
+                last_render = now
+            if stopping:
+                return
+
+    def add(self, record):
+        self.count += 1
+        variant = record.get("mix") or ""
+        params = record.get("params") or {}
+        if params:
+            variant += (" " if variant else "") + ",".join(f"{k}={v}" for k, v in sorted(params.items()))
+        values = derive_metrics(record.get("stats", {}), record["size"])
+        self.points.setdefault((variant, record["scenario"]), {})[float(record["size"])] = values
+
+    def render(self):
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+
+        fig = Figure(figsize=(14, 9))
+        FigureCanvasAgg(fig)
+        elapsed = time.time() - self.start_time
+        progress = f"{self.count}/{self.total}" if self.total else f"{self.count}"
+        fig.suptitle(f"Sweep progress: {progress} points, {elapsed:.0f} s")
+        for i, key in enumerate(PANELS):
+            ax = fig.add_subplot(2, 2, i + 1)
+            y_label, plot_title = TITLES[key]
+            for (variant, scenario), by_size in sorted(self.points.items()):
+                sizes = sorted(by_size)
+                values = [by_size[size][key] for size in sizes]
+                label = f"{scenario} {variant}".strip()
+                ax.plot(sizes, [v if v is not None else float("nan") for v in values],
+                        marker='o', linestyle='-', label=label)
+            ax.set_title(plot_title)
+            ax.set_xlabel('Trace File Size (Bytes)')
+            ax.set_xscale('log', base=2)
+            ax.set_ylabel(y_label)
+            ax.grid(True)
+            if self.points:
+                ax.legend(fontsize=7)
+        fig.tight_layout()
+        # Written next to the target and renamed, so readers never see a partial PNG
+        temporary = self.output + ".tmp.png"
+        fig.savefig(temporary)
+        os.replace(temporary, self.output)
+
+    def serve(self):
+        dashboard = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = self.path.split('?', 1)[0]
+                if path in ("/", "/index.html"):
+                    refresh = max(int(dashboard.interval), 1)
+                    self.reply("text/html", PAGE.format(refresh=refresh, stamp=int(time.time())).encode())
+                elif path == "/dashboard.png" and os.path.exists(dashboard.output):
+                    with open(dashboard.output, 'rb') as f:
+                        self.reply("image/png", f.read())
+                elif path == "/progress.json":
+                    self.reply("application/json",
+                               json.dumps({"done": dashboard.count, "total": dashboard.total}).encode())
+                else:
+                    self.send_error(404)
+
+            def reply(self, content_type, body):
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("Cache-Control", "no-store")
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # keep the sweep's output readable
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", self.port), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        print(f"Live dashboard at http://127.0.0.1:{self.server.server_address[1]}/")
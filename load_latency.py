@@ -0,0 +1,112 @@
+import argparse
+
+from generators import GENERATORS
+from injection import LINE_BYTES, PEAK_BYTES_PER_CYCLE
+from report_plots import PLOT_DIR, refresh_figures, size_label
+from results_store import DEFAULT_STORE, load_records
+from sweep import BASE_CONFIG, DEFAULT_SCENARIOS, RAMULATOR, Job, run_sweep
+
+# Load sweep: every pattern is replayed in --mode=cpu at a range of offered
+# loads, and the read latency and queue occupancy are plotted against the
+# offered bandwidth to find each pattern's latency/throughput knee.
+DEFAULT_RATES = [0.05, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0]
+DEFAULT_SIZE = 65536
+
+
+def load_jobs(scenarios, rates, size=DEFAULT_SIZE, params=None):
+    return [Job(scenario, size, mix="R", params=params, rate=rate) for scenario in scenarios for rate in rates]
+
+
+def load_curves(records):
+    # {(scenario, size, config): [(offered GB/s, achieved GB/s, read latency, queue occupancy)]}
+    curves = {}
+    for record in records:
+        stats = record.get("stats", {})
+        if record.get("rate") is None or not stats.get("ramulator.dram_cycles"):
+            continue
+        clock = stats.get("ramulator.maximum_bandwidth", 0) / PEAK_BYTES_PER_CYCLE
+        achieved = (stats.get("ramulator.read_transaction_bytes_0", 0) +
+                    stats.get("ramulator.write_transaction_bytes_0", 0)) / stats["ramulator.dram_cycles"] * clock
+        config = ",".join(f"{key}={value}" for key, value in sorted(record.get("params", {}).items()))
+        curves.setdefault((record["scenario"], record["size"], config), {})[record["rate"]] = (
+            record["rate"] * PEAK_BYTES_PER_CYCLE * clock / 1e9,
+            achieved / 1e9,
+            stats.get("ramulator.read_latency_avg_0"),
+            stats.get("ramulator.in_queue_req_num_avg"),
+        )
+    return {key: [points[rate] for rate in sorted(points)] for key, points in curves.items()}
+
+
+def knee(points, factor=2.0):
+    # First offered load at which the read latency exceeds `factor` x the
+    # latency at the lightest load; None when the curve never bends that far
+    latencies = [point[2] for point in points if point[2] is not None]
+    if not latencies:
+        return None
+    for point in points:
+        if point[2] is not None and point[2] > factor * latencies[0]:
+            return point
+    return None
+
+
+def plot_load_latency(curves, output):
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    fig, (latency_ax, queue_ax) = plt.subplots(1, 2, figsize=(14, 6))
+    for (scenario, size, config), points in sorted(curves.items()):
+        label = f"{scenario} {size_label(size)} {config}".strip()
+        offered = [point[0] for point in points]
+        line, = latency_ax.plot(offered, [point[2] for point in points], marker='o', linestyle='-', label=label)
+        queue_ax.plot(offered, [point[3] for point in points], marker='o', linestyle='-', label=label,
+                      color=line.get_color())
+        bend = knee(points)
+        if bend is not None:
+            latency_ax.plot([bend[0]], [bend[2]], marker='*', markersize=14, color=line.get_color())
+    latency_ax.set_title("DDR4 - Average Read Latency vs Offered Load (* = knee)")
+    latency_ax.set_ylabel('Average Read Latency (Cycles)')
+    queue_ax.set_title("DDR4 - Average In-Queue Requests vs Offered Load")
+    queue_ax.set_ylabel('Average In-Queue Requests')
+    for ax in (latency_ax, queue_ax):
+        ax.set_xlabel('Offered Bandwidth (GB/s)')
+        ax.grid(True)
+        ax.legend()
+    fig.tight_layout()
+    fig.savefig(output)
+    plt.close(fig)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep the offered load and plot load-latency curves")
+    parser.add_argument("--rate", action="append", dest="rates", type=float,
+                        help="offered load as a fraction of peak bandwidth (default: 0.05 .. 1.0)")
+    parser.add_argument("--size", type=int, default=DEFAULT_SIZE,
+                        help=f"trace size in bytes; {LINE_BYTES}-byte reads, size * 0.5 of them")
+    parser.add_argument("--scenario", action="append", dest="scenarios", choices=sorted(GENERATORS))
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--ramulator", default=RAMULATOR)
+    parser.add_argument("--config", default=BASE_CONFIG)
+    parser.add_argument("--store", default=DEFAULT_STORE)
+    parser.add_argument("--output", default="load_latency.png")
+    parser.add_argument("--plot-only", action="store_true", help="only plot the load runs already in the store")
+    parser.add_argument("--plot-dir", default=PLOT_DIR, help="figures of the store are refreshed here")
+    args = parser.parse_args()
+
+    if not args.plot_only:
+        jobs = load_jobs(args.scenarios or DEFAULT_SCENARIOS, args.rates or DEFAULT_RATES, args.size)
+        run_sweep(jobs, args.workers, args.store, ramulator=args.ramulator, base_config=args.config)
+
+    curves = load_curves(load_records(args.store))
+    for (scenario, size, config), points in sorted(curves.items()):
+        bend = knee(points)
+        where = f"knee at {bend[0]:.2f} GB/s offered" if bend else "no knee in the swept range"
+        print(f"{scenario} {config}".rstrip() + f" ({size} B): {where}")
+    plot_load_latency(curves, args.output)
+    print(f"Wrote {args.output}.")
+    if not args.plot_only:
+        refresh_figures(args.store, args.plot_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+import argparse
+import json
+
+import numpy as np
+
+from address_layout import DEFAULT_LAYOUT
+from trace_io import read_trace
+
+# Outcomes of a request under an open-page policy, named like Ramulator's stats
+ROW_HIT = 0
+ROW_MISS = 1       # bank had no open row
+ROW_CONFLICT = 2   # bank had a different row open
+
+OUTCOME_NAMES = {ROW_HIT: "row_hits", ROW_MISS: "row_misses", ROW_CONFLICT: "row_conflicts"}
+
+# Requests looked at together when measuring bank-level parallelism; roughly
+# the depth of Ramulator's per-channel request queue
+DEFAULT_WINDOW = 32
+
+
+def replay_open_page(bank_ids, rows):
+    # Every bank keeps its last row open. Grouping the requests by bank with a
+    # stable sort keeps the per-bank order, so each request only has to be
+    # compared with its predecessor in the same bank.
+    bank_ids = np.asarray(bank_ids)
+    rows = np.asarray(rows)
+    count = len(bank_ids)
+
+    order = np.argsort(bank_ids, kind="stable")
+    sorted_banks = bank_ids[order]
+    sorted_rows = rows[order]
+
+    first_in_bank = np.ones(count, dtype=bool)
+    first_in_bank[1:] = sorted_banks[1:] != sorted_banks[:-1]
+    same_row = np.zeros(count, dtype=bool)
+    same_row[1:] = sorted_rows[1:] == sorted_rows[:-1]
+
+    sorted_outcomes = np.where(first_in_bank, ROW_MISS,
+                               np.where(same_row, ROW_HIT, ROW_CONFLICT)).astype(np.uint8)
+    outcomes = np.empty(count, dtype=np.uint8)
+    outcomes[order] = sorted_outcomes
+    return outcomes
+
+
+def bank_level_parallelism(bank_ids, num_banks, window=DEFAULT_WINDOW):
+    # Average number of distinct banks touched per window of consecutive requests
+    bank_ids = np.asarray(bank_ids, dtype=np.int64)
+    if len(bank_ids) == 0:
+        return 0.0
+    window_ids = np.arange(len(bank_ids)) // window
+    pairs = np.unique(window_ids * num_banks + bank_ids)
+    distinct_per_window = np.bincount(pairs // num_banks)
+    return float(distinct_per_window.mean())
+
+
+def analyze(addresses, is_write, layout=DEFAULT_LAYOUT, window=DEFAULT_WINDOW):
+    fields = layout.decode(addresses)
+    bank_ids = layout.bank_id(fields)
+    is_write = np.asarray(is_write, dtype=bool)
+    outcomes = replay_open_page(bank_ids, fields["row"])
+
+    stats = {
+        "requests": len(outcomes),
+        "read_requests": int(np.count_nonzero(~is_write)),
+        "write_requests": int(np.count_nonzero(is_write)),
+    }
+    # Same counters as ramulator.{,read_,write_}row_{hits,misses,conflicts}_channel_0_core
+    read_counts = np.bincount(outcomes[~is_write], minlength=3)
+    write_counts = np.bincount(outcomes[is_write], minlength=3)
+    for outcome, name in OUTCOME_NAMES.items():
+        stats[f"{name}_channel_0_core"] = int(read_counts[outcome] + write_counts[outcome])
+        stats[f"read_{name}_channel_0_core"] = int(read_counts[outcome])
+        stats[f"write_{name}_channel_0_core"] = int(write_counts[outcome])
+
+    requests = max(len(outcomes), 1)
+    stats["row_hit_rate"] = stats["row_hits_channel_0_core"] / requests
+    stats["bank_level_parallelism"] = bank_level_parallelism(bank_ids, layout.num_banks, window)
+
+    bank_groups = fields["bank_group"]
+    switches = int(np.count_nonzero(bank_groups[1:] != bank_groups[:-1]))
+    stats["bank_group_switches"] = switches
+    stats["bank_group_switch_rate"] = switches / max(len(bank_groups) - 1, 1)
+
+    # A read issued right after a write pays the write-to-read turnaround (tWTR)
+    stats["write_to_read_turnarounds"] = int(np.count_nonzero(is_write[:-1] & ~is_write[1:]))
+    return stats
+
+
+def analyze_trace(filename, layout=DEFAULT_LAYOUT, window=DEFAULT_WINDOW):
+    addresses, is_write = read_trace(filename)
+    return analyze(addresses, is_write, layout, window)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Predict row-buffer locality of traces without running Ramulator")
+    parser.add_argument("traces", nargs="+", help="text or binary (.btrace) trace files")
+    parser.add_argument("--window", type=int, default=DEFAULT_WINDOW,
+                        help="requests per window for bank-level parallelism")
+    parser.add_argument("--json", action="store_true", help="print the statistics as JSON")
+    args = parser.parse_args()
+
+    all_stats = {filename: analyze_trace(filename, window=args.window) for filename in args.traces}
+
+    if args.json:
+        print(json.dumps(all_stats, indent=2))
+        return
+
+    for filename, stats in all_stats.items():
+        print(filename)
+        for key, value in stats.items():
+            print(f"    {key:40s} {value:g}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+
+# Every generated trace gets a sidecar "<trace>.manifest.json" describing how it
+# was made and what it contains. It is accumulated chunk by chunk while the
+# trace is written, so nobody has to reread a multi-GB trace to learn this.
+MANIFEST_SUFFIX = ".manifest.json"
+
+
+def manifest_path(filename):
+    return str(filename) + MANIFEST_SUFFIX
+
+
+def load_manifest(filename):
+    # Manifest of a trace, or None for traces written before manifests existed
+    path = manifest_path(filename)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def layout_description(layout):
+    return {"order": list(layout.order), "bits": dict(layout.bits)}
+
+
+class ManifestBuilder:
+    def __init__(self, generator, params, layout, binary=False):
+        self.generator = generator
+        self.params = dict(params or {})
+        self.layout = layout
+        self.binary = binary
+        self.hash = hashlib.blake2b(digest_size=20)
+        self.requests = 0
+        self.writes = 0
+        self.bytes = 0
+        self.address_min = None
+        self.address_max = None
+        self.field_min = {}
+        self.field_max = {}
+
+    def update(self, addresses, is_write, data):
+        # data is exactly the bytes written to the trace for these requests
+        self.hash.update(data)
+        self.bytes += len(data)
+        self.requests += len(addresses)
+        self.writes += int(np.count_nonzero(is_write))
+        if len(addresses) == 0:
+            return
+        self.address_min = min_or(self.address_min, int(addresses.min()))
+        self.address_max = max_or(self.address_max, int(addresses.max()))
+        for field, values in self.layout.decode(addresses).items():
+            self.field_min[field] = min_or(self.field_min.get(field), int(values.min()))
+            self.field_max[field] = max_or(self.field_max.get(field), int(values.max()))
+
+    def counts(self):
+        # Everything but the hash, for builders that saw separate parts of a
+        # trace (see sharded_trace.py); combined with merge()
+        return {"requests": self.requests, "writes": self.writes, "bytes": self.bytes,
+                "address_range": [self.address_min, self.address_max],
+                "field_min": dict(self.field_min), "field_max": dict(self.field_max)}
+
+    def merge(self, counts):
+        self.requests += counts["requests"]
+        self.writes += counts["writes"]
+        self.bytes += counts["bytes"]
+        low, high = counts["address_range"]
+        if low is not None:
+            self.address_min = min_or(self.address_min, low)
+            self.address_max = max_or(self.address_max, high)
+        for field, value in counts["field_min"].items():
+            self.field_min[field] = min_or(self.field_min.get(field), value)
+        for field, value in counts["field_max"].items():
+            self.field_max[field] = max_or(self.field_max.get(field), value)
+
+    def manifest(self, filename):
+        return {
+            "trace": os.path.basename(filename),
+            "format": "binary" if self.binary else "text",
+            "generator": self.generator,
+            "params": self.params,
+            "layout": layout_description(self.layout),
+            "requests": self.requests,
+            "writes": self.writes,
+            "reads": self.requests - self.writes,
+            "bytes": self.bytes,
+            "blake2b": self.hash.hexdigest(),
+            "address_range": [self.address_min, self.address_max],
+            "field_ranges": {field: [self.field_min[field], self.field_max[field]]
+                             for field in self.layout.order if field in self.field_min},
+        }
+
+    def save(self, filename):
+        with open(manifest_path(filename), 'w') as f:
+            json.dump(self.manifest(filename), f, indent=2, sort_keys=True)
+            f.write("\n")
+
+
+def min_or(current, value):
+    return value if current is None else min(current, value)
+
+
+def max_or(current, value):
+    return value if current is None else max(current, value)
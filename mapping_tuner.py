@@ -0,0 +1,169 @@
+import argparse
+import itertools
+import json
+import os
+import random
+
+import numpy as np
+
+from address_layout import DEFAULT_LAYOUT, OFFSET_BITS, HashedLayout
+from generators import GENERATORS, get_generator
+from locality import analyze
+from opmix import apply_mix
+from report_plots import PLOT_DIR, refresh_figures
+from results_store import DEFAULT_STORE
+from surrogate import CYCLES_KEY, Surrogate, timings_from_config
+from sweep import BASE_CONFIG, DEFAULT_SCENARIOS, RAMULATOR, Job, run_sweep
+from trace_cache import TraceCache, parse_bytes
+
+# Address-mapping search. The workloads' address streams stay as generated
+# (Row|BG|Bank|Col|Offset); what changes is how the memory controller splits
+# an address into DRAM coordinates. Every candidate mapping is a field order
+# plus optional XOR bank hashing. All candidates are scored with the locality
+# analyzer and the uncalibrated surrogate, and only the best few per workload
+# are simulated, in parallel, with a Ramulator mapping file.
+MAPPING_DIR = "mappings"
+DEFAULT_KEEP = 6
+XOR_OPTIONS = [(), ("bank",), ("bank_group",), ("bank_group", "bank")]
+
+# Ramulator's level names for the DDR4 address fields
+LEVELS = {"row": "Ro", "bank_group": "Bg", "bank": "Ba", "column": "Co"}
+
+
+def is_default(layout):
+    return layout.order == DEFAULT_LAYOUT.order and not layout.xor
+
+
+def candidate_layouts(base=DEFAULT_LAYOUT, sample=None, seed=0):
+    # Every order of the fields above the offset, with every XOR option; the
+    # offset stays in the least significant bits
+    fields = [field for field in base.order if field != "offset"]
+    candidates = [HashedLayout(base.bits, order + ("offset",), xor)
+                  for order in itertools.permutations(fields) for xor in XOR_OPTIONS]
+    if sample is not None and sample < len(candidates):
+        # The default mapping is always kept as the reference point
+        default = [c for c in candidates if is_default(c)]
+        rest = [c for c in candidates if not is_default(c)]
+        candidates = default + random.Random(seed).sample(rest, sample - len(default))
+    return candidates
+
+
+def mapping_name(layout):
+    name = "".join(LEVELS[field] for field in layout.order if field in LEVELS)
+    if layout.xor:
+        name += "_xor" + "".join(LEVELS[field] for field in layout.xor)
+    return name
+
+
+def mapping_lines(layout):
+    # Ramulator mapping file: "<level> <bit> = <address bit>" for every DRAM
+    # coordinate bit, "<address bit> ^ <address bit>" for hashed bits. Address
+    # bits are counted above the transaction offset, as Ramulator does.
+    lines = [f"# {layout!r}"]
+    for field in layout.order:
+        if field not in LEVELS:
+            continue
+        hashed = layout.row_bits(field) if field in layout.xor else None
+        for bit in range(layout.bits[field]):
+            source = f"{layout.shifts[field] + bit - OFFSET_BITS}"
+            if hashed is not None:
+                source += f" ^ {layout.shifts['row'] + hashed[0] + bit - OFFSET_BITS}"
+            lines.append(f"{LEVELS[field]} {bit} = {source}")
+    return lines
+
+
+def write_mapping(layout, directory=MAPPING_DIR):
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.abspath(os.path.join(directory, mapping_name(layout) + ".map"))
+    with open(path, 'w') as f:
+        f.write("\n".join(mapping_lines(layout)) + "\n")
+    return path
+
+
+def workload(scenario, requests, mix="W", seed=None):
+    # The address stream every candidate is evaluated on
+    return apply_mix(get_generator(scenario).next_batch(requests), mix, seed)
+
+
+def prune(candidates, addresses, is_write, model, keep=DEFAULT_KEEP):
+    # Predicted dram_cycles of the workload under every candidate; returns the
+    # best `keep` as (predicted cycles, layout, locality), best first
+    localities = [analyze(addresses, is_write, layout) for layout in candidates]
+    predicted = model.predict_many(localities)[CYCLES_KEY]
+    order = np.argsort(predicted, kind="stable")[:keep]
+    return [(float(predicted[i]), candidates[i], localities[i]) for i in order]
+
+
+def tune(scenarios, size, mix="W", keep=DEFAULT_KEEP, sample=None, model=None, workers=None,
+         store=DEFAULT_STORE, mapping_dir=MAPPING_DIR, **run_options):
+    # Returns {scenario: [(simulated cycles, predicted cycles, layout)]}, best first
+    model = model or Surrogate(timings_from_config(run_options.get("base_config")))
+    candidates = candidate_layouts(sample=sample)
+    requests = int(size * 0.5)
+
+    shortlist = {}
+    jobs = []
+    for scenario in scenarios:
+        addresses, is_write = workload(scenario, requests, mix)
+        shortlist[scenario] = prune(candidates, addresses, is_write, model, keep)
+        # The default mapping is simulated too, as the baseline to beat
+        if not any(is_default(layout) for _, layout, _ in shortlist[scenario]):
+            default = [c for c in candidates if is_default(c)]
+            shortlist[scenario] += prune(default, addresses, is_write, model, 1)
+        for _, layout, _ in shortlist[scenario]:
+            jobs.append(Job(scenario, size, requests, mix, {"mapping": write_mapping(layout, mapping_dir)}))
+
+    simulated = {}
+    for record in run_sweep(jobs, workers, store, **run_options):
+        simulated[(record["scenario"], os.path.basename(record["params"]["mapping"]))] = \
+            record["stats"].get(CYCLES_KEY, np.nan)
+
+    results = {}
+    for scenario, entries in shortlist.items():
+        rows = [(simulated.get((scenario, mapping_name(layout) + ".map"), np.nan), predicted, layout)
+                for predicted, layout, _ in entries]
+        # Simulated cycles first; points whose run failed fall back to the prediction
+        results[scenario] = sorted(rows, key=lambda row: (np.isnan(row[0]), row[1] if np.isnan(row[0]) else row[0]))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search DRAM address mappings for the lowest dram_cycles")
+    parser.add_argument("--scenario", action="append", dest="scenarios", choices=sorted(GENERATORS))
+    parser.add_argument("--size", type=int, default=65536, help="trace size in bytes")
+    parser.add_argument("--mix", default="W")
+    parser.add_argument("--keep", type=int, default=DEFAULT_KEEP, help="candidates simulated per workload")
+    parser.add_argument("--sample", type=int, help="score a random sample of the candidate mappings")
+    parser.add_argument("--model", help="calibrated surrogate (surrogate.py fit) to prune with")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--ramulator", default=RAMULATOR)
+    parser.add_argument("--config", default=BASE_CONFIG)
+    parser.add_argument("--store", default=DEFAULT_STORE)
+    parser.add_argument("--trace-cache", metavar="DIR", help="reuse generated traces from this cache directory")
+    parser.add_argument("--cache-budget", default="4G", help="byte budget of the trace cache (default: 4G)")
+    parser.add_argument("--mapping-dir", default=MAPPING_DIR)
+    parser.add_argument("--plot-dir", default=PLOT_DIR, help="figures of the store are refreshed here")
+    args = parser.parse_args()
+    trace_cache = TraceCache(args.trace_cache, parse_bytes(args.cache_budget)) if args.trace_cache else None
+
+    model = None
+    if args.model:
+        with open(args.model, 'r') as f:
+            model = Surrogate.from_dict(json.load(f))
+    results = tune(args.scenarios or DEFAULT_SCENARIOS, args.size, args.mix, args.keep, args.sample, model,
+                   args.workers, args.store, args.mapping_dir, ramulator=args.ramulator, base_config=args.config,
+                   trace_cache=trace_cache)
+
+    for scenario, rows in results.items():
+        print(f"{scenario} ({args.size} B, {args.mix}):")
+        baseline = [row[0] for row in rows if is_default(row[2])]
+        for rank, (cycles, predicted, layout) in enumerate(rows, 1):
+            change = ""
+            if baseline and baseline[0] and not np.isnan(cycles):
+                change = f" ({(cycles - baseline[0]) / baseline[0]:+.1%} vs default)"
+            print(f"  {rank}. {mapping_name(layout):16s} dram_cycles {cycles:>12g}  predicted {predicted:>12.0f}{change}")
+    refresh_figures(args.store, args.plot_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+import argparse
+import os
+import time
+
+import numpy as np
+
+from address_layout import DEFAULT_LAYOUT
+from injection import CPU_IPC, LINE_BYTES, clock_ratio
+from locality import analyze
+from ramulator_config import capacity_from_config, read_config
+from surrogate import CYCLES_KEY, LATENCY_KEY, DEFAULT_SPEED, Surrogate, timings_from_config
+from trace_io import read_trace
+
+# Stand-in for ./ramulator, for testing and benchmarking the pipeline on
+# machines without the simulator. It takes the same command line
+#   mock_ramulator.py <config> --mode=dram|cpu <trace>
+# and writes a DDR4.stats with every key the scripts read. The numbers come
+# from a simple model: row-buffer outcomes from locality.py, service time
+# per request from the uncalibrated surrogate, and a single FIFO queue (as
+# deep as Ramulator's, filled at once in dram mode and paced by the
+# bubbles in cpu mode).
+# How fast it "simulates" is set with MOCK_RAMULATOR_RATE (trace requests
+# per second, 0 for as fast as possible) and MOCK_RAMULATOR_STARTUP
+# (seconds), so run_job and sweep_spec.py can call it unchanged.
+STATS_FILE = "DDR4.stats"
+QUEUE_DEPTH = 32
+DATA_RATES = {"DDR4_1600K": 1600, "DDR4_2400R": 2400}  # MT/s
+DEFAULT_CAPACITY = 4 << 30  # DDR4_4Gb_x8, one rank
+
+# (key, description) in DDR4.stats order
+STATS = [
+    ("ramulator.active_cycles_0", "Total active cycles for level _0"),
+    ("ramulator.serving_requests_0", "The sum of read and write requests that are served in this DRAM element per memory cycle for level _0"),
+    ("ramulator.average_serving_requests_0", "The average of read and write requests that are served in this DRAM element per memory cycle for level _0"),
+    ("ramulator.row_hits_channel_0_core", "Number of row hits per channel per core"),
+    ("ramulator.row_misses_channel_0_core", "Number of row misses per channel per core"),
+    ("ramulator.row_conflicts_channel_0_core", "Number of row conflicts per channel per core"),
+    ("ramulator.read_row_hits_channel_0_core", "Number of row hits for read requests per channel per core"),
+    ("ramulator.read_row_misses_channel_0_core", "Number of row misses for read requests per channel per core"),
+    ("ramulator.read_row_conflicts_channel_0_core", "Number of row conflicts for read requests per channel per core"),
+    ("ramulator.write_row_hits_channel_0_core", "Number of row hits for write requests per channel per core"),
+    ("ramulator.write_row_misses_channel_0_core", "Number of row misses for write requests per channel per core"),
+    ("ramulator.write_row_conflicts_channel_0_core", "Number of row conflicts for write requests per channel per core"),
+    ("ramulator.read_transaction_bytes_0", "The total byte of read transaction per channel"),
+    ("ramulator.write_transaction_bytes_0", "The total byte of write transaction per channel"),
+    ("ramulator.read_latency_sum_0", "The memory latency cycles (in memory time domain) sum for all read requests in this channel"),
+    ("ramulator.read_latency_avg_0", "The average memory latency cycles (in memory time domain) per request for all read requests in this channel"),
+    ("ramulator.req_queue_length_sum_0", "Sum of read and write queue length per memory cycle per channel."),
+    ("ramulator.req_queue_length_avg_0", "Average of read and write queue length per memory cycle per channel."),
+    ("ramulator.incoming_requests_per_channel", "Number of incoming requests to each DRAM channel"),
+    ("ramulator.incoming_read_reqs_per_channel", "Number of incoming read requests to each DRAM channel"),
+    ("ramulator.in_queue_req_num_sum", "Sum of read/write queue length"),
+    ("ramulator.in_queue_read_req_num_sum", "Sum of read queue length"),
+    ("ramulator.in_queue_write_req_num_sum", "Sum of write queue length"),
+    ("ramulator.in_queue_req_num_avg", "Average of read/write queue length per memory cycle"),
+    ("ramulator.in_queue_read_req_num_avg", "Average of read queue length per memory cycle"),
+    ("ramulator.in_queue_write_req_num_avg", "Average of write queue length per memory cycle"),
+    ("ramulator.dram_capacity", "Number of bytes in simulated DRAM"),
+    ("ramulator.dram_cycles", "Number of DRAM cycles simulated"),
+    ("ramulator.maximum_bandwidth", "The theoretical maximum bandwidth (Bps)"),
+]
+
+
+def read_cpu_trace(filename):
+    # "<bubbles> <address>" lines: (addresses, bubbles)
+    data = np.loadtxt(filename, dtype=str, ndmin=2)
+    if data.size == 0:
+        return np.zeros(0, dtype=np.uint64), np.zeros(0, dtype=np.int64)
+    addresses = np.array([int(value, 16) for value in data[:, 1]], dtype=np.uint64)
+    return addresses, data[:, 0].astype(np.int64)
+
+
+def issue_cycles(mode, count, bubbles=None, ratio=1.0):
+    # DRAM cycle each request is ready to issue: at once in dram mode, after
+    # the core has retired its bubbles and everything before it in cpu mode
+    if mode == "cpu":
+        instructions = np.cumsum(bubbles + 1) - 1
+        return instructions / CPU_IPC / ratio
+    return np.zeros(count)
+
+
+def serve(issue, service, depth=QUEUE_DEPTH):
+    # FIFO with a constant service time and room for `depth` requests: a
+    # request enters once it is issued and a slot is free. Returns the
+    # (arrival, departure) cycles of every request.
+    count = len(issue)
+    arrivals = np.empty(count)
+    departures = np.empty(count)
+    last = 0.0
+    for i in range(count):
+        arrival = issue[i] if i < depth else max(issue[i], departures[i - depth])
+        last = max(arrival, last) + service
+        arrivals[i] = arrival
+        departures[i] = last
+    return arrivals, departures
+
+
+def simulate(config_file, mode, trace):
+    config = read_config(config_file) if os.path.exists(config_file) else {}
+    timings = timings_from_config(speed=config.get("speed"))
+    if mode == "cpu":
+        addresses, bubbles = read_cpu_trace(trace)
+        is_write = np.zeros(len(addresses), dtype=bool)  # cpu traces carry reads only
+    else:
+        addresses, is_write = read_trace(trace)
+        bubbles = None
+    count = len(addresses)
+    locality = analyze(addresses, is_write, DEFAULT_LAYOUT)
+    predicted = Surrogate(timings).predict(locality)
+    saturated = predicted[CYCLES_KEY] if count else 0.0
+    service = saturated / max(count, 1)
+
+    ratio = clock_ratio(config_file) if os.path.exists(config_file) else clock_ratio()
+    arrivals, departures = serve(issue_cycles(mode, count, bubbles, ratio), service)
+    in_queue = departures - arrivals  # cycles each request spends queued or in service
+    latency = predicted[LATENCY_KEY] + in_queue - service
+    cycles = float(departures[-1]) if count else 0.0
+    previous = np.concatenate([[0.0], departures[:-1]])
+    active = float(np.sum(departures - np.maximum(arrivals, previous)))
+
+    reads = ~is_write
+    read_count = int(np.count_nonzero(reads))
+    queue_sum = float(in_queue.sum())
+    read_queue_sum = float(in_queue[reads].sum())
+    data_rate = DATA_RATES.get(config.get("speed", DEFAULT_SPEED), DATA_RATES[DEFAULT_SPEED])
+    capacity = capacity_from_config(config_file) if os.path.exists(config_file) else None
+
+    def per_cycle(value):
+        return value / cycles if cycles else 0.0
+
+    stats = {f"ramulator.{key}": value for key, value in locality.items() if key.endswith("_channel_0_core")}
+    stats.update({
+        "ramulator.active_cycles_0": active,
+        "ramulator.serving_requests_0": float(np.sum(latency)),
+        "ramulator.average_serving_requests_0": per_cycle(float(np.sum(latency))),
+        "ramulator.read_transaction_bytes_0": read_count * LINE_BYTES,
+        "ramulator.write_transaction_bytes_0": (count - read_count) * LINE_BYTES,
+        "ramulator.read_latency_sum_0": float(latency[reads].sum()),
+        "ramulator.read_latency_avg_0": float(latency[reads].mean()) if read_count else 0.0,
+        "ramulator.req_queue_length_sum_0": queue_sum,
+        "ramulator.req_queue_length_avg_0": per_cycle(queue_sum),
+        "ramulator.incoming_requests_per_channel": count,
+        "ramulator.incoming_read_reqs_per_channel": read_count,
+        "ramulator.in_queue_req_num_sum": queue_sum,
+        "ramulator.in_queue_read_req_num_sum": read_queue_sum,
+        "ramulator.in_queue_write_req_num_sum": queue_sum - read_queue_sum,
+        "ramulator.in_queue_req_num_avg": per_cycle(queue_sum),
+        "ramulator.in_queue_read_req_num_avg": per_cycle(read_queue_sum),
+        "ramulator.in_queue_write_req_num_avg": per_cycle(queue_sum - read_queue_sum),
+        "ramulator.dram_capacity": capacity or DEFAULT_CAPACITY,
+        "ramulator.dram_cycles": round(cycles),
+        # Two transfers of 8 bytes per clock on a 64-bit channel
+        "ramulator.maximum_bandwidth": data_rate * 1000000 * 8,
+    })
+    return stats, count
+
+
+def write_stats(stats, stats_file=STATS_FILE):
+    with open(stats_file, 'w') as f:
+        for key, description in STATS:
+            value = stats.get(key, 0)
+            value = f"{value:.6g}" if isinstance(value, float) and not value.is_integer() else f"{int(value)}"
+            f.write(f"    {key:<55s} {value:<20s} # {description}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stand-in for Ramulator that writes a modelled DDR4.stats")
+    parser.add_argument("config")
+    parser.add_argument("trace")
+    parser.add_argument("--mode", choices=["dram", "cpu"], default="dram")
+    parser.add_argument("--rate", type=float, default=float(os.environ.get("MOCK_RAMULATOR_RATE", 0)),
+                        help="trace requests simulated per second, 0 for no delay (env MOCK_RAMULATOR_RATE)")
+    parser.add_argument("--startup", type=float, default=float(os.environ.get("MOCK_RAMULATOR_STARTUP", 0)),
+                        help="seconds added to every run (env MOCK_RAMULATOR_STARTUP)")
+    args = parser.parse_args()
+
+    start = time.time()
+    stats, count = simulate(args.config, args.mode, args.trace)
+    write_stats(stats)
+    # Take as long as a simulator of the requested speed would
+    delay = args.startup + (count / args.rate if args.rate > 0 else 0.0) - (time.time() - start)
+    if delay > 0:
+        time.sleep(delay)
+    print("Simulation done. Statistics written to " + STATS_FILE)
+
+
+if __name__ == "__main__":
+    main()
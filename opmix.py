@@ -0,0 +1,227 @@
+import argparse
+import contextlib
+import os
+
+import numpy as np
+
+from address_layout import DEFAULT_LAYOUT
+from generators import GENERATORS, get_generator
+from trace_io import CHUNK_REQUESTS, TraceWriter
+
+# Op-mix layer: turns an address stream into (addresses, is_write) requests.
+# Mixes are written as short specs so sweeps and file names can carry them:
+#   W, R            every request is a write / a read
+#   read=0.3        30% of the requests are reads, spread evenly over the stream
+#   burst=8:4       8 writes followed by 4 reads, repeated
+#   raw=16          every address is written, then read back 16 writes later
+#   interleaved     raw=0, i.e. the W then R of tr.py's _interleaved generators
+# Mixes take the stream position of their first address (raw=D also the D
+# addresses before it, and whether the stream ends with it), so a trace mixed
+# batch by batch is identical to one mixed in a single pass.
+GOLDEN_GAMMA = 0x9E3779B97F4A7C15
+
+
+def uniform(position, seed):
+    # Counter-based uniform draws in [0, 1): splitmix64 of (seed, position).
+    # The same request gets the same draw however the stream is batched.
+    x = position.astype(np.uint64) * np.uint64(GOLDEN_GAMMA) + \
+        np.uint64((seed * 0xBF58476D1CE4E5B9) & 0xFFFFFFFFFFFFFFFF)
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    x = x ^ (x >> np.uint64(31))
+    return (x >> np.uint64(11)).astype(np.float64) / float(1 << 53)
+
+
+def all_ops(addresses, write):
+    return addresses, np.full(len(addresses), write, dtype=bool)
+
+
+def read_fraction(addresses, fraction, seed=None, start=0):
+    count = len(addresses)
+    if seed is None:
+        # Deterministic: request p is a read when floor(p * f) steps up
+        position = np.arange(start, start + count + 1, dtype=np.float64)
+        steps = np.floor(position * fraction)
+        is_read = steps[1:] > steps[:-1]
+    else:
+        is_read = uniform(np.arange(start, start + count), seed) < fraction
+    return addresses, ~is_read
+
+
+def burst(addresses, writes, reads, start=0):
+    # Ops repeat with period writes + reads over the address stream
+    position = np.arange(start, start + len(addresses)) % (writes + reads)
+    return addresses, position < writes
+
+
+def read_after_write(addresses, distance, previous=None, last=True):
+    # Every address is written once and read back right after the write that
+    # comes `distance` writes later; reads that would fall past the end follow
+    # the last write in stream order. The trace has twice as many requests.
+    # `previous` holds the addresses before this batch (at least `distance` of
+    # them unless the stream starts within that), whose reads are still due;
+    # the reads left over are only written with the `last` batch.
+    previous = addresses[:0] if previous is None else previous[max(len(previous) - distance, 0):]
+    stream = np.concatenate([previous, addresses])
+    count = len(addresses)
+    read = np.arange(len(previous), len(stream)) - distance
+    ops = np.stack([addresses, stream[np.maximum(read, 0)]], axis=1).ravel()
+    is_write = np.tile(np.array([True, False]), count)
+    due = np.stack([np.ones(count, dtype=bool), read >= 0], axis=1).ravel()
+    ops, is_write = ops[due], is_write[due]
+    if last:
+        tail = stream[max(len(stream) - distance, 0):]
+        ops = np.concatenate([ops, tail])
+        is_write = np.concatenate([is_write, np.zeros(len(tail), dtype=bool)])
+    return ops, is_write
+
+
+def apply_mix(addresses, mix, seed=None, start=0, previous=None, last=True):
+    name, _, value = mix.partition('=')
+    if name in ("W", "R"):
+        return all_ops(addresses, name == "W")
+    if name == "interleaved":
+        return read_after_write(addresses, 0)
+    if name == "read":
+        return read_fraction(addresses, float(value), seed, start)
+    if name == "burst":
+        writes, _, reads = value.partition(':')
+        return burst(addresses, int(writes), int(reads), start)
+    if name == "raw":
+        return read_after_write(addresses, int(value), previous, last)
+    raise ValueError(f"Invalid op mix {mix!r}")
+
+
+def is_randomized(mix):
+    # Whether the mix's ops depend on the seed (only read=F does)
+    return mix.partition('=')[0] == "read"
+
+
+def carried_requests(mix):
+    # Addresses a batch needs from before it: raw=D reads reach D writes back
+    name, _, value = mix.partition('=')
+    return int(value) if name == "raw" else 0
+
+
+def needs_whole_stream(mix):
+    # Whether a batch depends on the ones before it, so the stream cannot be
+    # cut into independent slices (see sharded_trace.py)
+    return carried_requests(mix) > 0
+
+
+def trace_requests(num_requests, mix):
+    # Requests in the trace: raw=D and interleaved read every address back
+    name = mix.partition('=')[0]
+    return 2 * num_requests if name in ("raw", "interleaved") else num_requests
+
+
+def mix_label(mix):
+    # File-name friendly form of a mix spec, e.g. "burst=8:4" -> "burst8-4"
+    return mix.replace('=', '').replace(':', '-')
+
+
+class Variant:
+    # One output trace of a fan-out pass: a request-count prefix of the
+    # pattern's address stream under one op mix, written as text or binary
+    # (by the file name's suffix)
+    __slots__ = ("filename", "mix", "requests", "seed", "params")
+
+    def __init__(self, filename, mix, requests, seed=None, params=None):
+        self.filename = filename
+        self.mix = mix
+        self.requests = requests
+        self.seed = seed
+        self.params = dict(params or {})
+
+
+def create_trace_variants(pattern, variants, generator, layout=DEFAULT_LAYOUT):
+    # Writes every variant in one pass over the pattern's address stream: each
+    # batch of addresses is computed once, mixed once per (mix, seed, prefix)
+    # and encoded for every file that needs it. Each file is identical to the
+    # one create_pattern_trace would write on its own.
+    total = max((variant.requests for variant in variants), default=0)
+    carry = max((carried_requests(variant.mix) for variant in variants), default=0)
+    previous = np.zeros(0, dtype=np.uint64)
+    source = get_generator(pattern, layout)
+    with contextlib.ExitStack() as stack:
+        writers = [stack.enter_context(TraceWriter(
+            variant.filename, generator,
+            dict(variant.params, pattern=pattern, requests=variant.requests, mix=variant.mix, seed=variant.seed),
+            layout)) for variant in variants]
+        for start in range(0, total, CHUNK_REQUESTS):
+            addresses = source.next_batch(min(CHUNK_REQUESTS, total - start))
+            mixed = {}
+            for variant, writer in zip(variants, writers):
+                count = min(len(addresses), variant.requests - start)
+                if count <= 0:
+                    continue
+                last = start + count == variant.requests
+                key = (variant.mix, variant.seed, count, last)
+                if key not in mixed:
+                    mixed[key] = apply_mix(addresses[:count], variant.mix, variant.seed, start, previous, last)
+                writer.write(*mixed[key])
+            # The last `carry` addresses, for raw=D reads of the next batch
+            previous = np.concatenate([previous, addresses])[-carry:] if carry else previous
+    return [variant.filename for variant in variants]
+
+
+def create_pattern_trace(filename, pattern, num_requests, mix, generator, params, seed=None,
+                         layout=DEFAULT_LAYOUT):
+    # Streams the pattern's addresses through the mix batch by batch, so memory
+    # stays bounded however long the trace is; its manifest is written alongside
+    create_trace_variants(pattern, [Variant(filename, mix, num_requests, seed, params)], generator, layout)
+    return filename
+
+
+def mixed_trace_name(size, pattern, mix, binary=False, directory="."):
+    suffix = ".btrace" if binary else ".trace"
+    return os.path.join(directory, f"trace_{size}_bytes_{mix_label(mix)}_{pattern}{suffix}")
+
+
+def create_trace_mixed(size, num_requests, pattern, mix, seed=None, binary=False, directory="."):
+    return create_pattern_trace(mixed_trace_name(size, pattern, mix, binary, directory), pattern, num_requests,
+                                mix, "opmix.create_trace_mixed", {"size": size}, seed)
+
+
+def create_traces_mixed(sizes, pattern, mixes, seed=None, formats=(False,), directory="."):
+    # Every (size, mix, format) trace of one pattern in a single pass; the same
+    # files as create_trace_mixed with num_requests = int(size * 0.5).
+    # formats lists binary flags. Returns {(size, mix, binary): filename}.
+    variants = {}
+    for size in sizes:
+        for mix in mixes:
+            for binary in formats:
+                variants[(size, mix, binary)] = Variant(mixed_trace_name(size, pattern, mix, binary, directory),
+                                                        mix, int(size * 0.5), seed, {"size": size})
+    create_trace_variants(pattern, list(variants.values()), "opmix.create_trace_mixed")
+    return {key: variant.filename for key, variant in variants.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate traces with arbitrary read/write mixes")
+    parser.add_argument("pattern", choices=sorted(GENERATORS))
+    parser.add_argument("sizes", nargs="+", type=int, help="trace sizes in bytes, used for the file names")
+    parser.add_argument("--requests", type=int, help="addresses to generate (default: size * 0.5)")
+    parser.add_argument("--mix", action="append", dest="mixes",
+                        help="W, R, read=F, burst=N:M, raw=D or interleaved; repeat for several (default: W)")
+    parser.add_argument("--seed", type=int, help="draw read=F reads at random with this seed")
+    parser.add_argument("--binary", action="store_true", help="write a .btrace instead of text")
+    parser.add_argument("--both", action="store_true", help="write both the text and the .btrace trace")
+    args = parser.parse_args()
+
+    mixes = args.mixes or ["W"]
+    formats = (False, True) if args.both else (args.binary,)
+    if args.requests is not None:
+        # An explicit request count applies to every size
+        variants = [Variant(mixed_trace_name(size, args.pattern, mix, binary), mix, args.requests, args.seed,
+                            {"size": size})
+                    for size in args.sizes for mix in mixes for binary in formats]
+        filenames = create_trace_variants(args.pattern, variants, "opmix.create_trace_mixed")
+    else:
+        filenames = create_traces_mixed(args.sizes, args.pattern, mixes, args.seed, formats).values()
+    for filename in filenames:
+        print(f"Wrote {filename}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+from address_layout import DEFAULT_LAYOUT
+
+# Closed-form versions of the access patterns generated by tr.py: the address of
+# request i is computed directly from i, so any slice of a trace can be built
+# without walking the counters from the beginning. generators.py registers
+# them under the scenario names used by the sweeps.
+
+
+def sequential_columns(index, layout=DEFAULT_LAYOUT):
+    # Walk the columns of bank 0, moving to the next row when they run out
+    columns = layout.field_count("column")
+    return layout.encode(row=index // columns, column=index % columns)
+
+
+def sequential_rows(index, layout=DEFAULT_LAYOUT):
+    # Walk the rows of bank 0, moving to the next column when they run out
+    rows = layout.field_count("row")
+    return layout.encode(row=index % rows, column=index // rows)
+
+
+def sequential_banks(index, layout=DEFAULT_LAYOUT):
+    # Interleave across every bank of every bank group, then advance the column
+    banks_per_group = layout.field_count("bank")
+    columns = layout.field_count("column")
+    bank_index = index % layout.num_banks
+    step = index // layout.num_banks
+    return layout.encode(row=step // columns,
+                         bank_group=bank_index // banks_per_group,
+                         bank=bank_index % banks_per_group,
+                         column=step % columns)
+
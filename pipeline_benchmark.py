@@ -0,0 +1,149 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from compare_results import compare, print_summary
+from results_store import load_records
+from sweep_spec import STAGES, Dag, compile_spec, digest, load_spec
+
+# End-to-end benchmark of the sweep pipeline. The sweep of a TOML spec (by
+# default sweep.toml) is run in an empty work directory against
+# mock_ramulator.py, timing every stage: generate, simulate, parse, derive,
+# plot. With the mock as fast as possible, the times are the pipeline's own
+# overhead. Timings and results are compared with a stored baseline; a
+# stage that got slower than the tolerance, or results that moved, fail the run.
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+MOCK_RAMULATOR = os.path.join(SCRIPT_DIR, "mock_ramulator.py")
+DEFAULT_SPEC = os.path.join(SCRIPT_DIR, "sweep.toml")
+BASELINE_FILE = "pipeline_baseline.json"
+DEFAULT_TOLERANCE = 0.25  # relative slowdown of a stage before it is a regression
+NOISE_SECONDS = 0.05  # stages faster than this in the baseline are not compared
+
+MOCK_CONFIG = """# DDR4 config for mock_ramulator.py
+standard = DDR4
+channels = 1
+ranks = 1
+speed = DDR4_2400R
+org = DDR4_4Gb_x8
+"""
+
+
+def run_once(spec, work_dir, workers=None):
+    # One full sweep; returns ({stage: seconds, "total": seconds}, records,
+    # seconds spent inside the simulator)
+    config = os.path.join(work_dir, "DDR4-config.cfg")
+    with open(config, 'w') as f:
+        f.write(MOCK_CONFIG)
+    settings = {"ramulator": MOCK_RAMULATOR, "config": config, "store": os.path.join(work_dir, "results.jsonl")}
+    dag = Dag(compile_spec(spec), work_dir, settings)
+    start = time.time()
+    with contextlib.redirect_stdout(io.StringIO()):  # one line per node otherwise
+        dag.run(workers)
+    timings = dict(dag.elapsed, total=time.time() - start)
+    simulated = sum(entry["value"]["elapsed"] for node, entry in dag.state.items() if node.startswith("simulate:"))
+    return timings, load_records(settings["store"]), simulated
+
+
+def benchmark(spec, repeats=3, workers=None, keep=False):
+    # Best time of every stage over `repeats` sweeps, each from scratch
+    best = {}
+    for _ in range(repeats):
+        work_dir = tempfile.mkdtemp(prefix="pipeline_benchmark_")
+        try:
+            timings, records, simulated = run_once(spec, work_dir, workers)
+        finally:
+            if keep:
+                print(f"Kept {work_dir}.")
+            else:
+                shutil.rmtree(work_dir, ignore_errors=True)
+        for stage, seconds in timings.items():
+            best[stage] = min(best.get(stage, seconds), seconds)
+        best["simulator"] = min(best.get("simulator", simulated), simulated)
+    return best, records
+
+
+def compare_timings(current, baseline, tolerance=DEFAULT_TOLERANCE):
+    # Prints the stage times against the baseline; returns the stages that regressed
+    regressed = []
+    print(f"{'stage':10s} {'seconds':>9s} {'baseline':>9s} {'change':>8s}")
+    for stage in STAGES + ["total", "simulator"]:
+        seconds = current.get(stage, 0.0)
+        base = baseline.get(stage)
+        change = ""
+        if base:
+            delta = (seconds - base) / base
+            change = f"{delta:+.0%}"
+            if stage != "simulator" and base >= NOISE_SECONDS and delta > tolerance:
+                regressed.append(stage)
+                change += " REGRESSION"
+        shown = f"{base:9.3f}" if base is not None else f"{'-':>9s}"
+        print(f"{stage:10s} {seconds:9.3f} {shown} {change:>8s}")
+    return regressed
+
+
+def stored_record(record):
+    # Trace paths point into the deleted work directory
+    return {key: value for key, value in record.items() if key != "trace"}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the whole sweep pipeline against mock_ramulator.py")
+    parser.add_argument("--spec", default=DEFAULT_SPEC)
+    parser.add_argument("--size", action="append", dest="sizes", type=int, help="override the spec's sizes")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--repeat", type=int, default=3, help="sweeps to run; the best time of each stage counts")
+    parser.add_argument("--rate", type=float, default=0.0,
+                        help="mock simulator speed in trace requests per second (default: no delay)")
+    parser.add_argument("--startup", type=float, default=0.0, help="mock simulator seconds per run")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the baseline")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--keep", action="store_true", help="keep the work directories")
+    args = parser.parse_args()
+
+    spec = load_spec(args.spec)
+    if args.sizes:
+        spec.setdefault("traces", {})["sizes"] = args.sizes
+    # The mock reads its speed from the environment, which every worker inherits
+    os.environ["MOCK_RAMULATOR_RATE"] = str(args.rate)
+    os.environ["MOCK_RAMULATOR_STARTUP"] = str(args.startup)
+    settings = {"spec": digest(spec), "workers": args.workers, "rate": args.rate, "startup": args.startup}
+
+    timings, records = benchmark(spec, args.repeat, args.workers, args.keep)
+    overhead = timings["total"] - timings["simulator"] / (args.workers or os.cpu_count() or 1)
+    print(f"{len(records)} simulations; pipeline overhead {overhead:.3f} s of {timings['total']:.3f} s.")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump({"settings": settings, "timings": timings,
+                       "records": [stored_record(record) for record in records]}, f, indent=1, sort_keys=True)
+        compare_timings(timings, {})
+        print(f"Saved baseline to {args.baseline}.")
+        return
+
+    if not os.path.exists(args.baseline):
+        compare_timings(timings, {})
+        print(f"No baseline at {args.baseline}; store one with --save-baseline.")
+        return
+    with open(args.baseline, 'r') as f:
+        baseline = json.load(f)
+    if baseline["settings"] != settings:
+        compare_timings(timings, {})
+        print(f"{args.baseline} was recorded with other settings ({baseline['settings']}); not comparing.")
+        return
+
+    regressed = compare_timings(timings, baseline["timings"], args.tolerance)
+    comparison = compare(records, baseline["records"])
+    print_summary(comparison)
+    if regressed or comparison["moved"].any() or comparison["missing"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,264 +2,7 @@ import os
 import subprocess
 import matplotlib.pyplot as plt
 
-def create_trace_sequential_columns(size, num_writes, read_or_write):
-    filename = f"trace_{size}_bytes_{read_or_write}_c.trace"
-
-    max_columns = (1 << 10)  # 10 bits for columns, i.e., 1024
-    row_bits = 16
-    bank_bits = 2
-    bank_group_bits = 1
-    offset_bits = 3
-
-    # Counters for the fields in the address
-    row = 0
-    bank_group = 0
-    bank = 0
-    column = 0
-
-    with open(filename, 'w') as f:
-        for i in range(num_writes):
-            if column >= max_columns:  # Column overflow, increment row
-                column = 0
-                row += 1  # Increment the row if columns overflow
-                # Reset bank and bank group to zero since row is incremented
-                bank = 0
-                bank_group = 0
-
-            # Create the address by placing the bits in the right positions
-            address = (row << (bank_bits + bank_group_bits + 10 + offset_bits)) | \
-                      (bank_group << (bank_bits + 10 + offset_bits)) | \
-                      (bank << (10 + offset_bits)) | \
-                      (column << offset_bits)  # Column occupies 10 bits
-
-            # Write to the trace file
-            formatted_address = f"0x{address:08X}"  # Format with zero-padding to 8 hex digits
-            f.write(f"{formatted_address} {read_or_write}\n")
-
-            # Increment column for the next write
-            column += 1
-    return filename
-
-
-def create_trace_sequential_rows(size, num_writes, read_or_write):
-    filename = f"trace_{size}_bytes_{read_or_write}_r.trace"
-
-    max_rows = (1 << 16)  # 10 bits for columns, i.e., 1024
-    row_bits = 16
-    bank_bits = 2
-    bank_group_bits = 1
-    offset_bits = 3
-
-    # Counters for the fields in the address
-    row = 0
-    bank_group = 0
-    bank = 0
-    column = 0
-
-    with open(filename, 'w') as f:
-        for i in range(num_writes):
-            if row >= max_rows:  # Column overflow, increment row
-                column += 1
-                row = 0  # Increment the row if columns overflow
-                # Reset bank and bank group to zero since row is incremented
-                bank = 0
-                bank_group = 0
-
-            # Create the address by placing the bits in the right positions
-            address = (row << (bank_bits + bank_group_bits + 10 + offset_bits)) | \
-                      (bank_group << (bank_bits + 10 + offset_bits)) | \
-                      (bank << (10 + offset_bits)) | \
-                      (column << offset_bits)  # Column occupies 10 bits
-
-            # Write to the trace file
-            formatted_address = f"0x{address:08X}"  # Format with zero-padding to 8 hex digits
-            f.write(f"{formatted_address} {read_or_write}\n")
-
-            # Increment column for the next write
-            row += 1
-    return filename
-
-
-def create_trace_sequential_banks(size, num_writes, read_or_write):
-    filename = f"trace_{size}_bytes_{read_or_write}_b.trace"
-
-    max_columns = (1 << 10)  # 10 bits for columns, i.e., 1024
-    max_banks = 4  # 2 bits for banks, i.e., 4 banks
-    max_bank_groups = 2  # 1 bit for bank group, i.e., 2 bank groups
-    row_bits = 16
-    bank_bits = 2
-    bank_group_bits = 1
-    offset_bits = 3
-
-    # Counters for the fields in the address
-    row = 0
-    column = 0
-    bank_index = 0  # We will interleave between 8 banks (4 banks * 2 bank groups)
-
-    with open(filename, 'w') as f:
-        for i in range(num_writes):
-            # Determine the bank group and bank based on bank_index (to interleave)
-            bank_group = (bank_index >> bank_bits) & 0x1  # 1 bit for bank group
-            bank = bank_index & 0x3  # 2 bits for banks
-
-            # Create the address by placing the bits in the right positions
-            address = (row << (bank_bits + bank_group_bits + 10 + offset_bits)) | \
-                      (bank_group << (bank_bits + 10 + offset_bits)) | \
-                      (bank << (10 + offset_bits)) | \
-                      (column << offset_bits)  # Column occupies 10 bits
-
-            # Write to the trace file
-            formatted_address = f"0x{address:08X}"  # Format with zero-padding to 8 hex digits
-            f.write(f"{formatted_address} {read_or_write}\n")
-
-            # Increment the bank index to interleave across banks
-            bank_index += 1
-
-            # Once we've cycled through all 8 banks, reset the bank index and increment the column
-            if bank_index >= (max_banks * max_bank_groups):  # 8 banks in total
-                bank_index = 0
-                column += 1  # Move to the next column after all banks are used
-
-            # If the column overflows, reset column and increment row
-            if column >= max_columns:
-                column = 0
-                row += 1  # Increment the row when columns overflow
-
-    return filename
-
-
-
-def create_trace_sequential_columns_interleaved(size, num_writes, read_or_write):
-    filename = f"trace_{size}_bytes_{read_or_write}_ci.trace"
-
-    max_columns = (1 << 10)  # 10 bits for columns, i.e., 1024
-    row_bits = 16
-    bank_bits = 2
-    bank_group_bits = 1
-    offset_bits = 3
-
-    # Counters for the fields in the address
-    row = 0
-    bank_group = 0
-    bank = 0
-    column = 0
-
-    with open(filename, 'w') as f:
-        for i in range(num_writes):
-            if column >= max_columns:  # Column overflow, increment row
-                column = 0
-                row += 1  # Increment the row if columns overflow
-                # Reset bank and bank group to zero since row is incremented
-                bank = 0
-                bank_group = 0
-
-            # Create the address by placing the bits in the right positions
-            address = (row << (bank_bits + bank_group_bits + 10 + offset_bits)) | \
-                      (bank_group << (bank_bits + 10 + offset_bits)) | \
-                      (bank << (10 + offset_bits)) | \
-                      (column << offset_bits)  # Column occupies 10 bits
-
-            # Write to the trace file
-            formatted_address = f"0x{address:08X}"  # Format with zero-padding to 8 hex digits
-            f.write(f"{formatted_address} W\n")
-            f.write(f"{formatted_address} R\n")
-
-            # Increment column for the next write
-            column += 1
-    return filename
-
-
-def create_trace_sequential_rows_interleaved(size, num_writes, read_or_write):
-    filename = f"trace_{size}_bytes_{read_or_write}_ri.trace"
-
-    max_rows = (1 << 16)  # 10 bits for columns, i.e., 1024
-    row_bits = 16
-    bank_bits = 2
-    bank_group_bits = 1
-    offset_bits = 3
-
-    # Counters for the fields in the address
-    row = 0
-    bank_group = 0
-    bank = 0
-    column = 0
-
-    with open(filename, 'w') as f:
-        for i in range(num_writes):
-            if row >= max_rows:  # Column overflow, increment row
-                column += 1
-                row = 0  # Increment the row if columns overflow
-                # Reset bank and bank group to zero since row is incremented
-                bank = 0
-                bank_group = 0
-
-            # Create the address by placing the bits in the right positions
-            address = (row << (bank_bits + bank_group_bits + 10 + offset_bits)) | \
-                      (bank_group << (bank_bits + 10 + offset_bits)) | \
-                      (bank << (10 + offset_bits)) | \
-                      (column << offset_bits)  # Column occupies 10 bits
-
-            # Write to the trace file
-            formatted_address = f"0x{address:08X}"  # Format with zero-padding to 8 hex digits
-            f.write(f"{formatted_address} W\n")
-            f.write(f"{formatted_address} R\n")
-
-            # Increment column for the next write
-            row += 1
-    return filename
-
-
-def create_trace_sequential_banks_interleaved(size, num_writes, read_or_write):
-    filename = f"trace_{size}_bytes_{read_or_write}_bi.trace"
-
-    max_columns = (1 << 10)  # 10 bits for columns, i.e., 1024
-    max_banks = 4  # 2 bits for banks, i.e., 4 banks
-    max_bank_groups = 2  # 1 bit for bank group, i.e., 2 bank groups
-    row_bits = 16
-    bank_bits = 2
-    bank_group_bits = 1
-    offset_bits = 3
-
-    # Counters for the fields in the address
-    row = 0
-    column = 0
-    bank_index = 0  # We will interleave between 8 banks (4 banks * 2 bank groups)
-
-    with open(filename, 'w') as f:
-        for i in range(num_writes):
-            # Determine the bank group and bank based on bank_index (to interleave)
-            bank_group = (bank_index >> bank_bits) & 0x1  # 1 bit for bank group
-            bank = bank_index & 0x3  # 2 bits for banks
-
-            # Create the address by placing the bits in the right positions
-            address = (row << (bank_bits + bank_group_bits + 10 + offset_bits)) | \
-                      (bank_group << (bank_bits + 10 + offset_bits)) | \
-                      (bank << (10 + offset_bits)) | \
-                      (column << offset_bits)  # Column occupies 10 bits
-
-            # Write to the trace file
-            formatted_address = f"0x{address:08X}"  # Format with zero-padding to 8 hex digits
-            f.write(f"{formatted_address} W\n")
-            f.write(f"{formatted_address} R\n")
-
-            # Increment the bank index to interleave across banks
-            bank_index += 1
-
-            # Once we've cycled through all 8 banks, reset the bank index and increment the column
-            if bank_index >= (max_banks * max_bank_groups):  # 8 banks in total
-                bank_index = 0
-                column += 1  # Move to the next column after all banks are used
-
-            # If the column overflows, reset column and increment row
-            if column >= max_columns:
-                column = 0
-                row += 1  # Increment the row when columns overflow
-
-    return filename
-
-
-
-
+from opmix import create_trace_mixed
 
 def run_ramulator(size, filename):
     stats_file = "DDR4.stats"
@@ -298,14 +41,8 @@ def read_stats(stats_file, lines):
     return dram_cycles
 
 def process_scenario(size, writes, scenario,results,lines,operation):
-        if scenario == 'columns':
-            filename = create_trace_sequential_columns(size, writes, "W")
-        elif scenario == 'rows':
-            filename = create_trace_sequential_rows(size, writes, "W")
-        elif scenario == 'banks':
-            filename = create_trace_sequential_banks(size, writes, "W")
-        else:
-            raise ValueError("Invalid scenario")
+        # Any generator registered in generators.py can be swept by name
+        filename = create_trace_mixed(size, writes, scenario, "W")
         stats_file = run_ramulator(size, filename)
         
         if operation:
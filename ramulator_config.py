@@ -0,0 +1,48 @@
+import re
+
+# Reader for Ramulator's "key = value" configuration files, e.g. DDR4-config.cfg
+
+
+def read_config(config_file):
+    config = {}
+    with open(config_file, 'r') as f:
+        for line in f:
+            line = line.split('#', 1)[0].strip()
+            if '=' not in line:
+                continue
+            key, value = line.split('=', 1)
+            config[key.strip()] = value.strip()
+    return config
+
+
+def capacity_from_config(config_file):
+    # Bytes of DRAM described by a config, from its org (e.g. DDR4_4Gb_x8: 4 Gb
+    # chips, x8 wide, eight of them per 64-bit rank), ranks and channels
+    config = read_config(config_file)
+    match = re.match(r"DDR4_(\d+)Gb_x(\d+)", config.get("org", ""))
+    if not match:
+        return None
+    chip_bits = int(match.group(1)) << 30
+    chips_per_rank = 64 // int(match.group(2))
+    ranks = int(config.get("ranks", 1))
+    channels = int(config.get("channels", 1))
+    return chip_bits // 8 * chips_per_rank * ranks * channels
+
+
+def write_config(base_config, overrides, config_file):
+    # Copies base_config with the overridden keys' values replaced; keys the
+    # base does not have are appended
+    remaining = dict(overrides)
+    lines = []
+    with open(base_config, 'r') as f:
+        for line in f:
+            key = line.split('#', 1)[0].split('=', 1)[0].strip()
+            if '=' in line.split('#', 1)[0] and key in remaining:
+                line = f"{key} = {remaining.pop(key)}\n"
+            lines.append(line)
+    if lines and not lines[-1].endswith("\n"):
+        lines[-1] += "\n"
+    lines.extend(f"{key} = {value}\n" for key, value in remaining.items())
+    with open(config_file, 'w') as f:
+        f.writelines(lines)
+    return config_file
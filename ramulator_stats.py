@@ -0,0 +1,19 @@
+# Single-pass parser for Ramulator stats files such as DDR4.stats. Every line
+# looks like "ramulator.dram_cycles    12345    # description".
+
+
+def parse_stats_file(stats_file):
+    stats = {}
+    try:
+        with open(stats_file, 'r') as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) < 2 or not parts[0].startswith("ramulator."):
+                    continue
+                try:
+                    stats[parts[0]] = float(parts[1])
+                except ValueError:
+                    continue  # e.g. a header or a non-numeric value
+    except FileNotFoundError:
+        print(f"{stats_file} not found.")
+    return stats
@@ -0,0 +1,128 @@
+import argparse
+import json
+
+import numpy as np
+
+from opmix import is_randomized
+from report_plots import plot_comparison
+from results_store import metric_matrix, point_key, point_label
+from sweep import BASE_CONFIG, DEFAULT_SCENARIOS, DEFAULT_SIZES, RAMULATOR, Job, run_sweep
+from sweep_metrics import TITLES, derive_metrics
+from trace_cache import TraceCache, parse_bytes
+
+# Replicates go to their own store, like windows.jsonl, so the sweeps' points
+# (plots, compare_results.py, surrogate calibration) are not mixed with them
+REPLICATE_STORE = "replicates.jsonl"
+
+# Two-sided 95% Student t quantiles by degrees of freedom; larger samples use 1.96
+T_95 = {1: 12.706, 2: 4.303, 3: 3.182, 4: 2.776, 5: 2.571, 6: 2.447, 7: 2.365, 8: 2.306,
+        9: 2.262, 10: 2.228, 12: 2.179, 15: 2.131, 20: 2.086, 25: 2.060, 30: 2.042}
+
+
+def t_quantile(df):
+    if df <= 0:
+        return np.nan
+    if df > max(T_95):
+        return 1.96
+    # Nearest tabulated df at or below, i.e. a slightly conservative interval
+    return T_95[max(d for d in T_95 if d <= df)]
+
+
+def replicate_jobs(scenarios, sizes, mix, seeds, params=None):
+    return [Job(scenario, size, mix=mix, params=params, seed=seed)
+            for scenario in scenarios for size in sizes for seed in seeds]
+
+
+def run_replicates(jobs, workers=None, store=REPLICATE_STORE, metrics_file=None, **run_options):
+    # Every distinct trace is simulated and stored once. A mix that does not
+    # depend on the seed gives one trace whatever the seed, so it runs once
+    # without one; its point has a single sample and no interval.
+    unique = {}
+    for job in jobs:
+        if not is_randomized(job.mix):
+            job = Job(job.scenario, job.size, job.requests, job.mix, job.params, None, job.rate)
+        unique.setdefault(job.trace_key(), job)
+    return run_sweep(list(unique.values()), workers, store, None, metrics_file, **run_options)
+
+
+def aggregate_replicates(records):
+    # Mean, standard deviation and 95% confidence half-width of every stats key
+    # and derived metric, as vectors over the keys, per (pattern, size, mix,
+    # params): the seeds of a point are pooled
+    groups = {}
+    for record in records:
+        groups.setdefault(point_key(dict(record, seed=None)), []).append(record)
+
+    aggregated = {}
+    for key, group in groups.items():
+        rows = [dict(record["stats"], **{name: value for name, value in
+                                         derive_metrics(record["stats"], record["size"]).items()
+                                         if value is not None})
+                for record in group]
+        keys = sorted({name for row in rows for name in row})
+        values = metric_matrix([{"stats": row} for row in rows], keys)
+        count = np.sum(~np.isnan(values), axis=0)
+        mean = np.nanmean(values, axis=0)
+        std = np.nanstd(values, axis=0, ddof=1) if len(group) > 1 else np.zeros(len(keys))
+        half_width = np.array([t_quantile(n - 1) for n in count]) * std / np.sqrt(np.maximum(count, 1))
+        aggregated[key] = {"keys": keys, "n": len(group), "mean": mean, "std": std, "ci95": half_width}
+    return aggregated
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run K seeds per (size, pattern) and report confidence intervals")
+    parser.add_argument("--seeds", type=int, default=8, help="replicates per point")
+    parser.add_argument("--first-seed", type=int, default=0)
+    parser.add_argument("--mix", default="read=0.5", help="op mix; read=F is drawn at random per seed")
+    parser.add_argument("--size", action="append", dest="sizes", type=int, help="default: 256 B .. 256 KiB")
+    parser.add_argument("--metric", default="dram_cycles / ramulator.dram_capacity", help="metric to plot")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--ramulator", default=RAMULATOR)
+    parser.add_argument("--config", default=BASE_CONFIG)
+    parser.add_argument("--store", default=REPLICATE_STORE)
+    parser.add_argument("--trace-cache", metavar="DIR", help="reuse generated traces from this cache directory")
+    parser.add_argument("--cache-budget", default="4G", help="byte budget of the trace cache (default: 4G)")
+    parser.add_argument("--metrics-file", help="write sweep progress to this Prometheus textfile (*.prom)")
+    parser.add_argument("--output", default="replicates.png", help="plot with confidence bands")
+    parser.add_argument("--summary", help="write the aggregated vectors to this JSON file")
+    args = parser.parse_args()
+    trace_cache = TraceCache(args.trace_cache, parse_bytes(args.cache_budget)) if args.trace_cache else None
+
+    sizes = args.sizes or DEFAULT_SIZES
+    seeds = range(args.first_seed, args.first_seed + args.seeds)
+    jobs = replicate_jobs(DEFAULT_SCENARIOS, sizes, args.mix, seeds)
+    records = run_replicates(jobs, args.workers, args.store, args.metrics_file, ramulator=args.ramulator,
+                             base_config=args.config,
+                             trace_cache=trace_cache)
+    aggregated = aggregate_replicates(records)
+
+    if args.summary:
+        with open(args.summary, 'w') as f:
+            json.dump({point_label(key): {"n": value["n"], **{
+                stat: dict(zip(value["keys"], value[stat].tolist())) for stat in ("mean", "std", "ci95")}}
+                for key, value in aggregated.items()}, f, indent=1)
+
+    # Same figure as tr.py, with the confidence intervals as bands
+    import matplotlib
+    matplotlib.use("Agg")
+    means = {}
+    errors = {}
+    for scenario in DEFAULT_SCENARIOS:
+        means[scenario] = []
+        errors[scenario] = []
+        for size in sizes:
+            value = aggregated[(scenario, float(size), args.mix, ())]
+            index = value["keys"].index(args.metric)
+            means[scenario].append(value["mean"][index])
+            errors[scenario].append(value["ci95"][index])
+            print(f"{scenario:8s} {size:>8g}  {args.metric} = {value['mean'][index]:g} "
+                  f"± {value['ci95'][index]:g} (n={value['n']})")
+    y_label, plot_title = TITLES[args.metric]
+    fig = plot_comparison(sizes, means['columns'], means['rows'], means['banks'], y_label,
+                          f"{plot_title} ({args.mix}, {args.seeds} seeds, 95% CI)", errors)
+    fig.savefig(args.output)
+    print(f"Wrote {args.output}.")
+
+
+if __name__ == "__main__":
+    main()
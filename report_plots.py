@@ -0,0 +1,196 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+
+from results_store import DEFAULT_STORE, load_records
+from sweep_metrics import METRICS, TITLES, derive_metrics
+
+# Figures are rendered from the results store into PLOT_DIR. Each figure's
+# input series, labels and style are hashed; a figure whose hash matches the
+# one recorded at its last rendering is left untouched.
+PLOT_DIR = "plots"
+CACHE_FILE = ".plot_cache.json"
+
+# Same look as plot_comparison(); part of every figure's hash
+STYLE = {
+    "figsize": [10, 6],
+    "series": {
+        "columns": {"marker": "o", "color": "b", "label": "Sequential Columns"},
+        "banks": {"marker": "^", "color": "g", "label": "Sequential Banks"},
+        "rows": {"marker": "s", "color": "r", "label": "Sequential Rows"},
+    },
+    "xlabel": "Trace File Size (Bytes)",
+    "xscale_base": 2,
+}
+
+
+def variant_of(record):
+    # Records from different op mixes, config values or seeds go to separate
+    # figures; same order as sweep_spec.py's variants
+    parts = []
+    if record.get("mix") not in (None, "W"):
+        parts.append(record["mix"])
+    parts += [f"{key}={value}" for key, value in sorted(record.get("params", {}).items())]
+    if record.get("rate") is not None:
+        parts.append(f"load={record['rate']:g}")
+    if record.get("seed") is not None:
+        parts.append(f"seed={record['seed']}")
+    return ",".join(parts)
+
+
+def collect_series(records):
+    # {(variant, metric): {scenario: {size: value}}}; later records for a point win
+    series = {}
+    for record in records:
+        values = derive_metrics(record.get("stats", {}), record["size"])
+        variant = variant_of(record)
+        for key in METRICS:
+            if values[key] is None:
+                continue
+            by_scenario = series.setdefault((variant, key), {})
+            by_scenario.setdefault(record["scenario"], {})[float(record["size"])] = values[key]
+    return series
+
+
+def figure_name(variant, key):
+    name = re.sub(r"[^A-Za-z0-9]+", "_", key).strip("_")
+    if variant:
+        name += "__" + re.sub(r"[^A-Za-z0-9=.,-]+", "_", variant)
+    return name + ".png"
+
+
+def figure_hash(variant, key, by_scenario):
+    data = {
+        "variant": variant,
+        "key": key,
+        "titles": TITLES.get(key, (key, key)),
+        "style": STYLE,
+        "series": {scenario: sorted(points.items()) for scenario, points in sorted(by_scenario.items())},
+    }
+    return hashlib.sha256(json.dumps(data, sort_keys=True).encode()).hexdigest()
+
+
+def size_label(size):
+    for unit, scale in (("M", 1 << 20), ("K", 1 << 10)):
+        if size >= scale and size % scale == 0:
+            return f"{int(size // scale)}{unit}"
+    return f"{size:g}"
+
+
+def render_figure(path, variant, key, by_scenario):
+    # pyplot is only imported once something actually needs drawing
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    y_label, plot_title = TITLES.get(key, (key, key))
+    if variant:
+        plot_title += f" ({variant})"
+    fig = plt.figure(figsize=STYLE["figsize"])
+    sizes = set()
+    for scenario, points in sorted(by_scenario.items()):
+        style = STYLE["series"].get(scenario, {"marker": "o", "color": None, "label": scenario})
+        x = sorted(points)
+        sizes.update(x)
+        plt.plot(x, [points[size] for size in x], marker=style["marker"], linestyle='-',
+                 color=style["color"], label=style["label"])
+    plt.title(plot_title)
+    plt.xlabel(STYLE["xlabel"])
+    plt.xscale('log', base=STYLE["xscale_base"])
+    plt.xticks(sorted(sizes), [size_label(size) for size in sorted(sizes)])
+    plt.ylabel(y_label)
+    plt.grid(True)
+    plt.legend()
+    fig.savefig(path)
+    plt.close(fig)
+
+
+def plot_comparison(sizes, columns, rows, banks, ylabel, title, errors=None):
+    # tr.py's figure of the three patterns over the trace sizes, on the
+    # current pyplot backend; errors are optional bands, e.g. confidence
+    # intervals from replicates.py: {'columns': [...], ...}
+    import matplotlib.pyplot as plt
+
+    fig = plt.figure(figsize=STYLE["figsize"])
+    values = {"columns": columns, "banks": banks, "rows": rows}
+    for scenario in ("columns", "banks", "rows"):
+        style = STYLE["series"][scenario]
+        plt.plot(sizes, values[scenario], marker=style["marker"], linestyle='-', color=style["color"],
+                 label=style["label"])
+        if errors and scenario in errors:
+            lower = [value - error for value, error in zip(values[scenario], errors[scenario])]
+            upper = [value + error for value, error in zip(values[scenario], errors[scenario])]
+            plt.fill_between(sizes, lower, upper, color=style["color"], alpha=0.2)
+    plt.title(title)
+    plt.xlabel(STYLE["xlabel"])
+    plt.xscale('log', base=STYLE["xscale_base"])
+    plt.xticks(sizes, [size_label(size) for size in sizes])
+    plt.ylabel(ylabel)
+    plt.grid(True)
+    plt.legend()
+    return fig
+
+
+def load_cache(plot_dir):
+    path = os.path.join(plot_dir, CACHE_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def save_cache(plot_dir, cache):
+    path = os.path.join(plot_dir, CACHE_FILE)
+    with open(path + ".tmp", 'w') as f:
+        json.dump(cache, f, indent=1, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+
+def update_figures(records, plot_dir=PLOT_DIR, keys=None, force=False):
+    # Returns the names of the figures that were (re)rendered and of those skipped
+    os.makedirs(plot_dir, exist_ok=True)
+    cache = load_cache(plot_dir)
+    rendered = []
+    skipped = []
+    for (variant, key), by_scenario in sorted(collect_series(records).items()):
+        if keys and key not in keys:
+            continue
+        name = figure_name(variant, key)
+        digest = figure_hash(variant, key, by_scenario)
+        path = os.path.join(plot_dir, name)
+        if not force and cache.get(name) == digest and os.path.exists(path):
+            skipped.append(name)
+            continue
+        render_figure(path, variant, key, by_scenario)
+        cache[name] = digest
+        rendered.append(name)
+    if rendered:
+        save_cache(plot_dir, cache)
+    return rendered, skipped
+
+
+def refresh_figures(store=DEFAULT_STORE, plot_dir=PLOT_DIR, keys=None, force=False):
+    # update_figures over a whole results store, reporting what it did; the
+    # sweep scripts call this once their runs are in the store
+    rendered, skipped = update_figures(load_records(store), plot_dir, keys, force)
+    for name in rendered:
+        print(f"Rendered {os.path.join(plot_dir, name)}.")
+    print(f"{len(rendered)} figures rendered, {len(skipped)} unchanged.")
+    return rendered, skipped
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render the sweep's figures, redrawing only those whose inputs changed")
+    parser.add_argument("--store", default=DEFAULT_STORE)
+    parser.add_argument("--plot-dir", default=PLOT_DIR)
+    parser.add_argument("--metric", action="append", dest="keys", help="only these metrics (default: all)")
+    parser.add_argument("--force", action="store_true", help="re-render every figure")
+    args = parser.parse_args()
+
+    refresh_figures(args.store, args.plot_dir, args.keys, args.force)
+
+
+if __name__ == "__main__":
+    main()
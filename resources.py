@@ -0,0 +1,208 @@
+import os
+import subprocess
+
+from wall_time import CostModel
+
+# CPU and memory limits for sizing sweeps. Limits come from this process's
+# cgroup (v2, or v1) when it is confined and from /proc otherwise; the
+# smallest applies. Jobs are admitted while the peak RSS predicted for the
+# running ones fits the memory budget and the host is not under memory
+# pressure, so large traces cannot get Ramulator runs OOM-killed.
+CGROUP_ROOT = "/sys/fs/cgroup"
+MEMINFO_FILE = "/proc/meminfo"
+PRESSURE_FILE = "/proc/pressure/memory"
+PRESSURE_LIMIT = 10.0  # % of the last 10 s in which some task stalled on memory
+RESERVE_FRACTION = 0.1  # of the memory limit, left for everything else
+MEMORY_MARGIN = 1.25  # predicted peak RSS is scaled by this before admitting
+DEFAULT_JOB_MEMORY = 256 << 20  # bytes; used until any peak RSS is recorded
+DEFAULT_MEMORY_PER_REQUEST = 64
+
+
+def read_fields(path):
+    try:
+        with open(path, 'r') as f:
+            return f.read().split()
+    except OSError:
+        return None
+
+
+def read_int(path):
+    # Integer in a one-value file; None if it is missing or "max"
+    fields = read_fields(path)
+    if not fields or not fields[0].lstrip("-").isdigit():
+        return None
+    return int(fields[0])
+
+
+def cgroup_dirs(controller):
+    # Directories that may hold this process's cgroup files for a controller:
+    # its v2 cgroup, its v1 cgroup of the controller, then the roots
+    dirs = []
+    try:
+        with open("/proc/self/cgroup", 'r') as f:
+            for line in f:
+                _, controllers, path = line.rstrip("\n").split(":", 2)
+                if controllers == "":
+                    dirs.append(os.path.join(CGROUP_ROOT, path.lstrip("/")))
+                elif controller in controllers.split(","):
+                    dirs.append(os.path.join(CGROUP_ROOT, controller, path.lstrip("/")))
+    except (OSError, ValueError):
+        pass
+    return dirs + [CGROUP_ROOT, os.path.join(CGROUP_ROOT, controller)]
+
+
+def meminfo():
+    # {field: bytes} from /proc/meminfo
+    values = {}
+    try:
+        with open(MEMINFO_FILE, 'r') as f:
+            for line in f:
+                name, value = line.split(":", 1)
+                fields = value.split()
+                values[name] = int(fields[0]) * (1024 if fields[1:] == ["kB"] else 1)
+    except (OSError, ValueError, IndexError):
+        pass
+    return values
+
+
+def cpu_limit():
+    # CPUs this process may use: its affinity mask, capped by a CFS quota
+    if hasattr(os, "sched_getaffinity"):
+        cpus = len(os.sched_getaffinity(0))
+    else:
+        cpus = os.cpu_count() or 1
+    for directory in cgroup_dirs("cpu"):
+        fields = read_fields(os.path.join(directory, "cpu.max"))  # "max 100000" or "<quota> <period>"
+        if fields and fields[0] != "max":
+            return max(min(cpus, int(fields[0]) // int(fields[1])), 1)
+        quota = read_int(os.path.join(directory, "cpu.cfs_quota_us"))
+        period = read_int(os.path.join(directory, "cpu.cfs_period_us"))
+        if quota is not None and quota > 0 and period:
+            return max(min(cpus, quota // period), 1)
+    return max(cpus, 1)
+
+
+def cgroup_memory():
+    # (limit, usage) of the innermost cgroup with a memory limit, or None.
+    # Reclaimable page cache does not count as usage.
+    for directory in cgroup_dirs("memory"):
+        limit = read_int(os.path.join(directory, "memory.max"))
+        usage = read_int(os.path.join(directory, "memory.current"))
+        if limit is None:
+            limit = read_int(os.path.join(directory, "memory.limit_in_bytes"))
+            usage = read_int(os.path.join(directory, "memory.usage_in_bytes"))
+        if limit is None or usage is None or limit >= 1 << 60:
+            continue  # unlimited (v1 reports a huge number)
+        stat = read_fields(os.path.join(directory, "memory.stat")) or []
+        stat = dict(zip(stat[::2], stat[1::2]))
+        cache = int(stat.get("inactive_file", stat.get("total_inactive_file", 0)))
+        return limit, max(usage - cache, 0)
+    return None
+
+
+def memory_limit():
+    limit = meminfo().get("MemTotal")
+    confined = cgroup_memory()
+    if confined is not None:
+        limit = min(limit, confined[0]) if limit else confined[0]
+    return limit
+
+
+def memory_available():
+    available = meminfo().get("MemAvailable")
+    confined = cgroup_memory()
+    if confined is not None:
+        limit, usage = confined
+        available = min(available, limit - usage) if available is not None else limit - usage
+    return available
+
+
+def memory_pressure():
+    # "some avg10" of the kernel's pressure stall information, or None
+    fields = read_fields(PRESSURE_FILE)
+    if not fields:
+        return None
+    for field in fields:
+        if field.startswith("avg10="):
+            return float(field.split("=", 1)[1])
+    return None
+
+
+def under_pressure(limit=PRESSURE_LIMIT):
+    pressure = memory_pressure()
+    if pressure is not None and pressure > limit:
+        return True
+    available, total = memory_available(), memory_limit()
+    return available is not None and total is not None and available < total * RESERVE_FRACTION
+
+
+def memory_budget():
+    # Bytes the sweep's jobs may use together: what is free now, less the reserve
+    available, total = memory_available(), memory_limit()
+    if available is None:
+        return None
+    return max(available - (total or 0) * RESERVE_FRACTION, 0)
+
+
+def format_bytes(value):
+    for unit in ["B", "KiB", "MiB", "GiB"]:
+        if value < 1024:
+            return f"{value:.0f} {unit}" if unit == "B" else f"{value:.1f} {unit}"
+        value /= 1024
+    return f"{value:.1f} TiB"
+
+
+def run_measured(command, cwd):
+    # subprocess.run(command, check=True) that returns the child's peak RSS
+    # in bytes; only this child is measured, not earlier ones of the worker
+    process = subprocess.Popen(command, cwd=cwd, stdout=subprocess.DEVNULL)
+    _, status, usage = os.wait4(process.pid, 0)
+    process.returncode = os.waitstatus_to_exitcode(status)
+    if process.returncode:
+        raise subprocess.CalledProcessError(process.returncode, command)
+    return usage.ru_maxrss * 1024  # kilobytes on Linux
+
+
+def memory_model(history=()):
+    # Peak RSS ~ base + bytes per request, fitted like the wall-time model
+    return CostModel(history, "peak_rss", (DEFAULT_JOB_MEMORY, DEFAULT_MEMORY_PER_REQUEST), 0, "startup")
+
+
+class Admission:
+    # Decides which pending job, if any, may start now
+    def __init__(self, model, budget=None, pressure_limit=PRESSURE_LIMIT):
+        self.model = model
+        self.budget = memory_budget() if budget is None else budget
+        self.pressure_limit = pressure_limit
+        self.reserved = {}  # job -> predicted bytes; by object, as names may repeat
+        self.throttled = False
+
+    def need(self, job):
+        return self.model.predict(job) * MEMORY_MARGIN
+
+    def choose(self, pending):
+        # Index of the first pending job that fits, or None. With nothing
+        # running the first job always starts, so the sweep makes progress.
+        if not pending:
+            return None
+        if not self.reserved:
+            self.throttled = False
+            return 0
+        self.throttled = under_pressure(self.pressure_limit)
+        if self.throttled:
+            return None
+        if self.budget is None:
+            return 0  # no memory information on this host
+        free = self.budget - sum(self.reserved.values())
+        for index, job in enumerate(pending):
+            if self.need(job) <= free:
+                return index
+        return None
+
+    def admit(self, job):
+        self.reserved[job] = self.need(job)
+
+    def release(self, job, peak_rss=None):
+        self.reserved.pop(job, None)
+        if peak_rss is not None:
+            self.model.observe(job, peak_rss)
@@ -0,0 +1,58 @@
+import json
+import os
+
+import numpy as np
+
+# Results are kept as JSON lines, one record per simulated point, so sweeps can
+# append concurrently-written points and later analyses can reload them.
+DEFAULT_STORE = "results.jsonl"
+
+
+def append_record(record, path=DEFAULT_STORE):
+    with open(path, 'a') as f:
+        f.write(json.dumps(record, sort_keys=True) + "\n")
+
+
+def load_records(path=DEFAULT_STORE):
+    records = []
+    if not os.path.exists(path):
+        return records
+    with open(path, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                records.append(json.loads(line))
+    return records
+
+
+def metric_matrix(records, keys, section="stats"):
+    # (records x keys) float matrix, NaN where a record lacks a key
+    matrix = np.full((len(records), len(keys)), np.nan)
+    for i, record in enumerate(records):
+        values = record.get(section, {})
+        for j, key in enumerate(keys):
+            if key in values and values[key] is not None:
+                matrix[i, j] = values[key]
+    return matrix
+
+
+def point_key(record):
+    # A point is identified by its pattern, size, op mix and any swept config values
+    params = tuple(sorted(record.get("params", {}).items()))
+    if record.get("rate") is not None:
+        # Load runs (load_latency.py) are distinct points per offered load
+        params += (("rate", record["rate"]),)
+    if record.get("seed") is not None:
+        # So are the seeds of a randomized mix (replicates.py)
+        params += (("seed", record["seed"]),)
+    return (record.get("scenario"), float(record.get("size", 0)), record.get("mix") or "W", params)
+
+
+def point_label(key):
+    scenario, size, mix, params = key
+    label = f"{scenario}/{size:g}"
+    if mix != "W":
+        label += f"/{mix}"
+    if params:
+        label += " " + ",".join(f"{name}={value}" for name, value in params)
+    return label
@@ -0,0 +1,157 @@
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from address_layout import DEFAULT_LAYOUT
+from generators import GENERATORS, get_generator
+from manifest import ManifestBuilder
+from opmix import apply_mix, create_pattern_trace, mixed_trace_name, needs_whole_stream, trace_requests
+from trace_io import CHUNK_REQUESTS, TEXT_LINE_BYTES, TRACE_DTYPE, encode_requests, is_binary_trace
+
+# Sharded generation of one large trace. The patterns are closed-form in the
+# request index and the op mixes take the stream position of their first
+# request, so any slice of the trace can be computed on its own. Every line
+# of a text trace is TEXT_LINE_BYTES long while its addresses fit in 32 bits
+# and every binary record is TRACE_DTYPE.itemsize, so each slice's byte offset
+# is known up front: workers pwrite their slices into one preallocated file.
+# Past its period a pattern's row keeps counting up (columns from request
+# 2^26 with the default layout), so a text trace that long is checked for
+# wider addresses first and written in one pass if it has any. The parent
+# merges the shards' manifest counts and hashes the finished prefix of the
+# file while later shards are still being written, so the manifest is the
+# same as create_pattern_trace's. The result is byte-identical to it.
+SHARD_REQUESTS = 8 * CHUNK_REQUESTS
+HASH_BLOCK = 16 << 20
+MAX_FIXED_WIDTH_ADDRESS = 0xFFFFFFFF  # 8 hex digits
+
+
+def record_bytes(filename, layout=DEFAULT_LAYOUT):
+    # Bytes per trace request, or None when lines vary in length
+    if is_binary_trace(filename):
+        return TRACE_DTYPE.itemsize
+    return TEXT_LINE_BYTES if layout.total_bits <= 32 else None
+
+
+def can_shard(filename, mix, layout=DEFAULT_LAYOUT):
+    return record_bytes(filename, layout) is not None and not needs_whole_stream(mix)
+
+
+def shard_max_address(shard):
+    # Largest address of pattern requests [start, end)
+    _, pattern, start, end, _, _, layout, _ = shard
+    source = get_generator(pattern, layout, start)
+    largest = 0
+    for position in range(start, end, CHUNK_REQUESTS):
+        addresses = source.next_batch(min(CHUNK_REQUESTS, end - position))
+        largest = max(largest, int(addresses.max()))
+    return largest
+
+
+def write_shard(shard):
+    # Writes pattern requests [start, end) at their offset; returns the
+    # shard's manifest counts
+    filename, pattern, start, end, mix, seed, layout, offset = shard
+    source = get_generator(pattern, layout, start)
+    builder = ManifestBuilder(None, None, layout, is_binary_trace(filename))
+    fd = os.open(filename, os.O_WRONLY)
+    try:
+        for position in range(start, end, CHUNK_REQUESTS):
+            addresses, is_write = apply_mix(source.next_batch(min(CHUNK_REQUESTS, end - position)), mix, seed,
+                                            position)
+            data = encode_requests(addresses, is_write, builder.binary)
+            written = 0
+            while written < len(data):
+                written += os.pwrite(fd, data[written:], offset + written)
+            offset += len(data)
+            # The parent hashes the file in order; only the counts are kept here
+            builder.update(addresses, is_write, b"")
+            builder.bytes += len(data)
+    finally:
+        os.close(fd)
+    return builder.counts()
+
+
+def preallocate(filename, size):
+    fd = os.open(filename, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        try:
+            os.posix_fallocate(fd, 0, size)
+        except (AttributeError, OSError):
+            os.ftruncate(fd, size)  # sparse, e.g. on file systems without fallocate
+    finally:
+        os.close(fd)
+
+
+def hash_range(builder, fd, start, end):
+    # pread, not a buffered file: its read-ahead could hold bytes of a shard
+    # from before the shard was written
+    while start < end:
+        block = os.pread(fd, min(HASH_BLOCK, end - start), start)
+        builder.hash.update(block)
+        start += len(block)
+
+
+def create_trace_sharded(filename, pattern, num_requests, mix, generator, params, seed=None,
+                         layout=DEFAULT_LAYOUT, workers=None, shard_requests=SHARD_REQUESTS):
+    # Same file and manifest as opmix.create_pattern_trace, written by
+    # `workers` processes; mixes and formats that cannot be sliced are
+    # generated in one pass instead
+    if not can_shard(filename, mix, layout):
+        return create_pattern_trace(filename, pattern, num_requests, mix, generator, params, seed, layout)
+
+    line_bytes = record_bytes(filename, layout) * trace_requests(1, mix)
+    shards = [(filename, pattern, start, min(start + shard_requests, num_requests), mix, seed, layout,
+               start * line_bytes) for start in range(0, num_requests, shard_requests)]
+    builder = ManifestBuilder(generator, dict(params, pattern=pattern, requests=num_requests, mix=mix, seed=seed),
+                              layout, is_binary_trace(filename))
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # Within one period every field is in range, so addresses fit in
+        # layout.total_bits; beyond it text lines may grow past 13 bytes
+        if not builder.binary and num_requests > get_generator(pattern, layout).period():
+            if max(pool.map(shard_max_address, shards)) > MAX_FIXED_WIDTH_ADDRESS:
+                return create_pattern_trace(filename, pattern, num_requests, mix, generator, params, seed, layout)
+
+        preallocate(filename, num_requests * line_bytes)
+        fd = os.open(filename, os.O_RDONLY)
+        try:
+            # Shards finish roughly in order; each is hashed once all before it are
+            for shard, counts in zip(shards, pool.map(write_shard, shards)):
+                builder.merge(counts)
+                hash_range(builder, fd, shard[-1], shard[-1] + counts["bytes"])
+        finally:
+            os.close(fd)
+    builder.save(filename)
+    return filename
+
+
+def create_trace_mixed_sharded(size, num_requests, pattern, mix, seed=None, binary=False, directory=".",
+                               workers=None):
+    # The file opmix.create_trace_mixed would write
+    return create_trace_sharded(mixed_trace_name(size, pattern, mix, binary, directory), pattern, num_requests,
+                                mix, "opmix.create_trace_mixed", {"size": size}, seed, workers=workers)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate one large trace with several processes")
+    parser.add_argument("pattern", choices=sorted(GENERATORS))
+    parser.add_argument("size", type=int, help="trace size in bytes, used for the file name")
+    parser.add_argument("--requests", type=int, help="addresses to generate (default: size * 0.5)")
+    parser.add_argument("--mix", default="W", help="op mix, see opmix.py (raw=D > 0 is not sharded)")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--binary", action="store_true", help="write a .btrace instead of text")
+    parser.add_argument("--workers", type=int, help="default: CPU count")
+    parser.add_argument("--shard-requests", type=int, default=SHARD_REQUESTS, help="requests per shard")
+    parser.add_argument("--directory", default=".")
+    args = parser.parse_args()
+
+    requests = args.requests if args.requests is not None else int(args.size * 0.5)
+    filename = create_trace_sharded(mixed_trace_name(args.size, args.pattern, args.mix, args.binary, args.directory),
+                                    args.pattern, requests, args.mix, "opmix.create_trace_mixed",
+                                    {"size": args.size}, args.seed, workers=args.workers,
+                                    shard_requests=args.shard_requests)
+    print(f"Wrote {filename} ({os.path.getsize(filename)} bytes).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+import argparse
+import json
+
+import numpy as np
+
+from address_layout import DEFAULT_LAYOUT
+from locality import analyze_trace
+from manifest import layout_description, load_manifest
+from ramulator_config import read_config
+from results_store import DEFAULT_STORE, load_records
+from sweep import BASE_CONFIG, RAMULATOR, Job, run_sweep
+
+# DDR4 timings in DRAM clock cycles, after Ramulator's DDR4 speed table (x8 parts)
+DDR4_TIMINGS = {
+    "DDR4_1600K": {"nBL": 4, "nCL": 11, "nRCD": 11, "nRP": 11, "nCCDS": 4, "nCCDL": 5,
+                   "nRRDS": 4, "nRRDL": 5, "nWTRS": 2, "nWTRL": 6},
+    "DDR4_2400R": {"nBL": 4, "nCL": 16, "nRCD": 16, "nRP": 16, "nCCDS": 4, "nCCDL": 6,
+                   "nRRDS": 4, "nRRDL": 6, "nWTRS": 3, "nWTRL": 9},
+}
+DEFAULT_SPEED = "DDR4_2400R"
+
+CYCLE_FEATURES = ["constant", "column_cycles", "activate_cycles", "rrd_cycles", "turnaround_cycles"]
+LATENCY_FEATURES = ["constant", "cas_cycles", "read_miss_cycles", "read_conflict_cycles", "turnaround_per_read"]
+
+# Stats keys the surrogate estimates, named as in DDR4.stats
+CYCLES_KEY = "ramulator.dram_cycles"
+LATENCY_KEY = "ramulator.read_latency_avg_0"
+
+# Relative margin outside the calibrated feature range before a point is flagged
+# as needing a Ramulator run
+EXTRAPOLATION_MARGIN = 0.25
+
+# The reported error is measured on points left out of the fit, k-fold
+DEFAULT_FOLDS = 5
+
+
+def timings_from_config(config_file=None, speed=None):
+    if speed is None and config_file is not None:
+        speed = read_config(config_file).get("speed")
+    return dict(DDR4_TIMINGS.get(speed or DEFAULT_SPEED, DDR4_TIMINGS[DEFAULT_SPEED]))
+
+
+def cycle_features(locality, timings):
+    requests = locality["requests"]
+    switches = locality["bank_group_switches"]
+    same_group = max(requests - 1 - switches, 0)
+    misses = locality["row_misses_channel_0_core"]
+    conflicts = locality["row_conflicts_channel_0_core"]
+    blp = max(locality["bank_level_parallelism"], 1.0)
+
+    # Column commands are spaced by tCCD_L inside a bank group and tCCD_S across
+    # groups; activations overlap across the banks that are busy at the same time
+    column = same_group * timings["nCCDL"] + switches * timings["nCCDS"]
+    activate = (misses * timings["nRCD"] + conflicts * (timings["nRP"] + timings["nRCD"])) / blp
+    rrd = (misses + conflicts) * timings["nRRDS"]
+    turnaround = locality.get("write_to_read_turnarounds", 0) * timings["nWTRL"]
+    return [1.0, column, activate, rrd, turnaround]
+
+
+def latency_features(locality, timings):
+    reads = max(locality["read_requests"], 1)
+    miss_rate = locality["read_row_misses_channel_0_core"] / reads
+    conflict_rate = locality["read_row_conflicts_channel_0_core"] / reads
+    turnarounds = locality.get("write_to_read_turnarounds", 0) / reads
+    return [1.0, timings["nCL"], miss_rate * timings["nRCD"],
+            conflict_rate * (timings["nRP"] + timings["nRCD"]), turnarounds * timings["nWTRL"]]
+
+
+def relative_errors(predicted, actual):
+    actual = np.asarray(actual, dtype=float)
+    return np.abs(np.asarray(predicted) - actual) / np.maximum(np.abs(actual), 1e-12)
+
+
+def held_out_predictions(X, y, folds):
+    # Prediction of every point by a fit on the other folds (point i is in
+    # fold i % folds), so the errors are not flattered by fitting the point
+    predicted = np.empty(len(y))
+    fold = np.arange(len(y)) % folds
+    for k in range(folds):
+        train = fold != k
+        coef = np.linalg.lstsq(X[train], y[train], rcond=None)[0]
+        predicted[~train] = X[~train] @ coef
+    return predicted
+
+
+def fold_count(points, folds=DEFAULT_FOLDS):
+    # 0 when there are too few points to leave any out
+    return min(folds, points) if points > 1 else 0
+
+
+class Surrogate:
+    def __init__(self, timings, cycle_coef=None, latency_coef=None, feature_min=None, feature_max=None, errors=None,
+                 folds=0):
+        self.timings = timings
+        # Uncalibrated, the estimate is the plain sum of the analytical terms
+        self.cycle_coef = np.asarray(cycle_coef if cycle_coef is not None else [timings["nRCD"] + timings["nCL"], 1, 1, 0, 1], dtype=float)
+        self.latency_coef = np.asarray(latency_coef if latency_coef is not None else [0, 1, 1, 1, 1], dtype=float)
+        self.feature_min = None if feature_min is None else np.asarray(feature_min, dtype=float)
+        self.feature_max = None if feature_max is None else np.asarray(feature_max, dtype=float)
+        # Relative errors on held-out points, and the folds they come from
+        # (0: too few points, in-sample errors)
+        self.errors = errors or {}
+        self.folds = folds
+
+    def fit(self, localities, dram_cycles, read_latencies=None, folds=DEFAULT_FOLDS):
+        X = np.array([cycle_features(loc, self.timings) for loc in localities])
+        y = np.asarray(dram_cycles, dtype=float)
+        self.cycle_coef = np.linalg.lstsq(X, y, rcond=None)[0]
+        self.feature_min = X.min(axis=0)
+        self.feature_max = X.max(axis=0)
+        self.folds = fold_count(len(y), folds)
+        predicted = held_out_predictions(X, y, self.folds) if self.folds else X @ self.cycle_coef
+        cycle_errors = relative_errors(predicted, y)
+        self.errors = {"dram_cycles_mean": float(cycle_errors.mean()),
+                       "dram_cycles_max": float(cycle_errors.max())}
+
+        if read_latencies is not None:
+            valid = np.array([loc["read_requests"] > 0 and lat is not None
+                              for loc, lat in zip(localities, read_latencies)])
+            if valid.any():
+                L = np.array([latency_features(loc, self.timings)
+                              for loc, ok in zip(localities, valid) if ok])
+                lat = np.array([lat for lat, ok in zip(read_latencies, valid) if ok], dtype=float)
+                self.latency_coef = np.linalg.lstsq(L, lat, rcond=None)[0]
+                latency_folds = fold_count(len(lat), folds)
+                predicted = held_out_predictions(L, lat, latency_folds) if latency_folds else L @ self.latency_coef
+                latency_errors = relative_errors(predicted, lat)
+                self.errors["read_latency_mean"] = float(latency_errors.mean())
+                self.errors["read_latency_max"] = float(latency_errors.max())
+        return self
+
+    def predict_many(self, localities):
+        # Vectorized over points: one matrix product per estimated quantity
+        X = np.array([cycle_features(loc, self.timings) for loc in localities])
+        L = np.array([latency_features(loc, self.timings) for loc in localities])
+        cycles = np.maximum(X @ self.cycle_coef, 1.0)
+        requests = np.array([loc["requests"] for loc in localities], dtype=float)
+        # Each request holds the data bus for one burst of nBL cycles
+        utilization = np.minimum(requests * self.timings["nBL"] / cycles, 1.0)
+        return {
+            CYCLES_KEY: cycles,
+            LATENCY_KEY: L @ self.latency_coef,
+            "bandwidth_utilization": utilization,
+            "needs_simulation": self.needs_simulation(X),
+        }
+
+    def predict(self, locality):
+        return {key: values[0].item() for key, values in self.predict_many([locality]).items()}
+
+    def needs_simulation(self, X):
+        # Points outside the calibrated range are not trusted to the surrogate;
+        # predict --simulate runs Ramulator on them (simulate_flagged)
+        if self.feature_min is None:
+            return np.ones(len(X), dtype=bool)
+        span = self.feature_max - self.feature_min
+        low = self.feature_min - EXTRAPOLATION_MARGIN * span
+        high = self.feature_max + EXTRAPOLATION_MARGIN * span
+        return ((X < low) | (X > high)).any(axis=1)
+
+    def to_dict(self):
+        return {
+            "timings": self.timings,
+            "cycle_coef": self.cycle_coef.tolist(),
+            "latency_coef": self.latency_coef.tolist(),
+            "feature_min": None if self.feature_min is None else self.feature_min.tolist(),
+            "feature_max": None if self.feature_max is None else self.feature_max.tolist(),
+            "errors": self.errors,
+            "folds": self.folds,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["timings"], data["cycle_coef"], data["latency_coef"],
+                   data["feature_min"], data["feature_max"], data["errors"], data.get("folds", 0))
+
+
+def fit_from_store(store=DEFAULT_STORE, timings=None):
+    # Calibration points are the sweep records that carry both trace locality and Ramulator stats
+    records = [r for r in load_records(store)
+               if r.get("locality") and r.get("stats", {}).get(CYCLES_KEY) is not None]
+    if not records:
+        raise ValueError(f"No calibration records with locality and {CYCLES_KEY} in {store}")
+    model = Surrogate(timings or timings_from_config())
+    model.fit([r["locality"] for r in records],
+              [r["stats"][CYCLES_KEY] for r in records],
+              [r["stats"].get(LATENCY_KEY) for r in records])
+    return model, records
+
+
+def simulation_job(filename):
+    # The sweep job that regenerates a trace, from its manifest; None for
+    # traces opmix.create_trace_mixed did not write
+    manifest = load_manifest(filename)
+    if (manifest is None or manifest.get("generator") != "opmix.create_trace_mixed"
+            or manifest.get("layout") != layout_description(DEFAULT_LAYOUT)):
+        return None
+    params = manifest["params"]
+    return Job(params["pattern"], params["size"], params["requests"], params["mix"], seed=params.get("seed"))
+
+
+def simulate_flagged(filenames, needs_simulation, workers=None, store=DEFAULT_STORE, **run_options):
+    # Runs the flagged traces through sweep.run_sweep; returns {filename:
+    # Ramulator stats}. The records go to the store, so the next fit
+    # calibrates on them too.
+    names = {}
+    jobs = {}
+    for filename, flagged in zip(filenames, needs_simulation):
+        job = simulation_job(filename) if flagged else None
+        if job is not None:
+            names.setdefault(job.name, []).append(filename)
+            jobs[job.name] = job
+    simulated = {}
+    if jobs:
+        for record in run_sweep(list(jobs.values()), workers, store, **run_options):
+            job = Job(record["scenario"], record["size"], record["requests"], record["mix"], seed=record.get("seed"))
+            if record["stats"].get(CYCLES_KEY) is not None:
+                for filename in names[job.name]:
+                    simulated[filename] = record["stats"]
+    return simulated
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analytical DRAM timing surrogate calibrated on Ramulator runs")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    fit_parser = subparsers.add_parser("fit", help="fit the surrogate on stored sweep results")
+    fit_parser.add_argument("--store", default=DEFAULT_STORE)
+    fit_parser.add_argument("--config", help="Ramulator config to take the speed grade from")
+    fit_parser.add_argument("--model", default="surrogate.json")
+
+    predict_parser = subparsers.add_parser("predict", help="estimate stats for traces")
+    predict_parser.add_argument("traces", nargs="+")
+    predict_parser.add_argument("--model", default="surrogate.json")
+    predict_parser.add_argument("--simulate", action="store_true",
+                                help="run Ramulator on the traces outside the calibration and report its stats")
+    predict_parser.add_argument("--workers", type=int)
+    predict_parser.add_argument("--ramulator", default=RAMULATOR)
+    predict_parser.add_argument("--config", default=BASE_CONFIG)
+    predict_parser.add_argument("--store", default=DEFAULT_STORE, help="where --simulate records its runs")
+
+    args = parser.parse_args()
+
+    if args.command == "fit":
+        model, records = fit_from_store(args.store, timings_from_config(args.config))
+        with open(args.model, 'w') as f:
+            json.dump(model.to_dict(), f, indent=2)
+        print(f"Fitted surrogate on {len(records)} Ramulator runs, saved to {args.model}.")
+        print(f"Errors on held-out points ({model.folds}-fold):" if model.folds
+              else "Errors on the fitted points (too few to hold any out):")
+        for key, value in model.errors.items():
+            print(f"    {key:25s} {value:.2%}")
+        return
+
+    with open(args.model, 'r') as f:
+        model = Surrogate.from_dict(json.load(f))
+    localities = [analyze_trace(filename) for filename in args.traces]
+    predictions = model.predict_many(localities)
+    simulated = {}
+    if args.simulate:
+        simulated = simulate_flagged(args.traces, predictions["needs_simulation"], args.workers, args.store,
+                                     ramulator=args.ramulator, base_config=args.config)
+    for i, filename in enumerate(args.traces):
+        cycles = predictions[CYCLES_KEY][i]
+        latency = predictions[LATENCY_KEY][i]
+        utilization = predictions["bandwidth_utilization"][i]
+        source = ""
+        if filename in simulated:
+            stats = simulated[filename]
+            cycles = stats[CYCLES_KEY]
+            latency = stats.get(LATENCY_KEY, float("nan"))
+            utilization = min(localities[i]["requests"] * model.timings["nBL"] / max(cycles, 1.0), 1.0)
+            source = " (simulated)"
+        elif predictions["needs_simulation"][i]:
+            source = " (outside calibration, run Ramulator)"
+            if args.simulate and simulation_job(filename) is None:
+                source = " (outside calibration; no manifest to regenerate it from, not simulated)"
+            elif args.simulate:
+                source = " (outside calibration; the Ramulator run failed)"
+        print(f"{filename}: dram_cycles={cycles:.0f} read_latency_avg={latency:.1f} "
+              f"bandwidth_utilization={utilization:.2%}{source}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+import os
+import shutil
+import subprocess
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from injection import clock_ratio, create_trace_loaded
+from locality import analyze_trace
+from opmix import create_trace_mixed, is_randomized, mix_label
+from ramulator_config import write_config
+from ramulator_stats import parse_stats_file
+from resources import Admission, cpu_limit, format_bytes, memory_model, run_measured
+from results_store import DEFAULT_STORE, append_record, load_records
+from telemetry import SweepTelemetry
+from trace_cache import cached_trace_mixed
+from wall_time import CostModel, format_duration, makespan
+
+# Same simulator and config as run_ramulator() in tr.py
+RAMULATOR = "./ramulator"
+BASE_CONFIG = "../configs/DDR4-config.cfg"
+RUN_ROOT = "runs"
+STATS_FILE = "DDR4.stats"
+ADMISSION_POLL = 1.0  # seconds
+
+DEFAULT_SIZES = [256, 512, 1024, 2048, 4096, 8192, 16384, 32768, 65536, 131072, 262144]
+DEFAULT_SCENARIOS = ['columns', 'rows', 'banks']
+
+
+class Job:
+    __slots__ = ("scenario", "size", "requests", "mix", "params", "seed", "rate")
+
+    def __init__(self, scenario, size, requests=None, mix="W", params=None, seed=None, rate=None):
+        self.scenario = scenario
+        self.size = size
+        # Same request count as the scripts' num_writes = int(size * 0.5)
+        self.requests = requests if requests is not None else int(size * 0.5)
+        self.mix = mix
+        self.params = dict(params or {})  # config overrides, e.g. {"speed": "DDR4_1600K"}
+        self.seed = seed
+        # Offered load as a fraction of peak bandwidth; set for --mode=cpu load runs
+        self.rate = rate
+
+    @property
+    def name(self):
+        # Unique per job; used for the sandbox directory
+        parts = [self.scenario, f"{self.size:g}", f"{self.requests}", mix_label(self.mix)]
+        # Values that are file paths (e.g. a mapping file) contribute their base name
+        parts += [f"{key}-{os.path.basename(str(value))}" for key, value in sorted(self.params.items())]
+        if self.seed is not None:
+            parts.append(f"seed{self.seed}")
+        if self.rate is not None:
+            parts.append(f"load{self.rate:g}")
+        return "_".join(str(part) for part in parts)
+
+    def trace_key(self):
+        # Jobs with equal keys simulate identical traces under identical configs
+        seed = self.seed if is_randomized(self.mix) else None
+        return (self.scenario, self.requests, self.mix, seed, tuple(sorted(self.params.items())), self.rate)
+
+    def record(self):
+        # Fields identifying the job in the results store
+        record = {"scenario": self.scenario, "size": self.size, "requests": self.requests,
+                  "mix": self.mix, "params": self.params}
+        if self.seed is not None:
+            record["seed"] = self.seed
+        if self.rate is not None:
+            record["rate"] = self.rate
+        return record
+
+
+def run_job(job, ramulator=RAMULATOR, base_config=BASE_CONFIG, run_root=RUN_ROOT, trace_cache=None):
+    # Every job runs in its own sandbox directory so concurrent Ramulator runs
+    # don't overwrite each other's traces, configs and DDR4.stats
+    ramulator = os.path.abspath(ramulator)
+    sandbox = os.path.abspath(os.path.join(run_root, job.name))
+    if os.path.isdir(sandbox):
+        shutil.rmtree(sandbox)
+    os.makedirs(sandbox)
+
+    start = time.time()
+    config = write_config(base_config, job.params, os.path.join(sandbox, "config.cfg"))
+    if job.rate is None and trace_cache is not None:
+        # Linked from the shared cache (trace_cache.py) instead of regenerated
+        filename = cached_trace_mixed(trace_cache, job.size, job.requests, job.scenario, job.mix, job.seed,
+                                      directory=sandbox)
+        mode = "dram"
+    elif job.rate is None:
+        filename = create_trace_mixed(job.size, job.requests, job.scenario, job.mix, job.seed, directory=sandbox)
+        mode = "dram"
+    else:
+        filename = create_trace_loaded(job.size, job.requests, job.scenario, job.rate, clock_ratio(config),
+                                       directory=sandbox)
+        mode = "cpu"
+    generate_elapsed = time.time() - start
+
+    command = [ramulator, config, f"--mode={mode}", filename]
+    peak_rss = None
+    try:
+        peak_rss = run_measured(command, sandbox)
+    except (subprocess.CalledProcessError, OSError) as e:
+        print(f"An error occurred while running Ramulator for {job.name}: {e}")
+
+    record = job.record()
+    record.update({
+        "trace": filename,
+        "stats": parse_stats_file(os.path.join(sandbox, STATS_FILE)),
+        # The locality model assumes back-to-back issue, i.e. --mode=dram
+        "locality": analyze_trace(filename) if job.rate is None else None,
+        "elapsed": time.time() - start,
+        "generate_elapsed": generate_elapsed,
+        "trace_bytes": os.path.getsize(filename),
+        "peak_rss": peak_rss,
+    })
+    return record
+
+
+def run_sweep(jobs, workers=None, store=DEFAULT_STORE, on_record=None, metrics_file=None, memory_budget=None,
+              **run_options):
+    # Jobs run in a process pool, longest predicted first (wall_time.py); only
+    # `workers` jobs are in flight, so the order of the rest is revised with
+    # every timing that comes in. A job starts only while its predicted peak
+    # RSS fits next to the running ones and memory is not under pressure
+    # (resources.py); workers default to the CPUs the cgroup allows. Records
+    # are written by this process only, in completion order, so the store
+    # never sees interleaved lines. on_record is called with every completed
+    # record (e.g. LiveDashboard.publish) and must return quickly. Progress
+    # goes to a status line (telemetry.py) and, with metrics_file, to a
+    # Prometheus textfile. A job whose run raises is reported and left out
+    # of the records; the rest of the sweep carries on.
+    workers = workers or cpu_limit()
+    history = load_records(store or DEFAULT_STORE)
+    model = CostModel(history)
+    admission = Admission(memory_model(history), memory_budget)
+    pending = model.order(list(jobs))
+    budget = f" within {format_bytes(admission.budget)}" if admission.budget is not None else ""
+    print(f"Running {len(pending)} jobs on {workers} workers{budget}; estimated "
+          f"{format_duration(makespan([model.predict(job) for job in pending], workers))}.")
+
+    telemetry = SweepTelemetry(len(pending), workers, textfile=metrics_file)
+    records = []
+    running = {}
+    throttled = False
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        while pending or running:
+            while len(running) < workers:
+                index = admission.choose(pending)
+                if index is None:
+                    break
+                job = pending.pop(index)
+                admission.admit(job)
+                running[pool.submit(run_job, job, **run_options)] = (job, time.time())
+                telemetry.job_started(job)
+            if admission.throttled != throttled:
+                throttled = admission.throttled
+                telemetry.write("Memory pressure; holding back new jobs." if throttled else "Memory pressure eased.")
+            # Jobs held back are reconsidered at least once a second
+            done, _ = wait(running, timeout=ADMISSION_POLL if pending else None, return_when=FIRST_COMPLETED)
+            if not done:
+                continue
+            finished = []
+            for future in done:
+                job, _ = running.pop(future)
+                try:
+                    record = future.result()
+                except Exception as e:
+                    admission.release(job)
+                    telemetry.job_failed(job, e)
+                    continue
+                finished.append(job)
+                if store:
+                    append_record(record, store)
+                records.append(record)
+                if on_record is not None:
+                    on_record(record)
+                model.observe(job, record["elapsed"])
+                admission.release(job, record.get("peak_rss"))
+                telemetry.job_finished(job, record)
+
+            model.order(pending)
+            now = time.time()
+            busy = [max(model.predict(job) - (now - started), 0.0) for job, started in running.values()]
+            telemetry.report(makespan([model.predict(job) for job in pending], workers, busy), finished)
+    telemetry.close()
+    return records
@@ -0,0 +1,83 @@
+# Metrics reported by the sweep, shared by tr.py and the plotting stage.
+# Each metric maps to the DDR4.stats line it is read from; the derived ones
+# are computed from several lines in derive_metrics().
+METRICS = {
+    "average_serving_requests": "ramulator.average_serving_requests_0",
+    "ramulator.serving_requests_0": "ramulator.serving_requests_0",
+    "dram_cycles": "ramulator.dram_cycles",
+    "row_misses": "ramulator.row_misses_channel_0_core",
+    "ramulator.read_row_conflicts_channel_0_core": "ramulator.read_row_conflicts_channel_0_core",
+    "ramulator.write_row_conflicts_channel_0_core": "ramulator.write_row_conflicts_channel_0_core",
+    "read_latency_avg": "ramulator.read_latency_avg_0",
+    "in_queue_req_num_avg": "ramulator.in_queue_req_num_avg",
+    "in_queue_read_req_num_avg": "ramulator.in_queue_read_req_num_avg",
+    "in_queue_write_req_num_avg": "ramulator.in_queue_write_req_num_avg",
+    "write_row_hits": "ramulator.write_row_hits_channel_0_core",
+    "write_row_misses": "ramulator.write_row_misses_channel_0_core",
+    "write_row_conflicts": "ramulator.write_row_conflicts_channel_0_core",
+    "ramulator.req_queue_length_sum_0": "ramulator.req_queue_length_sum_0",
+    "ramulator.in_queue_req_num_sum": "ramulator.in_queue_req_num_sum",
+    "incoming_requests_per_channel": "ramulator.incoming_requests_per_channel",
+    "active_cycles_0": "ramulator.active_cycles_0",
+    "incoming_requests_per_channel / ramulator.active_cycles_0": "ramulator.active_cycles_0",
+    "maximum_bandwidth": "ramulator.maximum_bandwidth",
+    "write_transaction_bytes_0": "ramulator.write_transaction_bytes_0",
+    "read_transaction_bytes_0": "ramulator.read_transaction_bytes_0",
+    "transaction_bytes_to_bandwidth_ratio": "ramulator.read_transaction_bytes_0",
+    "cycles/active cyles": "ramulator.dram_cycles",
+    "dram_capacity": "ramulator.dram_capacity",
+    "dram_cycles / ramulator.dram_capacity": "ramulator.dram_capacity",
+}
+
+TITLES = {
+    "average_serving_requests": ("Average Serving Requests per Memory Cycle", "DDR4 - Average Serving Requests"),
+    "ramulator.serving_requests_0": ("Total Serving Requests per Memory Cycle", "DDR4 - Total Serving Requests"),
+    "dram_cycles": ("Number of Cycles", "DDR4 - Number of Cycles"),
+    "row_misses": ("Number of Row Misses", "DDR4 - Row Misses"),
+    "ramulator.read_row_conflicts_channel_0_core": ("Read Row Conflicts", "DDR4 - Read Row Conflicts"),
+    "ramulator.write_row_conflicts_channel_0_core": ("Write Row Conflicts", "DDR4 - Write Row Conflicts"),
+    "read_latency_avg": ("Average Read Latency (Cycles)", "DDR4 - Average Read Latency"),
+    "in_queue_req_num_avg": ("Average In-Queue Requests", "DDR4 - Average In-Queue Requests"),
+    "in_queue_read_req_num_avg": ("Average In-Queue Read Requests", "DDR4 - Average In-Queue Read Requests"),
+    "in_queue_write_req_num_avg": ("Average In-Queue Write Requests", "DDR4 - Average In-Queue Write Requests"),
+    "write_row_hits": ("Write Row Hits", "DDR4 - Write Row Hits"),
+    "write_row_misses": ("Write Row Misses", "DDR4 - Write Row Misses"),
+    "write_row_conflicts": ("Write Row Conflicts", "DDR4 - Write Row Conflicts"),
+    "ramulator.req_queue_length_sum_0": ("Request Queue Length", "DDR4 - Request Queue Length"),
+    "ramulator.in_queue_req_num_sum": ("Total In-Queue Requests", "DDR4 - Total In-Queue Requests"),
+    "incoming_requests_per_channel": ("Incoming Requests per Channel", "DDR4 - Incoming Requests per Channel"),
+    "active_cycles_0": ("Active Cycles", "DDR4 - Active Cycles"),
+    "incoming_requests_per_channel / ramulator.active_cycles_0": ("Number of requests per active cycle", "DDR4 - Requests per active cycle"),
+    "maximum_bandwidth": ("Maximum Bandwidth (Bytes)", "DDR4 - Maximum Bandwidth"),
+    "write_transaction_bytes_0": ("Write Transaction Bytes", "DDR4 - Write Transaction Bytes"),
+    "read_transaction_bytes_0": ("Read Transaction Bytes", "DDR4 - Read Transaction Bytes"),
+    "transaction_bytes_to_bandwidth_ratio": ("Transaction Bytes to Bandwidth Ratio", "DDR4 - Transaction Bytes to Bandwidth Ratio"),
+    "cycles/active cyles": ("Cycles to Active Cycles", "DDR4 - Cycles to Active Cycles"),
+    "dram_capacity": ("dram_capacity", "DDR4 - dram_capacity"),
+    "dram_cycles / ramulator.dram_capacity": ("DRAM cycles per byte", "DRAM cycles per byte"),
+}
+
+
+def ratio(numerator, denominator):
+    # 0 when the denominator is missing or zero, like the original sweep
+    if not denominator or numerator is None:
+        return 0
+    return numerator / denominator
+
+
+def derive_metrics(stats, size):
+    # Value of every metric in METRICS for one run; stats is a parsed DDR4.stats
+    values = {key: stats.get(line) for key, line in METRICS.items()}
+
+    values["incoming_requests_per_channel / ramulator.active_cycles_0"] = ratio(
+        stats.get("ramulator.incoming_requests_per_channel"), stats.get("ramulator.active_cycles_0"))
+
+    read_bytes = stats.get("ramulator.read_transaction_bytes_0")
+    write_bytes = stats.get("ramulator.write_transaction_bytes_0")
+    total_bytes = None if read_bytes is None or write_bytes is None else read_bytes + write_bytes
+    values["transaction_bytes_to_bandwidth_ratio"] = ratio(total_bytes, stats.get("ramulator.maximum_bandwidth"))
+
+    values["cycles/active cyles"] = ratio(stats.get("ramulator.dram_cycles"), stats.get("ramulator.active_cycles_0"))
+    # Cycles per byte of trace, i.e. divided by the trace size
+    values["dram_cycles / ramulator.dram_capacity"] = ratio(stats.get("ramulator.dram_cycles"), size)
+    return values
@@ -0,0 +1,300 @@
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import time
+import tomllib
+from concurrent.futures import ProcessPoolExecutor
+
+from config_grid import expand_grid
+from manifest import load_manifest
+from opmix import create_trace_mixed, mixed_trace_name
+from ramulator_config import write_config
+from ramulator_stats import parse_stats_file
+from report_plots import figure_hash, figure_name, render_figure
+from results_store import DEFAULT_STORE, append_record
+from sweep import BASE_CONFIG, DEFAULT_SCENARIOS, DEFAULT_SIZES, RAMULATOR, STATS_FILE, Job
+from sweep_metrics import METRICS, derive_metrics
+from trace_cache import link_into
+
+# Declarative sweeps. A TOML spec (see sweep.toml) lists the patterns, sizes,
+# op mixes, config grid and figures; it is compiled into a DAG of
+#   generate -> simulate -> parse -> derive -> plot
+# nodes. Nodes are identified by what they compute, so a trace shared by
+# several configs is generated once and one simulation feeds every metric and
+# figure. Every node records a digest of its inputs in the work directory's
+# state file and is only executed again when that digest changes.
+STAGES = ["generate", "simulate", "parse", "derive", "plot"]
+STATE_FILE = ".sweep_state.json"
+
+
+class Node:
+    __slots__ = ("kind", "name", "params", "inputs")
+
+    def __init__(self, kind, name, params, inputs=()):
+        self.kind = kind
+        self.name = name
+        self.params = params
+        self.inputs = list(inputs)
+
+    @property
+    def id(self):
+        return f"{self.kind}:{self.name}"
+
+
+def load_spec(path):
+    with open(path, 'rb') as f:
+        return tomllib.load(f)
+
+
+def compile_spec(spec):
+    # {node id: Node}, deduplicated by id
+    traces = spec.get("traces", {})
+    scenarios = traces.get("scenarios", DEFAULT_SCENARIOS)
+    sizes = traces.get("sizes", DEFAULT_SIZES)
+    mixes = traces.get("mixes", ["W"])
+    seeds = traces.get("seeds", [None])
+    requests_per_byte = traces.get("requests_per_byte", 0.5)
+    configs = expand_grid({key: [str(value) for value in values]
+                           for key, values in spec.get("configs", {}).items()})
+
+    nodes = {}
+
+    def add(node):
+        return nodes.setdefault(node.id, node)
+
+    series = {}
+    for scenario in scenarios:
+        for size in sizes:
+            for mix in mixes:
+                for seed in seeds:
+                    requests = int(size * requests_per_byte)
+                    trace = add(Node("generate", Job(scenario, size, requests, mix, None, seed).name,
+                                     {"scenario": scenario, "size": size, "requests": requests, "mix": mix,
+                                      "seed": seed}))
+                    for params in configs:
+                        job = Job(scenario, size, requests, mix, params, seed)
+                        point = dict(trace.params, params=params)
+                        simulate = add(Node("simulate", job.name, point, [trace.id]))
+                        parse = add(Node("parse", job.name, point, [simulate.id]))
+                        derive = add(Node("derive", job.name, point, [parse.id]))
+                        # One series per seed: a figure's points are keyed by scenario and size only
+                        variant = ",".join([mix] * (mix != "W") + [f"{k}={v}" for k, v in sorted(params.items())] +
+                                           [f"seed={seed}"] * (seed is not None))
+                        series.setdefault(variant, []).append(derive.id)
+
+    for plot in spec.get("plots", []):
+        metrics = plot.get("metrics", [plot["metric"]] if "metric" in plot else list(METRICS))
+        for variant, derives in series.items():
+            for metric in metrics:
+                if metric not in METRICS:
+                    raise ValueError(f"Unknown metric {metric!r} in plot")
+                name = figure_name(variant, metric)
+                add(Node("plot", name, {"variant": variant, "metric": metric}, derives))
+    return nodes
+
+
+def digest(value):
+    return hashlib.blake2b(json.dumps(value, sort_keys=True, default=str).encode(), digest_size=16).hexdigest()
+
+
+def file_digest(path):
+    hasher = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+
+class Dag:
+    def __init__(self, nodes, work_dir, settings):
+        self.nodes = nodes
+        self.work_dir = os.path.abspath(work_dir)
+        self.settings = settings
+        self.state_path = os.path.join(self.work_dir, STATE_FILE)
+        self.state = {}
+        self.elapsed = {}  # stage -> seconds spent in the last run
+        if os.path.exists(self.state_path):
+            with open(self.state_path, 'r') as f:
+                self.state = json.load(f)
+
+    def save_state(self):
+        with open(self.state_path + ".tmp", 'w') as f:
+            json.dump(self.state, f, sort_keys=True)
+        os.replace(self.state_path + ".tmp", self.state_path)
+
+    def path(self, *parts):
+        return os.path.join(self.work_dir, *parts)
+
+    def input_digest(self, node):
+        # What the node's result depends on: its own parameters, the outputs
+        # of its inputs and, for simulations, the simulator and base config
+        inputs = [self.state.get(i, {}).get("output") for i in node.inputs]
+        extra = None
+        if node.kind == "simulate":
+            extra = [file_stamp(self.settings["ramulator"]), file_stamp(self.settings["config"])]
+        return digest([node.kind, node.params, inputs, extra])
+
+    def outputs_exist(self, node):
+        if node.kind == "generate":
+            return os.path.exists(self.trace_path(node))
+        if node.kind == "simulate":
+            return os.path.exists(self.path("runs", node.name, STATS_FILE))
+        if node.kind == "plot":
+            return os.path.exists(self.path("plots", node.name))
+        return "value" in self.state.get(node.id, {})
+
+    def stale(self, node):
+        entry = self.state.get(node.id, {})
+        return entry.get("input") != self.input_digest(node) or not self.outputs_exist(node)
+
+    def trace_path(self, node):
+        p = node.params
+        job = Job(p["scenario"], p["size"], p["requests"], p["mix"], None, p["seed"])
+        return mixed_trace_name(p["size"], p["scenario"], p["mix"], directory=self.path("traces", job.name))
+
+    def run(self, workers=None, dry_run=False, force=False):
+        # Executes the stale nodes stage by stage; returns {stage: (run, up to date)}
+        summary = {}
+        for stage in STAGES:
+            nodes = [node for node in self.nodes.values() if node.kind == stage]
+            todo = [node for node in nodes if force or self.stale(node)]
+            summary[stage] = (len(todo), len(nodes) - len(todo))
+            if dry_run:
+                # Downstream digests are unknown until this stage runs, so
+                # everything after a stale node counts as stale
+                for node in todo:
+                    self.state.setdefault(node.id, {})["output"] = None
+                continue
+            start = time.time()
+            if todo:
+                getattr(self, "run_" + stage)(todo, workers)
+                self.save_state()
+            self.elapsed[stage] = time.time() - start
+        return summary
+
+    def finish(self, node, output, value=None):
+        entry = {"input": self.input_digest(node), "output": output}
+        if value is not None:
+            entry["value"] = value
+        self.state[node.id] = entry
+
+    def run_generate(self, nodes, workers):
+        jobs = []
+        for node in nodes:
+            p = node.params
+            directory = os.path.dirname(self.trace_path(node))
+            os.makedirs(directory, exist_ok=True)
+            jobs.append((p["size"], p["requests"], p["scenario"], p["mix"], p["seed"], directory))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(generate_trace, jobs))
+        for node in nodes:
+            self.finish(node, load_manifest(self.trace_path(node))["blake2b"])
+
+    def run_simulate(self, nodes, workers):
+        jobs = []
+        for node in nodes:
+            trace = self.trace_path(self.nodes[node.inputs[0]])
+            jobs.append((self.path("runs", node.name), trace, node.params["params"],
+                         os.path.abspath(self.settings["ramulator"]), self.settings["config"]))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for node, (stats_file, elapsed) in zip(nodes, pool.map(simulate_trace, jobs)):
+                print(f"Ran Ramulator for {node.name}.")
+                output = file_digest(stats_file) if os.path.exists(stats_file) else None
+                self.finish(node, output, {"elapsed": elapsed})
+
+    def run_parse(self, nodes, workers):
+        store = self.settings["store"]
+        for node in nodes:
+            stats = parse_stats_file(self.path("runs", node.name, STATS_FILE))
+            if store:
+                p = node.params
+                record = Job(p["scenario"], p["size"], p["requests"], p["mix"], p["params"], p["seed"]).record()
+                simulate = self.nodes[node.inputs[0]]
+                record.update({"trace": self.trace_path(self.nodes[simulate.inputs[0]]), "stats": stats,
+                               "elapsed": self.state[simulate.id]["value"]["elapsed"]})
+                append_record(record, store)
+            self.finish(node, digest(stats), stats)
+
+    def run_derive(self, nodes, workers):
+        for node in nodes:
+            stats = self.state[node.inputs[0]]["value"]
+            values = derive_metrics(stats, node.params["size"])
+            self.finish(node, digest(values), values)
+
+    def run_plot(self, nodes, workers):
+        os.makedirs(self.path("plots"), exist_ok=True)
+        for node in nodes:
+            metric = node.params["metric"]
+            by_scenario = {}
+            for derive_id in node.inputs:
+                value = self.state[derive_id]["value"].get(metric)
+                if value is not None:
+                    derive = self.nodes[derive_id]
+                    by_scenario.setdefault(derive.params["scenario"], {})[float(derive.params["size"])] = value
+            render_figure(self.path("plots", node.name), node.params["variant"], metric, by_scenario)
+            print(f"Rendered {self.path('plots', node.name)}.")
+            self.finish(node, figure_hash(node.params["variant"], metric, by_scenario))
+
+
+def file_stamp(path):
+    try:
+        status = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return [os.path.abspath(path), status.st_size, status.st_mtime]
+
+
+def generate_trace(job):
+    size, requests, scenario, mix, seed, directory = job
+    return create_trace_mixed(size, requests, scenario, mix, seed, directory=directory)
+
+
+def simulate_trace(job):
+    sandbox, trace, params, ramulator, base_config = job
+    os.makedirs(sandbox, exist_ok=True)
+    stats_file = os.path.join(sandbox, STATS_FILE)
+    if os.path.exists(stats_file):
+        os.remove(stats_file)
+    local_trace = os.path.join(sandbox, os.path.basename(trace))
+    link_into(trace, local_trace)
+    config = write_config(base_config, params, os.path.join(sandbox, "config.cfg"))
+    start = time.time()
+    try:
+        subprocess.run([ramulator, config, "--mode=dram", local_trace], check=True, cwd=sandbox,
+                       stdout=subprocess.DEVNULL)
+    except (subprocess.CalledProcessError, OSError) as e:
+        print(f"An error occurred while running Ramulator for {os.path.basename(sandbox)}: {e}")
+    return stats_file, time.time() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the sweep described by a TOML spec, re-running only what changed")
+    parser.add_argument("spec", help="TOML sweep specification, e.g. sweep.toml")
+    parser.add_argument("--work-dir", help="default: the spec's [sweep] work_dir, or sweep_<name>")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--dry-run", action="store_true", help="only report which nodes would run")
+    parser.add_argument("--force", action="store_true", help="run every node")
+    args = parser.parse_args()
+
+    spec = load_spec(args.spec)
+    sweep = spec.get("sweep", {})
+    settings = {
+        "ramulator": sweep.get("ramulator", RAMULATOR),
+        "config": sweep.get("config", BASE_CONFIG),
+        "store": sweep.get("store", DEFAULT_STORE),
+    }
+    work_dir = args.work_dir or sweep.get("work_dir") or f"sweep_{sweep.get('name', 'default')}"
+    os.makedirs(work_dir, exist_ok=True)
+
+    dag = Dag(compile_spec(spec), work_dir, settings)
+    summary = dag.run(args.workers or sweep.get("workers"), args.dry_run, args.force)
+    for stage in STAGES:
+        todo, fresh = summary[stage]
+        verb = "to run" if args.dry_run else "ran"
+        print(f"{stage:9s} {todo:5d} {verb}, {fresh:5d} up to date")
+
+
+if __name__ == "__main__":
+    main()
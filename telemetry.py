@@ -0,0 +1,148 @@
+import os
+import sys
+import time
+
+from opmix import trace_requests
+from wall_time import format_duration
+
+# Progress telemetry for sweeps. The executor reports every job it starts and
+# every record it receives; the telemetry keeps the running totals, prints a
+# compact status line and, optionally, writes the same numbers as a
+# Prometheus textfile-collector file for node_exporter to scrape. At most
+# `workers` jobs run at once, so every job is given the lowest free worker
+# slot while it runs; utilization is reported per slot.
+METRICS = [
+    # (name, type, help)
+    ("sweep_jobs_total", "gauge", "Jobs in the sweep"),
+    ("sweep_jobs_done", "gauge", "Jobs finished"),
+    ("sweep_jobs_in_flight", "gauge", "Jobs running"),
+    ("sweep_jobs_failed", "gauge", "Jobs whose run raised an error"),
+    ("sweep_requests_simulated_total", "counter", "Trace requests simulated"),
+    ("sweep_requests_per_second", "gauge", "Trace requests simulated per second of wall time"),
+    ("sweep_generated_bytes_total", "counter", "Trace bytes generated"),
+    ("sweep_generation_bytes_per_second", "gauge", "Trace bytes generated per second spent generating"),
+    ("sweep_worker_utilization", "gauge", "Fraction of the worker slot's time spent running jobs"),
+    ("sweep_eta_seconds", "gauge", "Estimated seconds until the sweep finishes"),
+    ("sweep_start_time_seconds", "gauge", "Unix time the sweep started"),
+]
+
+
+class SweepTelemetry:
+    def __init__(self, total, workers, name="sweep", textfile=None, stream=None):
+        self.total = total
+        self.workers = workers
+        self.name = name
+        self.textfile = textfile
+        self.stream = stream or sys.stdout
+        self.live = self.stream.isatty()
+        self.start_time = time.time()
+        self.started = {}  # job -> (worker slot, start time)
+        self.done = 0
+        self.failed = 0
+        self.requests = 0
+        self.generated_bytes = 0
+        self.generate_seconds = 0.0
+        self.busy_seconds = [0.0] * workers  # per worker slot
+        self.eta = None
+
+    def job_started(self, job):
+        taken = {slot for slot, _ in self.started.values()}
+        slot = min(set(range(len(self.busy_seconds) + 1)) - taken)
+        if slot == len(self.busy_seconds):
+            self.busy_seconds.append(0.0)  # more jobs in flight than workers
+        self.started[job] = (slot, time.time())
+
+    def job_ended(self, job):
+        started = self.started.pop(job, None)
+        if started is not None:
+            slot, since = started
+            self.busy_seconds[slot] += time.time() - since
+        self.done += 1
+
+    def job_failed(self, job, error):
+        self.job_ended(job)
+        self.failed += 1
+        self.write(f"Job {job.name} failed: {error!r}")
+
+    def job_finished(self, job, record):
+        self.job_ended(job)
+        self.requests += trace_requests(job.requests, job.mix)
+        self.generated_bytes += record.get("trace_bytes", 0)
+        self.generate_seconds += record.get("generate_elapsed", 0.0)
+
+    def values(self):
+        now = time.time()
+        wall = max(now - self.start_time, 1e-9)
+        # Jobs still running count as busy up to now
+        busy = list(self.busy_seconds)
+        for slot, since in self.started.values():
+            busy[slot] += now - since
+        return {
+            "sweep_jobs_total": self.total,
+            "sweep_jobs_done": self.done,
+            "sweep_jobs_in_flight": len(self.started),
+            "sweep_jobs_failed": self.failed,
+            "sweep_requests_simulated_total": self.requests,
+            "sweep_requests_per_second": self.requests / wall,
+            "sweep_generated_bytes_total": self.generated_bytes,
+            "sweep_generation_bytes_per_second": self.generated_bytes / self.generate_seconds
+            if self.generate_seconds else 0.0,
+            # {worker slot: utilization}
+            "sweep_worker_utilization": {slot: min(seconds / wall, 1.0) for slot, seconds in enumerate(busy)},
+            "sweep_eta_seconds": self.eta if self.eta is not None else float("nan"),
+            "sweep_start_time_seconds": self.start_time,
+        }
+
+    def status_line(self):
+        values = self.values()
+        utilization = values["sweep_worker_utilization"]
+        eta = format_duration(self.eta) if self.eta is not None else "?"
+        failed = f", {self.failed} failed" if self.failed else ""
+        return (f"[{self.done}/{self.total}] {len(self.started)} running{failed} | "
+                f"{values['sweep_requests_per_second']:.3g} req/s | "
+                f"gen {values['sweep_generation_bytes_per_second'] / 1e6:.1f} MB/s | "
+                f"util {sum(utilization.values()) / max(len(utilization), 1):.0%} | ETA {eta}")
+
+    def report(self, eta=None, finished=()):
+        # Called by the executor after every batch of completions
+        self.eta = eta
+        for job in finished:
+            self.write(f"Ran Ramulator for {job.name}.")
+        line = self.status_line()
+        if self.live:
+            # Rewritten in place; job lines scroll above it
+            self.stream.write("\r\033[K" + line)
+            self.stream.flush()
+        else:
+            self.write(line)
+        if self.textfile:
+            self.write_textfile()
+
+    def write(self, text):
+        if self.live:
+            self.stream.write("\r\033[K")
+        self.stream.write(text + "\n")
+
+    def close(self):
+        if self.live:
+            self.stream.write("\n")
+        if self.textfile:
+            self.write_textfile()
+
+    def write_textfile(self):
+        # node_exporter may read at any moment, so the file is replaced atomically
+        lines = []
+        values = self.values()
+        for name, kind, text in METRICS:
+            lines.append(f"# HELP {name} {text}")
+            lines.append(f"# TYPE {name} {kind}")
+            value = values[name]
+            if isinstance(value, dict):
+                for worker, worker_value in value.items():
+                    lines.append(f'{name}{{sweep="{self.name}",worker="{worker}"}} {worker_value}')
+            else:
+                lines.append(f'{name}{{sweep="{self.name}"}} {"NaN" if value != value else value}')
+        temporary = f"{self.textfile}.{os.getpid()}.tmp"
+        with open(temporary, 'w') as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(temporary, self.textfile)
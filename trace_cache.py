@@ -0,0 +1,173 @@
+import argparse
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+from address_layout import DEFAULT_LAYOUT
+from manifest import MANIFEST_SUFFIX, layout_description, manifest_path
+from opmix import create_pattern_trace, mixed_trace_name
+
+# Persistent cache of generated traces, shared by sweeps. An entry is keyed by
+# everything that determines the trace's bytes (generator, pattern, request
+# count, op mix, seed, format and address layout) and stored as
+# "<key><suffix>" with its manifest. Entries are built in a private temporary
+# directory and renamed in, so a reader never sees a partial trace; readers
+# get a hard link (or a reflink, or a copy across file systems), so concurrent
+# sandboxes share one trace without copying it. The least recently used
+# entries are evicted once the cache grows past its byte budget; a hit that
+# another sweep evicts before it is linked is built again. The budget bounds
+# the cache directory only: a trace still linked into a run sandbox (runs/,
+# where the records point to it) keeps its blocks on disk after eviction
+# until that sandbox is removed or rerun.
+CACHE_DIR = "trace_cache"
+DEFAULT_BUDGET = 4 << 30
+FICLONE = 0x40049409  # Linux ioctl: share the extents of another file
+
+
+def parse_bytes(value):
+    # "512M", "4G", "1048576"
+    units = {"K": 1 << 10, "M": 1 << 20, "G": 1 << 30, "T": 1 << 40}
+    value = str(value).strip().upper().rstrip("B")
+    if value and value[-1] in units:
+        return int(float(value[:-1]) * units[value[-1]])
+    return int(value)
+
+
+def link_into(source, destination):
+    if os.path.lexists(destination):
+        os.remove(destination)
+    try:
+        os.link(source, destination)
+        return
+    except OSError:
+        pass
+    try:
+        with open(source, 'rb') as src, open(destination, 'wb') as dst:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        return
+    except OSError:
+        pass
+    shutil.copyfile(source, destination)
+
+
+class TraceCache:
+    def __init__(self, directory=CACHE_DIR, budget=DEFAULT_BUDGET):
+        self.directory = os.path.abspath(directory)
+        self.budget = budget
+
+    def key(self, **params):
+        text = json.dumps(params, sort_keys=True, default=str)
+        return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
+    def entry(self, key, suffix):
+        return os.path.join(self.directory, key + suffix)
+
+    def fetch(self, key, destination, create):
+        # Links the cached trace for `key` to `destination`, calling
+        # create(path) to generate it at `path` on a miss
+        suffix = os.path.splitext(destination)[1]
+        path = self.entry(key, suffix)
+        os.makedirs(self.directory, exist_ok=True)
+        while True:
+            if not os.path.exists(path):
+                self.build(path, destination, create)
+            try:
+                os.utime(path)  # most recently used
+                link_into(path, destination)
+                if os.path.exists(manifest_path(path)):
+                    link_into(manifest_path(path), manifest_path(destination))
+                return destination
+            except FileNotFoundError:
+                if os.path.exists(path):
+                    raise  # not the entry, e.g. a missing destination directory
+                # Evicted by another sweep since the check; build it again
+
+    def build(self, path, destination, create):
+        staging = tempfile.mkdtemp(prefix=".build-", dir=self.directory)
+        try:
+            # Built under the destination's name, so its manifest names it
+            built = os.path.join(staging, os.path.basename(destination))
+            create(built)
+            # Manifest first: a trace that is in the cache always has one
+            if os.path.exists(manifest_path(built)):
+                os.replace(manifest_path(built), manifest_path(path))
+            os.replace(built, path)
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+        self.evict(keep=path)
+
+    def entries(self):
+        # [(last use, bytes, path)] of every cached trace, oldest first
+        entries = []
+        if not os.path.isdir(self.directory):
+            return entries
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.startswith(".") or name.endswith(MANIFEST_SUFFIX) or not os.path.isfile(path):
+                continue
+            try:
+                status = os.stat(path)
+            except FileNotFoundError:
+                continue  # evicted concurrently
+            size = status.st_size
+            if os.path.exists(manifest_path(path)):
+                size += os.path.getsize(manifest_path(path))
+            entries.append((status.st_mtime, size, path))
+        return sorted(entries)
+
+    def evict(self, keep=None, budget=None):
+        # Removes least recently used entries until the cache fits its budget;
+        # returns the number removed. Sandboxes holding a hard link keep their copy.
+        budget = self.budget if budget is None else budget
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in entries:
+            if total <= budget:
+                break
+            if path == keep:
+                continue
+            for victim in (path, manifest_path(path)):
+                try:
+                    os.remove(victim)
+                except FileNotFoundError:
+                    pass
+            total -= size
+            removed += 1
+        return removed
+
+
+def cached_trace_mixed(cache, size, num_requests, pattern, mix, seed=None, binary=False, directory=".",
+                       layout=DEFAULT_LAYOUT):
+    # Same file as opmix.create_trace_mixed, served from the cache
+    destination = mixed_trace_name(size, pattern, mix, binary, directory)
+    key = cache.key(generator="opmix.create_trace_mixed", size=size, pattern=pattern, requests=num_requests,
+                    mix=mix, seed=seed, binary=binary, layout=layout_description(layout))
+    return cache.fetch(key, destination, lambda path: create_pattern_trace(
+        path, pattern, num_requests, mix, "opmix.create_trace_mixed", {"size": size}, seed, layout))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or trim the generated-trace cache")
+    parser.add_argument("command", choices=["list", "evict", "clear"])
+    parser.add_argument("--dir", default=CACHE_DIR)
+    parser.add_argument("--budget", default=str(DEFAULT_BUDGET), help="byte budget, e.g. 512M or 4G")
+    args = parser.parse_args()
+
+    cache = TraceCache(args.dir, parse_bytes(args.budget))
+    if args.command == "list":
+        entries = cache.entries()
+        for _, size, path in entries:
+            print(f"{size:>12d}  {os.path.basename(path)}")
+        print(f"{len(entries)} traces, {sum(size for _, size, _ in entries)} bytes (budget {cache.budget}).")
+    elif args.command == "evict":
+        print(f"Evicted {cache.evict()} traces.")
+    else:
+        print(f"Evicted {cache.evict(budget=0)} traces.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+import os
+
+import numpy as np
+
+from address_layout import DEFAULT_LAYOUT
+from manifest import ManifestBuilder
+
+# Binary traces store one record per request: the address and 1 for a write,
+# 0 for a read. Text traces use Ramulator's DRAM-mode format "0x0000ABCD W".
+BINARY_SUFFIX = ".btrace"
+TRACE_DTYPE = np.dtype([("address", "<u8"), ("write", "u1")])
+
+# Requests formatted per write() call, bounds the memory used for huge traces
+CHUNK_REQUESTS = 1 << 20
+
+HEX_DIGITS = np.frombuffer(b"0123456789ABCDEF", dtype=np.uint8)
+TEXT_LINE_BYTES = 13  # "0x" + 8 hex digits + " " + op + "\n"
+
+# Bytes of a text trace parsed at a time when reading
+CHUNK_BYTES = 64 << 20
+NEWLINE = ord('\n')
+
+# Value of every byte as a hex digit, INVALID_NIBBLE for anything else
+INVALID_NIBBLE = 0xFF
+HEX_VALUES = np.full(256, INVALID_NIBBLE, dtype=np.uint8)
+HEX_VALUES[np.frombuffer(b"0123456789", dtype=np.uint8)] = np.arange(10)
+HEX_VALUES[np.frombuffer(b"ABCDEF", dtype=np.uint8)] = np.arange(10, 16)
+HEX_VALUES[np.frombuffer(b"abcdef", dtype=np.uint8)] = np.arange(10, 16)
+
+
+def is_binary_trace(filename):
+    return str(filename).endswith(BINARY_SUFFIX)
+
+
+def read_trace(filename):
+    # Returns (addresses as uint64, is_write as bool) for a text or binary
+    # trace; lines that cannot be parsed are skipped (see validate_trace.py)
+    addresses = []
+    is_write = []
+    for chunk in iter_trace(filename):
+        valid = ~chunk.malformed
+        addresses.append(chunk.addresses[valid])
+        is_write.append(chunk.is_write[valid])
+    if not addresses:
+        return np.zeros(0, dtype=np.uint64), np.zeros(0, dtype=bool)
+    return np.concatenate(addresses), np.concatenate(is_write)
+
+
+class TraceChunk:
+    __slots__ = ("start", "addresses", "is_write", "ops", "digits", "malformed")
+
+    def __init__(self, start, addresses, is_write, ops, digits, malformed):
+        self.start = start          # index of the chunk's first request in the trace
+        self.addresses = addresses
+        self.is_write = is_write
+        self.ops = ops              # raw op byte of every request, b'W' or b'R' when valid
+        self.digits = digits        # hex digits of every address, 0 for binary traces
+        self.malformed = malformed  # lines whose address or op could not be parsed
+
+
+def iter_trace(filename, chunk_bytes=CHUNK_BYTES):
+    # Streams a trace in chunks straight from a memory map, so GB-scale traces
+    # are parsed with a handful of NumPy passes per chunk
+    if os.path.getsize(filename) == 0:
+        return
+    if is_binary_trace(filename):
+        records = np.memmap(filename, dtype=TRACE_DTYPE, mode='r')
+        step = max(chunk_bytes // TRACE_DTYPE.itemsize, 1)
+        for start in range(0, len(records), step):
+            chunk = records[start:start + step]
+            count = len(chunk)
+            ops = np.where(chunk["write"] != 0, ord('W'), ord('R')).astype(np.uint8)
+            yield TraceChunk(start, np.array(chunk["address"]), chunk["write"] != 0, ops,
+                             np.zeros(count, dtype=np.uint8), np.zeros(count, dtype=bool))
+        return
+
+    data = np.memmap(filename, dtype=np.uint8, mode='r')
+    offset = 0
+    start = 0
+    while offset < len(data):
+        end = min(offset + chunk_bytes, len(data))
+        if end < len(data):
+            # Only hand complete lines to the parser
+            newlines = np.flatnonzero(data[offset:end] == NEWLINE)
+            if len(newlines) == 0:
+                raise ValueError(f"Line longer than {chunk_bytes} bytes in {filename}")
+            end = offset + int(newlines[-1]) + 1
+        chunk = parse_text(np.asarray(data[offset:end]), start)
+        yield chunk
+        start += len(chunk.addresses)
+        offset = end
+
+
+def parse_fixed_width(buffer, start):
+    # Fast path for traces written by format_text(): every line is exactly
+    # TEXT_LINE_BYTES long, so the chunk is a byte matrix and the 8 hex digits
+    # pack pairwise into a big-endian 32-bit value
+    if len(buffer) % TEXT_LINE_BYTES:
+        return None
+    lines = buffer.reshape(-1, TEXT_LINE_BYTES)
+    if not ((lines[:, 12] == NEWLINE).all() and (lines[:, 10] == ord(' ')).all() and
+            (lines[:, 0] == ord('0')).all() and (lines[:, 1] == ord('x')).all()):
+        return None
+
+    nibbles = HEX_VALUES[lines[:, 2:10]]
+    packed = np.ascontiguousarray((nibbles[:, 0::2] << 4) | (nibbles[:, 1::2] & 0xF))
+    addresses = packed.view('>u4').ravel().astype(np.uint64)
+    ops = lines[:, 11]
+    malformed = (nibbles == INVALID_NIBBLE).any(axis=1) | ((ops != ord('W')) & (ops != ord('R')))
+    count = len(lines)
+    return TraceChunk(start, addresses, ops == ord('W'), np.array(ops), np.full(count, 8, dtype=np.uint8), malformed)
+
+
+def parse_text(buffer, start=0):
+    # Parses complete "0x<hex> <op>" lines. Each line is located by its newline
+    # and its single space; the hex digits are then accumulated right to left,
+    # one vectorized pass per digit position.
+    if len(buffer) and buffer[-1] != NEWLINE:
+        buffer = np.append(buffer, np.uint8(NEWLINE))
+    fixed = parse_fixed_width(buffer, start)
+    if fixed is not None:
+        return fixed
+
+    line_ends = np.flatnonzero(buffer == NEWLINE)
+    line_starts = np.concatenate(([0], line_ends[:-1] + 1))
+    count = len(line_ends)
+
+    spaces = np.flatnonzero(buffer == ord(' '))
+    malformed = np.zeros(count, dtype=bool)
+    if len(spaces) != count:
+        # Fall back to the first space of every line when some lines have none or several
+        line_of_space = np.searchsorted(line_ends, spaces)
+        first = np.full(count, -1, dtype=np.int64)
+        first[line_of_space[::-1]] = spaces[::-1]
+        malformed |= first < 0
+        spaces = np.where(first < 0, line_ends, first)
+
+    hex_starts = line_starts + 2
+    digits = spaces - hex_starts
+    malformed |= (digits < 1) | (digits > 16)
+    malformed |= buffer[np.minimum(line_starts, len(buffer) - 1)] != ord('0')
+    malformed |= buffer[np.minimum(line_starts + 1, len(buffer) - 1)] != ord('x')
+
+    addresses = np.zeros(count, dtype=np.uint64)
+    for position in range(16):
+        has_digit = (position < digits) & ~malformed
+        if not has_digit.any():
+            break
+        nibbles = HEX_VALUES[buffer[np.where(has_digit, spaces - 1 - position, 0)]]
+        malformed |= has_digit & (nibbles == INVALID_NIBBLE)
+        addresses |= np.where(has_digit, nibbles, 0).astype(np.uint64) << np.uint64(4 * position)
+
+    ops = buffer[np.minimum(spaces + 1, len(buffer) - 1)]
+    malformed |= (ops != ord('W')) & (ops != ord('R'))
+    return TraceChunk(start, addresses, ops == ord('W'), ops, np.maximum(digits, 0).astype(np.uint8), malformed)
+
+
+def format_text(addresses, is_write):
+    # Builds all lines at once as a (requests x 13) byte matrix; identical to
+    # f"0x{address:08X} {op}\n" as long as every address fits in 8 hex digits
+    if len(addresses) and int(addresses.max()) > 0xFFFFFFFF:
+        return "".join(f"0x{int(address):08X} {'W' if write else 'R'}\n"
+                       for address, write in zip(addresses, is_write)).encode()
+
+    lines = np.empty((len(addresses), TEXT_LINE_BYTES), dtype=np.uint8)
+    put_hex(lines, 0, addresses)
+    lines[:, 10] = ord(' ')
+    lines[:, 11] = np.where(is_write, ord('W'), ord('R'))
+    lines[:, 12] = ord('\n')
+    return lines.tobytes()
+
+
+def format_binary(addresses, is_write):
+    records = np.empty(len(addresses), dtype=TRACE_DTYPE)
+    records["address"] = addresses
+    records["write"] = is_write
+    return records.tobytes()
+
+
+def put_hex(lines, column, addresses):
+    # "0x" and 8 hex digits of every address, from `column` of each line
+    lines[:, column] = ord('0')
+    lines[:, column + 1] = ord('x')
+    for digit in range(8):
+        nibble = (addresses >> np.uint64(4 * (7 - digit))) & np.uint64(0xF)
+        lines[:, column + 2 + digit] = HEX_DIGITS[nibble.astype(np.intp)]
+
+
+def format_cpu_text(addresses, bubbles):
+    # Ramulator --mode=cpu trace: "<non-memory instructions> <read address>" per
+    # line. Built as a byte matrix like format_text, with the instruction
+    # counts right-aligned in a column as wide as the longest one; the padding
+    # in front of the shorter ones is dropped when the lines are joined.
+    addresses = np.asarray(addresses, dtype=np.uint64)
+    bubbles = np.asarray(bubbles, dtype=np.int64)
+    if len(addresses) == 0:
+        return b""
+    if int(addresses.max()) > 0xFFFFFFFF or int(bubbles.min()) < 0:
+        return "".join(f"{int(bubble)} 0x{int(address):08X}\n"
+                       for bubble, address in zip(bubbles, addresses)).encode()
+
+    width = len(str(int(bubbles.max())))
+    lines = np.empty((len(addresses), width + 12), dtype=np.uint8)
+    digits = np.ones(len(bubbles), dtype=np.int64)
+    value = bubbles.copy()
+    for column in range(width - 1, -1, -1):
+        lines[:, column] = ord('0') + value % 10
+        value //= 10
+        digits += value > 0
+    lines[:, width] = ord(' ')
+    put_hex(lines, width + 1, addresses)
+    lines[:, width + 11] = ord('\n')
+    return lines[np.arange(width + 12) >= (width - digits)[:, None]].tobytes()
+
+
+def encode_requests(addresses, is_write, binary=False):
+    addresses = np.asarray(addresses, dtype=np.uint64)
+    is_write = np.asarray(is_write, dtype=bool)
+    if binary:
+        return format_binary(addresses, is_write)
+    return format_text(addresses, is_write)
+
+
+class TraceWriter:
+    # Writes a trace batch by batch and builds its manifest in the same pass
+    def __init__(self, filename, generator="unknown", params=None, layout=DEFAULT_LAYOUT):
+        self.filename = filename
+        self.binary = is_binary_trace(filename)
+        self.manifest = ManifestBuilder(generator, params, layout, self.binary)
+        self.file = open(filename, 'wb')
+
+    def write(self, addresses, is_write):
+        addresses = np.asarray(addresses, dtype=np.uint64)
+        is_write = np.asarray(is_write, dtype=bool)
+        for start in range(0, len(addresses), CHUNK_REQUESTS):
+            end = start + CHUNK_REQUESTS
+            data = encode_requests(addresses[start:end], is_write[start:end], self.binary)
+            self.file.write(data)
+            self.manifest.update(addresses[start:end], is_write[start:end], data)
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+            self.manifest.save(self.filename)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            # No manifest for a trace that was not written completely
+            self.file.close()
+
+
+def write_trace(filename, addresses, is_write, generator="unknown", params=None, layout=DEFAULT_LAYOUT):
+    with TraceWriter(filename, generator, params, layout) as writer:
+        writer.write(addresses, is_write)
+    return filename
@@ -0,0 +1,192 @@
+import argparse
+import sys
+
+import numpy as np
+
+from address_layout import DEFAULT_LAYOUT
+from ramulator_config import capacity_from_config
+from trace_io import iter_trace
+
+# Duplicate detection keeps one bit per addressable word; layouts whose
+# address space would need a larger bitmap skip it
+MAX_BITMAP_BYTES = 1 << 30
+# Wrap-around regions listed in the report
+MAX_REGIONS_SHOWN = 10
+
+
+class TraceValidator:
+    def __init__(self, layout=DEFAULT_LAYOUT, capacity=None):
+        self.layout = layout
+        self.capacity = capacity if capacity is not None else layout.capacity
+
+        self.requests = 0
+        self.writes = 0
+        self.reads = 0
+        self.malformed = 0
+        self.first_malformed = None
+        self.wide = 0              # addresses that do not fit in 8 hex digits
+        self.noncanonical = 0      # text addresses not written with exactly 8 digits
+        self.out_of_range = 0      # addresses beyond the layout or the configured capacity
+        self.first_out_of_range = None
+        self.unaligned = 0         # addresses with non-zero offset bits
+
+        self.bank_histogram = np.zeros(layout.num_banks, dtype=np.int64)
+        self.row_histogram = np.zeros(layout.field_count("row"), dtype=np.int64)
+        self.field_min = {field: None for field in layout.order}
+        self.field_max = {field: None for field in layout.order}
+
+        # Writes to a word that was already written mark the trace wrapping around
+        self.word_shift = layout.bits["offset"]
+        words = min(self.capacity, layout.capacity) >> self.word_shift
+        self.written = np.zeros((words + 7) // 8, dtype=np.uint8) if words // 8 <= MAX_BITMAP_BYTES else None
+        self.duplicate_writes = 0
+        self.regions = []          # [first request, length] of consecutive duplicate writes
+        self.previous_duplicate = False
+
+    def add(self, chunk):
+        count = len(chunk.addresses)
+        index = chunk.start + np.arange(count)
+        self.requests += count
+
+        bad = chunk.malformed
+        if bad.any():
+            self.malformed += int(bad.sum())
+            if self.first_malformed is None:
+                self.first_malformed = int(index[bad][0])
+            valid = ~bad
+            addresses = chunk.addresses[valid]
+            is_write = chunk.is_write[valid]
+            digits = chunk.digits[valid]
+            index = index[valid]
+        else:
+            # Common case, no copies needed
+            addresses, is_write, digits = chunk.addresses, chunk.is_write, chunk.digits
+        self.writes += int(is_write.sum())
+        self.reads += int((~is_write).sum())
+
+        self.wide += int(np.count_nonzero(addresses > np.uint64(0xFFFFFFFF)))
+        self.noncanonical += int(np.count_nonzero((digits != 8) & (digits != 0)))
+
+        in_range = addresses < np.uint64(min(self.capacity, self.layout.capacity))
+        if not in_range.all():
+            self.out_of_range += int(np.count_nonzero(~in_range))
+            if self.first_out_of_range is None:
+                self.first_out_of_range = int(index[~in_range][0])
+            addresses = addresses[in_range]
+            is_write = is_write[in_range]
+            index = index[in_range]
+
+        fields = self.layout.decode(addresses)
+        self.unaligned += int(np.count_nonzero(fields["offset"]))
+        for field, values in fields.items():
+            if len(values) == 0:
+                continue
+            low, high = int(values.min()), int(values.max())
+            self.field_min[field] = low if self.field_min[field] is None else min(self.field_min[field], low)
+            self.field_max[field] = high if self.field_max[field] is None else max(self.field_max[field], high)
+        self.bank_histogram += np.bincount(self.layout.bank_id(fields).astype(np.intp),
+                                           minlength=self.layout.num_banks)
+        self.row_histogram += np.bincount(fields["row"].astype(np.intp),
+                                          minlength=len(self.row_histogram))
+
+        if self.written is not None:
+            self.track_duplicates(addresses[is_write], index[is_write])
+
+    def track_duplicates(self, addresses, index):
+        if len(addresses) == 0:
+            return
+        words = (addresses >> np.uint64(self.word_shift)).astype(np.int64)
+        byte = words >> 3
+        bit = (1 << (words & 7)).astype(np.uint8)
+
+        duplicate = (self.written[byte] & bit) != 0
+        # Repeats inside the chunk are duplicates too
+        _, first = np.unique(words, return_index=True)
+        repeated = np.ones(len(words), dtype=bool)
+        repeated[first] = False
+        duplicate |= repeated
+        np.bitwise_or.at(self.written, byte, bit)
+        self.duplicate_writes += int(duplicate.sum())
+
+        # Regions are runs of consecutive duplicate writes
+        starts = duplicate & ~np.concatenate(([self.previous_duplicate], duplicate[:-1]))
+        ends = duplicate & ~np.concatenate((duplicate[1:], [False]))
+        start_positions = np.flatnonzero(starts)
+        end_positions = np.flatnonzero(ends)
+        if duplicate[0] and self.previous_duplicate and self.regions:
+            # The first run continues the last region of the previous chunk
+            self.regions[-1][1] += int(end_positions[0]) + 1
+            end_positions = end_positions[1:]
+        for start, end in zip(start_positions, end_positions):
+            self.regions.append([int(index[start]), int(end - start) + 1])
+        self.previous_duplicate = bool(duplicate[-1])
+
+    @property
+    def errors(self):
+        return self.malformed + self.out_of_range
+
+    def report(self):
+        lines = [f"requests: {self.requests}  writes: {self.writes}  reads: {self.reads}"]
+        if self.requests:
+            lines.append(f"op distribution: {self.writes / self.requests:.1%} W, {self.reads / self.requests:.1%} R")
+        lines.append(f"layout: {self.layout}  capacity: {self.capacity} bytes")
+        lines.append(f"malformed lines: {self.malformed}" +
+                     (f" (first at request {self.first_malformed})" if self.first_malformed is not None else ""))
+        lines.append(f"out of range: {self.out_of_range}" +
+                     (f" (first at request {self.first_out_of_range})" if self.first_out_of_range is not None else ""))
+        lines.append(f"wider than 8 hex digits: {self.wide}  non-canonical width: {self.noncanonical}")
+        lines.append(f"unaligned (offset bits set): {self.unaligned}")
+        for field in self.layout.order:
+            if self.field_min[field] is not None:
+                lines.append(f"    {field:11s} {self.field_min[field]:>8d} .. {self.field_max[field]:<8d}"
+                             f" of {self.layout.field_count(field)}")
+        if self.written is None:
+            lines.append("duplicate writes: not checked, address space too large")
+        else:
+            lines.append(f"duplicate writes: {self.duplicate_writes} in {len(self.regions)} wrap-around regions")
+            for start, length in self.regions[:MAX_REGIONS_SHOWN]:
+                lines.append(f"    requests {start} .. {start + length - 1}")
+        lines.append("per-bank requests: " + " ".join(str(int(count)) for count in self.bank_histogram))
+        touched = np.count_nonzero(self.row_histogram)
+        lines.append(f"rows touched: {touched}  busiest row: {int(self.row_histogram.argmax())} "
+                     f"({int(self.row_histogram.max())} requests)")
+        return "\n".join(lines)
+
+
+def validate(filename, layout=DEFAULT_LAYOUT, capacity=None):
+    validator = TraceValidator(layout, capacity)
+    for chunk in iter_trace(filename):
+        validator.add(chunk)
+    return validator
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate traces and decode them with the project's address layout")
+    parser.add_argument("traces", nargs="+")
+    parser.add_argument("--capacity", type=int, help="DRAM capacity in bytes (default: the layout's address space)")
+    parser.add_argument("--config", help="take the DRAM capacity from this Ramulator config")
+    parser.add_argument("--histograms", help="save per-bank and per-row histograms to this .npz file")
+    args = parser.parse_args()
+
+    capacity = args.capacity
+    if capacity is None and args.config:
+        capacity = capacity_from_config(args.config)
+
+    failed = False
+    histograms = {}
+    for filename in args.traces:
+        validator = validate(filename, capacity=capacity)
+        print(filename)
+        print(validator.report())
+        histograms[f"{filename}:banks"] = validator.bank_histogram
+        histograms[f"{filename}:rows"] = validator.row_histogram
+        failed |= validator.errors > 0
+
+    if args.histograms:
+        np.savez_compressed(args.histograms, **histograms)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
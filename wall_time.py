@@ -0,0 +1,100 @@
+import heapq
+
+import numpy as np
+
+from opmix import trace_requests
+from results_store import load_records
+
+# Wall-time model for sweep jobs: seconds ~ startup + cost per request, fitted
+# per (pattern, simulation mode) from the "elapsed" of earlier runs in the
+# results store, and refined with every job that finishes during a sweep. The
+# same model fits other per-job costs recorded in the store, e.g. "peak_rss".
+DEFAULT_STARTUP = 0.5  # seconds; used until any history exists
+DEFAULT_PER_REQUEST = 2e-5
+MINIMUM_SECONDS = 0.01
+
+
+def job_kind(scenario, rate):
+    return (scenario, "cpu" if rate is not None else "dram")
+
+
+class CostModel:
+    def __init__(self, history=(), field="elapsed", defaults=(DEFAULT_STARTUP, DEFAULT_PER_REQUEST),
+                 minimum=MINIMUM_SECONDS, fallback="per_request"):
+        self.field = field
+        # Which coefficient explains the cost while the samples cover a single
+        # request count: "per_request" (time) or "startup" (e.g. memory)
+        self.fallback = fallback
+        self.defaults = defaults
+        self.minimum = minimum
+        self.samples = {}  # {(scenario, mode): [(requests in the trace, cost)]}
+        self.fits = {}
+        for record in history:
+            if record.get(field) is not None and record.get("requests") is not None:
+                self.add(job_kind(record.get("scenario"), record.get("rate")),
+                         trace_requests(record["requests"], record.get("mix") or "W"), record[field])
+
+    @classmethod
+    def from_store(cls, store, **options):
+        return cls(load_records(store), **options)
+
+    def add(self, kind, requests, seconds):
+        self.samples.setdefault(kind, []).append((requests, seconds))
+        self.fits.clear()
+
+    def observe(self, job, seconds):
+        self.add(job_kind(job.scenario, job.rate), trace_requests(job.requests, job.mix), seconds)
+
+    def fit(self, samples):
+        # (startup, per request); a single sample or one request count only
+        # fixes the fallback coefficient
+        requests = np.array([s[0] for s in samples], dtype=float)
+        seconds = np.array([s[1] for s in samples], dtype=float)
+        if len(np.unique(requests)) >= 2:
+            X = np.stack([np.ones_like(requests), requests], axis=1)
+            startup, per_request = np.linalg.lstsq(X, seconds, rcond=None)[0]
+            if startup >= 0 and per_request >= 0:
+                return float(startup), float(per_request)
+        if self.fallback == "startup":
+            return float(seconds.max()), 0.0
+        return 0.0, float(seconds.sum() / max(requests.sum(), 1.0))
+
+    def coefficients(self, kind):
+        if kind not in self.fits:
+            if self.samples.get(kind):
+                self.fits[kind] = self.fit(self.samples[kind])
+            elif self.samples:
+                # Unseen pattern: pool the history of every pattern
+                self.fits[kind] = self.fit([s for samples in self.samples.values() for s in samples])
+            else:
+                self.fits[kind] = self.defaults
+        return self.fits[kind]
+
+    def predict(self, job):
+        startup, per_request = self.coefficients(job_kind(job.scenario, job.rate))
+        return max(startup + per_request * trace_requests(job.requests, job.mix), self.minimum)
+
+    def order(self, jobs):
+        # Longest job first, in place
+        jobs.sort(key=self.predict, reverse=True)
+        return jobs
+
+
+def makespan(durations, workers, busy=()):
+    # Finish time of list-scheduling `durations` in order onto `workers`
+    # workers, some of which are still busy for the given seconds
+    loads = sorted(list(busy)[:workers] + [0.0] * max(workers - len(busy), 0))
+    heapq.heapify(loads)
+    for duration in durations:
+        heapq.heappush(loads, heapq.heappop(loads) + duration)
+    return max(loads) if loads else 0.0
+
+
+def format_duration(seconds):
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}h{minutes:02d}m"
+    if minutes:
+        return f"{minutes}m{seconds:02d}s"
+    return f"{seconds}s"
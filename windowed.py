@@ -0,0 +1,213 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from generators import GENERATORS
+from injection import LINE_BYTES
+from opmix import create_trace_mixed
+from ramulator_stats import parse_stats_file
+from results_store import append_record, load_records
+from sweep import BASE_CONFIG, RAMULATOR, RUN_ROOT, Job
+from sweep_spec import simulate_trace
+from trace_io import read_trace, write_trace
+
+# Windowed simulation. Ramulator only reports end-of-run aggregates, which
+# hide warm-up and phase changes (e.g. the bank pattern crossing rows). The
+# trace is cut into consecutive windows of `window` requests that are
+# simulated in parallel, and every stat becomes a time series over the
+# windows. A window on its own starts with closed rows and an empty queue;
+# with `warmup` > 0 it is preceded by the requests just before it, and a
+# run of those requests alone is subtracted, so the window's counters start
+# from a warmed-up controller. The series go to their own store, like
+# harvest.jsonl, so they do not mix with the sweeps' points.
+WINDOW_STORE = "windows.jsonl"
+DEFAULT_WINDOW = 4096
+
+# Stats that describe the system, not the run; never differenced
+CONSTANT_KEYS = {"ramulator.maximum_bandwidth", "ramulator.dram_capacity"}
+
+# Averages recomputed from the differenced sums: {average: (sum, "reads" or "cycles")}
+AVERAGES = {
+    "ramulator.read_latency_avg_0": ("ramulator.read_latency_sum_0", "reads"),
+    "ramulator.average_serving_requests_0": ("ramulator.serving_requests_0", "cycles"),
+    "ramulator.req_queue_length_avg_0": ("ramulator.req_queue_length_sum_0", "cycles"),
+    "ramulator.in_queue_req_num_avg": ("ramulator.in_queue_req_num_sum", "cycles"),
+    "ramulator.in_queue_read_req_num_avg": ("ramulator.in_queue_read_req_num_sum", "cycles"),
+    "ramulator.in_queue_write_req_num_avg": ("ramulator.in_queue_write_req_num_sum", "cycles"),
+}
+
+# Timeline panels: (label, function of one window's stats)
+TIMELINES = [
+    ("DRAM cycles per request", lambda s: ratio(s.get("ramulator.dram_cycles"),
+                                                s.get("ramulator.incoming_requests_per_channel"))),
+    ("Average read latency (cycles)", lambda s: s.get("ramulator.read_latency_avg_0")),
+    ("Row hit rate", lambda s: ratio(s.get("ramulator.row_hits_channel_0_core"),
+                                     sum(s.get(f"ramulator.row_{outcome}_channel_0_core", 0)
+                                         for outcome in ("hits", "misses", "conflicts")))),
+    ("Average in-queue requests", lambda s: s.get("ramulator.in_queue_req_num_avg")),
+]
+
+
+def ratio(numerator, denominator):
+    if numerator is None or not denominator:
+        return None
+    return numerator / denominator
+
+
+def window_stats(stats, warm=None):
+    # Stats of a window from the run with its warm-up (stats) and the run of
+    # the warm-up alone (warm): counters are differenced, averages recomputed.
+    # An average missing from AVERAGES cannot be recomputed; it keeps its
+    # value over warm-up and window together.
+    if warm is None:
+        return dict(stats)
+    window = {}
+    for key, value in stats.items():
+        if key in CONSTANT_KEYS or (key not in AVERAGES and ("avg" in key or "average" in key)):
+            window[key] = value
+        elif key not in AVERAGES:
+            window[key] = value - warm.get(key, 0.0)
+    reads = window.get("ramulator.read_transaction_bytes_0", 0.0) / LINE_BYTES
+    cycles = window.get("ramulator.dram_cycles", 0.0)
+    for key, (total, denominator) in AVERAGES.items():
+        if total in window:
+            window[key] = ratio(window[total], reads if denominator == "reads" else cycles)
+    return window
+
+
+def split_trace(filename, window, warmup, directory):
+    # Writes "w<index>.trace" for every window (preceded by up to `warmup`
+    # requests) and "w<index>_warmup.trace" with those requests alone;
+    # returns [(window trace, warm-up trace or None, first request)].
+    # The trace is read whole: windowed runs are for traces that fit in memory.
+    addresses, is_write = read_trace(filename)
+    os.makedirs(directory, exist_ok=True)
+    windows = []
+    for index, start in enumerate(range(0, len(addresses), window)):
+        begin = max(start - warmup, 0)
+        end = min(start + window, len(addresses))
+        params = {"source": os.path.basename(filename), "start": start, "requests": end - start, "warmup": start - begin}
+        trace = write_trace(os.path.join(directory, f"w{index:05d}.trace"), addresses[begin:end],
+                            is_write[begin:end], "windowed.split_trace", params)
+        warm = None
+        if begin < start:
+            warm = write_trace(os.path.join(directory, f"w{index:05d}_warmup.trace"), addresses[begin:start],
+                               is_write[begin:start], "windowed.split_trace", dict(params, requests=0))
+        windows.append((trace, warm, start))
+    return windows
+
+
+def simulate_windows(windows, sandbox, params, ramulator, base_config, workers=None):
+    # [stats of every window], simulating each window and warm-up in parallel
+    runs = []
+    for trace, warm, _ in windows:
+        for path in (trace, warm):
+            if path is not None:
+                name = os.path.splitext(os.path.basename(path))[0]
+                runs.append((os.path.join(sandbox, name), path, params, os.path.abspath(ramulator), base_config))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        stats = {os.path.basename(run[0]): parse_stats_file(stats_file)
+                 for run, (stats_file, _) in zip(runs, pool.map(simulate_trace, runs))}
+    series = []
+    for trace, warm, _ in windows:
+        name = os.path.splitext(os.path.basename(trace))[0]
+        series.append(window_stats(stats[name], stats[name + "_warmup"] if warm is not None else None))
+    return series
+
+
+def run_windowed(job, window=DEFAULT_WINDOW, warmup=0, workers=None, ramulator=RAMULATOR,
+                 base_config=BASE_CONFIG, run_root=RUN_ROOT, trace=None):
+    # Record with the per-window series of one job's trace (or of `trace`)
+    start = time.time()
+    sandbox = os.path.abspath(os.path.join(run_root, "windows", job.name))
+    os.makedirs(sandbox, exist_ok=True)
+    if trace is None:
+        trace = create_trace_mixed(job.size, job.requests, job.scenario, job.mix, job.seed, directory=sandbox)
+    windows = split_trace(trace, window, warmup, os.path.join(sandbox, "traces"))
+    series = simulate_windows(windows, sandbox, job.params, ramulator, base_config, workers)
+
+    keys = sorted({key for stats in series for key in stats})
+    record = job.record()
+    record.update({
+        "trace": trace,
+        "window": window,
+        "warmup": warmup,
+        "starts": [first for _, _, first in windows],
+        # {stat: [value per window]}, None where a window lacks the stat
+        "series": {key: [stats.get(key) for stats in series] for key in keys},
+        "elapsed": time.time() - start,
+    })
+    return record
+
+
+def plot_timelines(records, output):
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    fig, axes = plt.subplots(len(TIMELINES), 1, figsize=(12, 3 * len(TIMELINES)), sharex=True)
+    for record in records:
+        label = f"{record['scenario']} {record['size']:g} B {record.get('mix', 'W')}"
+        if record.get("warmup"):
+            label += f" (warm-up {record['warmup']})"
+        series = record["series"]
+        windows = [{key: values[i] for key, values in series.items()} for i in range(len(record["starts"]))]
+        for ax, (name, value) in zip(axes, TIMELINES):
+            points = [(start, value(stats)) for start, stats in zip(record["starts"], windows)]
+            points = [(start, y) for start, y in points if y is not None]
+            ax.step([p[0] for p in points], [p[1] for p in points], where="post", label=label)
+            ax.set_ylabel(name)
+    axes[-1].set_xlabel("Request index at window start")
+    axes[0].legend(fontsize="small")
+    for ax in axes:
+        ax.grid(True, alpha=0.3)
+    fig.suptitle(f"Per-window stats ({records[0]['window']} requests per window)")
+    fig.tight_layout()
+    fig.savefig(output)
+    plt.close(fig)
+    print(f"Saved {output}.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate a trace window by window and plot per-window stats")
+    parser.add_argument("--scenario", action="append", dest="scenarios", choices=sorted(GENERATORS),
+                        help="default: banks when simulating, every stored series with --plot-only")
+    parser.add_argument("--size", type=int, default=262144, help="trace size in bytes")
+    parser.add_argument("--mix", default="interleaved")
+    parser.add_argument("--trace", help="split this trace instead of generating one (one scenario label)")
+    parser.add_argument("--window", type=int, default=DEFAULT_WINDOW, help="trace requests per window")
+    parser.add_argument("--warmup", type=int, default=0, help="requests replayed before each window")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--ramulator", default=RAMULATOR)
+    parser.add_argument("--config", default=BASE_CONFIG)
+    parser.add_argument("--store", default=WINDOW_STORE)
+    parser.add_argument("--output", default="timeline.png")
+    parser.add_argument("--plot-only", action="store_true", help="plot the store's latest series without simulating")
+    args = parser.parse_args()
+    if args.trace and args.scenarios and len(args.scenarios) > 1:
+        parser.error("--trace is simulated once; give at most one --scenario to label it")
+
+    scenarios = args.scenarios
+    if args.plot_only:
+        latest = {}
+        for record in load_records(args.store):
+            if not scenarios or record["scenario"] in scenarios:
+                latest[(record["scenario"], record["size"], record.get("mix"), record["window"])] = record
+        records = list(latest.values())
+    else:
+        records = []
+        for scenario in scenarios or ["banks"]:
+            record = run_windowed(Job(scenario, args.size, mix=args.mix), args.window, args.warmup, args.workers,
+                                  args.ramulator, args.config, trace=args.trace)
+            append_record(record, args.store)
+            records.append(record)
+            print(f"Simulated {len(record['starts'])} windows of {scenario} in {record['elapsed']:.1f} s.")
+    if records:
+        plot_timelines(records, args.output)
+    else:
+        print(f"No windowed runs in {args.store}.")
+
+
+if __name__ == "__main__":
+    main()